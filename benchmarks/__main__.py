@@ -0,0 +1,124 @@
+#!/usr/bin/env python
+#
+# Runs the benchmark suite, or compares two of its result files.
+#
+#   python -m benchmarks run [-o results.json] [--scale 0.1] [workload ...]
+#   python -m benchmarks compare old.json new.json [--threshold 0.1]
+#
+# Results are JSON.  compare exits with status 1 if any benchmark's
+# throughput or p99 latency got worse by more than the threshold.
+
+import argparse
+import json
+import platform
+import sys
+import time
+
+import chan
+
+from . import suite
+
+
+def run(args):
+    workloads = suite.WORKLOADS
+    if args.workloads:
+        by_name = dict((w.__name__, w) for w in workloads)
+        unknown = [name for name in args.workloads if name not in by_name]
+        if unknown:
+            sys.exit("Unknown workloads: %s (choose from %s)" % (
+                ', '.join(unknown), ', '.join(sorted(by_name))))
+        workloads = [by_name[name] for name in args.workloads]
+
+    results = {}
+    for workload in workloads:
+        for name, result in workload(args.scale):
+            results[name] = result
+            sys.stderr.write("%-40s %12.0f op/s  p50 %8.1fus  p99 %8.1fus  "
+                             "p999 %8.1fus\n" % (
+                                 name, result['throughput'],
+                                 result.get('p50', 0) * 1e6,
+                                 result.get('p99', 0) * 1e6,
+                                 result.get('p999', 0) * 1e6))
+
+    report = {
+        'meta': {
+            'chan_version': chan.__version__,
+            'python': platform.python_version(),
+            'implementation': platform.python_implementation(),
+            'platform': platform.platform(),
+            'time': time.time(),
+            'scale': args.scale,
+        },
+        'results': results,
+    }
+    out = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        json.dump(report, out, indent=2, sort_keys=True)
+        out.write('\n')
+    finally:
+        if args.output:
+            out.close()
+
+
+def compare(args):
+    with open(args.old) as f:
+        old = json.load(f)['results']
+    with open(args.new) as f:
+        new = json.load(f)['results']
+
+    regressions = 0
+    print("%-40s %10s %10s  %s" % ("benchmark", "throughput", "p99", ""))
+    for name in sorted(set(old) & set(new)):
+        # Both ratios are above 1 when the new run is better.
+        speed = new[name]['throughput'] / old[name]['throughput']
+        p99 = None
+        if old[name].get('p99') and new[name].get('p99'):
+            p99 = old[name]['p99'] / new[name]['p99']
+        worse = speed < 1 - args.threshold or (
+            p99 is not None and p99 < 1 - args.threshold)
+        regressions += worse
+        print("%-40s %9.2fx %9sx  %s" % (
+            name, speed, '-' if p99 is None else '%.2f' % p99,
+            'REGRESSION' if worse else ''))
+    for name in sorted(set(old) ^ set(new)):
+        print("%-40s only in %s" % (name, 'old' if name in old else 'new'))
+
+    if regressions:
+        print("%d regression(s) beyond %.0f%%" % (
+            regressions, args.threshold * 100))
+        return 1
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks')
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    run_parser = commands.add_parser('run', help="Run the benchmark suite")
+    run_parser.add_argument(
+        'workloads', nargs='*', metavar='workload',
+        help="Workloads to run: %s.  Defaults to all of them." % ', '.join(
+            w.__name__ for w in suite.WORKLOADS))
+    run_parser.add_argument('-o', '--output',
+                            help="Write JSON results here, not to stdout")
+    run_parser.add_argument('--scale', type=float, default=1.0,
+                            help="Multiplies the number of operations")
+
+    compare_parser = commands.add_parser(
+        'compare', help="Compare two result files")
+    compare_parser.add_argument('old')
+    compare_parser.add_argument('new')
+    compare_parser.add_argument(
+        '--threshold', type=float, default=0.1,
+        help="Fractional slowdown counted as a regression (default 0.1)")
+
+    args = parser.parse_args(argv)
+    if args.command == 'run':
+        run(args)
+        return 0
+    return compare(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+#
+# Measures how much memory a ping-pong between two threads allocates per
+# round trip, once both threads are warmed up.  A blocking get or put reuses
+# its thread's own wait group, so a round trip through Chan shouldn't
+# allocate at all.  SPSCChan allocates only the ints for its ever-growing
+# ring indexes.  queue.Queue is shown for comparison.
+#
+#   python -m benchmarks.alloc
+
+import itertools
+import queue
+import tracemalloc
+
+from chan import Chan, SPSCChan, quickthread
+
+ROUND_TRIPS = 10000
+WARMUP = 1000
+
+
+def echo(ping, pong):
+    while True:
+        value = ping.get()
+        if value is StopIteration:
+            return
+        pong.put(value)
+
+
+def bench_alloc(make_chan, n=ROUND_TRIPS):
+    """
+    Returns the mean number of bytes allocated by a round trip, counting
+    both threads.  Each round trip's peak is measured separately, so memory
+    that is allocated and freed again within it still counts.
+    """
+    ping, pong = make_chan(), make_chan()
+    th = quickthread(echo, ping, pong)
+    for _ in itertools.repeat(None, WARMUP):
+        ping.put(None)
+        pong.get()
+
+    traced = tracemalloc.get_traced_memory
+    reset_peak = tracemalloc.reset_peak
+    total = 0
+    tracemalloc.start()
+    # itertools.repeat, unlike range, doesn't create an int per iteration.
+    for _ in itertools.repeat(None, n):
+        reset_peak()
+        start = traced()[0]
+        ping.put(None)
+        pong.get()
+        total += traced()[1] - start
+    tracemalloc.stop()
+
+    ping.put(StopIteration)
+    th.join()
+    return float(total) / n
+
+
+def main():
+    cases = [
+        ("Chan()", Chan),
+        ("Chan(1)", lambda: Chan(1)),
+        ("SPSCChan(1)", lambda: SPSCChan(1)),
+        ("queue.Queue()", queue.Queue),
+    ]
+    print("%14s  %14s" % ("channel", "bytes/trip"))
+    for name, make_chan in cases:
+        print("%14s  %14.1f" % (name, bench_alloc(make_chan)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+#
+# Measures what the blocking profiler costs.  It only runs when a thread
+# parks, so an unbuffered ping-pong, where every get and put parks, is its
+# worst case, and a buffered put/get pair, which never parks, its best.
+#
+#   python -m benchmarks.blockprof
+
+import time
+
+from chan import BlockProfiler, Chan, quickthread
+
+PAIRS = 200000
+ROUND_TRIPS = 20000
+
+
+def buffered(n=PAIRS):
+    c = Chan(1)
+    start = time.perf_counter()
+    for i in range(n):
+        c.put(i)
+        c.get()
+    return n / (time.perf_counter() - start)
+
+
+def ping_pong(n=ROUND_TRIPS):
+    ping, pong = Chan(), Chan()
+
+    def echo():
+        for _ in range(n):
+            pong.put(ping.get())
+    th = quickthread(echo)
+    start = time.perf_counter()
+    for i in range(n):
+        ping.put(i)
+        pong.get()
+    elapsed = time.perf_counter() - start
+    th.join()
+    return n / elapsed
+
+
+def main():
+    print("%-12s  %14s  %14s  %14s" % (
+        "workload", "off (op/s)", "on (op/s)", "sampling all"))
+    for name, fn in [("buffered", buffered), ("ping-pong", ping_pong)]:
+        off = fn()
+        with BlockProfiler():
+            on = fn()
+        with BlockProfiler(threshold=0):
+            every = fn()
+        print("%-12s  %14.0f  %14.0f  %14.0f" % (name, off, on, every))
+
+
+if __name__ == '__main__':
+    main()
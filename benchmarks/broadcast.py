@@ -0,0 +1,62 @@
+#!/usr/bin/env python
+#
+# Compares fanning one stream out to N consumer threads through a
+# BroadcastChan against putting each item onto N buffered Chans.
+#
+#   python -m benchmarks.broadcast
+
+import time
+
+from chan import BroadcastChan, Chan, quickthread
+
+SUBSCRIBERS = [1, 4, 16, 64]
+BUFLEN = 128
+ITEMS = 20000
+
+
+def drain(source):
+    for _ in source:
+        pass
+
+
+def bench_chans(n, items=ITEMS):
+    """Items per second, put onto each of n channels."""
+    chans = [Chan(BUFLEN) for _ in range(n)]
+    threads = [quickthread(drain, c) for c in chans]
+    start = time.perf_counter()
+    for i in range(items):
+        for c in chans:
+            c.put(i)
+    for c in chans:
+        c.close()
+    for th in threads:
+        th.join()
+    return items / (time.perf_counter() - start)
+
+
+def bench_broadcast(n, items=ITEMS):
+    """Items per second, put once onto a BroadcastChan with n
+    subscribers."""
+    bc = BroadcastChan(BUFLEN)
+    threads = [quickthread(drain, bc.subscribe()) for _ in range(n)]
+    start = time.perf_counter()
+    for i in range(items):
+        bc.put(i)
+    bc.close()
+    for th in threads:
+        th.join()
+    return items / (time.perf_counter() - start)
+
+
+def main():
+    print("%12s  %16s  %20s  %8s" % (
+        "subscribers", "N Chans (op/s)", "BroadcastChan (op/s)", "speedup"))
+    for n in SUBSCRIBERS:
+        chans = bench_chans(n)
+        broadcast = bench_broadcast(n)
+        print("%12d  %16.0f  %20.0f  %7.2fx" % (
+            n, chans, broadcast, broadcast / chans))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+#
+# Measures a wide fan-in: one thread selecting over N channels, fed by four
+# producer threads.  The baseline is the select that chanselect used to be,
+# which locked all N channels at once, sorted, while it checked and enqueued
+# on each of them, holding up every producer meanwhile.
+#
+#   python -m benchmarks.fanin
+
+import random
+import time
+
+from chan import Chan, quickthread
+from chan.chan import WishGroup, Wish, WISH_CONSUME, all_locked
+from chan.chan import _select_locks, _select_nowait, _select_enqueue
+from chan.chan import _select_withdraw, chanselect
+
+WIDTHS = [16, 128, 1024]
+PRODUCERS = 4
+ITEMS = 10000
+
+
+def locked_select(consumers):
+    group = WishGroup()
+    for chan in consumers:
+        Wish(group, WISH_CONSUME, chan)
+    random.shuffle(group.wishes)
+    locks = _select_locks(group.wishes)
+    with all_locked(locks):
+        wish, value = _select_nowait(group.wishes)
+        if wish is not None:
+            return wish.chan, value
+        _select_enqueue(group.wishes)
+    group.wait()
+    with all_locked(locks):
+        _select_withdraw(group.wishes)
+    wish = group.fulfilled_by
+    return wish.chan, wish.value
+
+
+def bench(select, width, items=ITEMS):
+    """Returns (selects per second, p99 put latency in us)."""
+    chans = [Chan(4) for _ in range(width)]
+    per_producer = items // PRODUCERS
+    latencies = [[] for _ in range(PRODUCERS)]
+
+    def produce(k):
+        mine = chans[k::PRODUCERS]
+        record = latencies[k].append
+        for i in range(per_producer):
+            start = time.perf_counter()
+            mine[i % len(mine)].put(i)
+            record(time.perf_counter() - start)
+    start = time.perf_counter()
+    ths = [quickthread(produce, k) for k in range(PRODUCERS)]
+    for _ in range(per_producer * PRODUCERS):
+        select(chans)
+    elapsed = time.perf_counter() - start
+    for th in ths:
+        th.join()
+    puts = sorted(sum(latencies, []))
+    return items / elapsed, puts[int(0.99 * len(puts))] * 1e6
+
+
+def main():
+    print("%6s  %12s  %8s  %10s  %8s" % (
+        "width", "locked op/s", "p99 put", "now op/s", "p99 put"))
+    for width in WIDTHS:
+        old = bench(locked_select, width)
+        new = bench(lambda chans: chanselect(chans, []), width)
+        print("%6d  %12.0f  %5.0f us  %10.0f  %5.0f us" % (
+            width, old[0], old[1], new[0], new[1]))
+
+
+if __name__ == '__main__':
+    main()
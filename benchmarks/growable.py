@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+#
+# Compares a growable buffer against a fixed one of the same maximum size:
+# the throughput of a producer/consumer pair, and the buffer memory held
+# during a burst and once it has drained.
+#
+#   python -m benchmarks.growable
+
+import sys
+import time
+
+from chan import Chan, quickthread
+
+BUFLEN = 100000
+ITEMS = 200000
+BURST = 50000
+
+
+def producer(chan, n):
+    for i in range(n):
+        chan.put(i)
+    chan.close()
+
+
+def bench_throughput(chan, n=ITEMS):
+    start = time.perf_counter()
+    th = quickthread(producer, chan, n)
+    for _ in chan:
+        pass
+    elapsed = time.perf_counter() - start
+    th.join()
+    return n / elapsed
+
+
+def buffer_bytes(chan):
+    return sys.getsizeof(chan._buf.buf)
+
+
+def bench_memory(chan):
+    """Buffer bytes when idle, at the peak of a burst, and after the burst
+    has drained and traffic has been light for a while."""
+    idle = buffer_bytes(chan)
+    chan.put_many(range(BURST))
+    peak = buffer_bytes(chan)
+    chan.get_many(BURST)
+    for i in range(BUFLEN):
+        chan.put(i)
+        chan.get()
+    return idle, peak, buffer_bytes(chan)
+
+
+def main():
+    print("%10s  %12s  %12s  %12s  %12s" % (
+        "buffer", "op/s", "idle bytes", "burst bytes", "after bytes"))
+    for name, growable in [("fixed", False), ("growable", True)]:
+        rate = bench_throughput(Chan(BUFLEN, growable=growable))
+        idle, peak, after = bench_memory(Chan(BUFLEN, growable=growable))
+        print("%10s  %12.0f  %12d  %12d  %12d" % (
+            name, rate, idle, peak, after))
+
+
+if __name__ == '__main__':
+    main()
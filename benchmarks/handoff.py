@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+#
+# Measures the latency of an unbuffered handoff between two threads:
+# ping-pong round trips, and the wakeup of a consumer that is already
+# parked in get.  CondChan is the design Chan used to have, as a baseline:
+# a new Lock and Condition for every wait, with the fulfiller locking the
+# waiter's group to notify it.
+#
+#   python -m benchmarks.handoff
+
+import collections
+import threading
+import time
+
+from chan import Chan, quickthread
+
+ROUND_TRIPS = 20000
+WAKEUPS = 2000
+
+
+class _Group(object):
+    def __init__(self, value=None):
+        self.lock = threading.Lock()
+        self.cond = threading.Condition(self.lock)
+        self.value = value
+        self.done = False
+
+
+class CondChan(object):
+    """An unbuffered channel that waits on a new Condition every time."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._consumers = collections.deque()
+        self._producers = collections.deque()
+
+    def _wait(self, group):
+        with group.lock:
+            while not group.done:
+                group.cond.wait()
+        return group.value
+
+    def put(self, value):
+        with self._lock:
+            while self._consumers:
+                group = self._consumers.popleft()
+                with group.lock:
+                    if not group.done:
+                        group.value = value
+                        group.done = True
+                        group.cond.notify()
+                        return
+            group = _Group(value)
+            self._producers.append(group)
+        self._wait(group)
+
+    def get(self):
+        with self._lock:
+            while self._producers:
+                group = self._producers.popleft()
+                with group.lock:
+                    if not group.done:
+                        group.done = True
+                        group.cond.notify()
+                        return group.value
+            group = _Group()
+            self._consumers.append(group)
+        return self._wait(group)
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return [samples[int(p * len(samples))] * 1e6 for p in (0.5, 0.99)]
+
+
+def bench_round_trip(make_chan, n=ROUND_TRIPS):
+    ping, pong = make_chan(), make_chan()
+
+    def echo():
+        for _ in range(n):
+            pong.put(ping.get())
+    th = quickthread(echo)
+    latencies = []
+    for i in range(n):
+        start = time.perf_counter()
+        ping.put(i)
+        pong.get()
+        latencies.append(time.perf_counter() - start)
+    th.join()
+    return percentiles(latencies)
+
+
+def bench_wakeup(make_chan, n=WAKEUPS):
+    """From a put to the parked consumer running again."""
+    c, done = make_chan(), make_chan()
+    latencies = []
+
+    def consume():
+        for _ in range(n):
+            sent = c.get()
+            latencies.append(time.perf_counter() - sent)
+            done.put(None)
+    th = quickthread(consume)
+    for _ in range(n):
+        time.sleep(0.0002)  # Lets the consumer park
+        c.put(time.perf_counter())
+        done.get()
+    th.join()
+    return percentiles(latencies)
+
+
+def main():
+    print("%10s  %14s  %14s  %14s  %14s" % (
+        "channel", "trip p50 (us)", "trip p99 (us)", "wake p50 (us)",
+        "wake p99 (us)"))
+    for name, make_chan in [("CondChan", CondChan), ("Chan", Chan)]:
+        trip = bench_round_trip(make_chan)
+        wake = bench_wakeup(make_chan)
+        print("%10s  %14.1f  %14.1f  %14.1f  %14.1f" % (
+            name, trip[0], trip[1], wake[0], wake[1]))
+
+
+if __name__ == '__main__':
+    main()
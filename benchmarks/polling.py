@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+#
+# Compares polling with ``timeout=0``, which raises Timeout on every miss,
+# against try_get/try_put and chanselect's ``default``, which don't.
+#
+#   python -m benchmarks.polling
+
+import time
+
+from chan import Chan, Selector, chanselect, Timeout
+
+POLLS = 100000
+WIDTHS = [1, 10, 100]
+
+
+def rate(fn, n=POLLS):
+    """Calls per second of fn."""
+    start = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return n / (time.perf_counter() - start)
+
+
+def get_timeout(c):
+    try:
+        return c.get(timeout=0)
+    except Timeout:
+        return None
+
+
+def put_timeout(c):
+    try:
+        c.put(None, timeout=0)
+        return True
+    except Timeout:
+        return False
+
+
+def select_timeout(chans):
+    try:
+        return chanselect(chans, [], timeout=0)
+    except Timeout:
+        return None, None
+
+
+def selector_timeout(sel):
+    try:
+        return sel.select(timeout=0)
+    except Timeout:
+        return None, None
+
+
+def main():
+    print("%-24s  %16s  %16s  %8s" % (
+        "empty poll", "timeout=0 (op/s)", "no raise (op/s)", "speedup"))
+
+    def row(name, old, new):
+        print("%-24s  %16.0f  %16.0f  %7.2fx" % (name, old, new, new / old))
+
+    empty, full = Chan(), Chan(1)
+    full.put(None)
+    row("get", rate(lambda: get_timeout(empty)), rate(empty.try_get))
+    row("put", rate(lambda: put_timeout(full)),
+        rate(lambda: full.try_put(None)))
+    for width in WIDTHS:
+        chans = [Chan() for _ in range(width)]
+        row("chanselect[%d]" % width,
+            rate(lambda: select_timeout(chans), POLLS // width),
+            rate(lambda: chanselect(chans, [], default=None), POLLS // width))
+        sel = Selector(chans)
+        row("Selector[%d]" % width,
+            rate(lambda: selector_timeout(sel), POLLS // width),
+            rate(lambda: sel.select(default=None), POLLS // width))
+
+
+if __name__ == '__main__':
+    main()
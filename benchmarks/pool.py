@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+#
+# Compares running bursts of short calls with go(), on a worker pool,
+# against quickthread(), which starts a thread per call.
+#
+#   python -m benchmarks.pool
+
+import time
+
+from chan import Pool, quickthread
+
+BURSTS = [100, 1000, 10000]
+
+
+def noop():
+    pass
+
+
+def bench_quickthread(n):
+    """Seconds to run n calls, one new thread each."""
+    start = time.perf_counter()
+    threads = [quickthread(noop) for _ in range(n)]
+    for th in threads:
+        th.join()
+    return time.perf_counter() - start
+
+
+def bench_go(pool, n):
+    """Seconds to run n calls on pool."""
+    start = time.perf_counter()
+    tasks = [pool.go(noop) for _ in range(n)]
+    for task in tasks:
+        task.join()
+    return time.perf_counter() - start
+
+
+def main():
+    pool = Pool(max_workers=16)
+    print("%8s  %18s  %14s  %8s  %8s" % (
+        "burst", "quickthread (us)", "go (us)", "speedup", "workers"))
+    for n in BURSTS:
+        threaded = bench_quickthread(n)
+        pooled = bench_go(pool, n)
+        print("%8d  %18.1f  %14.1f  %7.2fx  %8d" % (
+            n, threaded / n * 1e6, pooled / n * 1e6, threaded / pooled,
+            pool.metrics()['workers']))
+    pool.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+#
+# Compares a PriorityChan against one Chan per priority level, read with a
+# select biased towards the urgent levels, as the usual way to prioritize
+# with plain channels.  Each run puts a backlog of jobs with random levels,
+# then drains it from another thread.
+#
+#   python -m benchmarks.priority
+
+import random
+import time
+
+from chan import Chan, PriorityChan, chanselect, quickthread
+
+LEVELS = [3, 16]
+BACKLOGS = [1000, 10000, 100000]
+
+
+def biased_get(chans):
+    """Gets from the most urgent channel that has anything, or waits for
+    whichever goes first."""
+    for c in chans:
+        value = c.try_get(c)
+        if value is not c:
+            return value
+    return chanselect(chans, [])[1]
+
+
+def bench_levels(jobs, levels):
+    chans = [Chan(len(jobs)) for _ in range(levels)]
+    start = time.perf_counter()
+    for job in jobs:
+        chans[job[0]].put(job)
+    th = quickthread(lambda: [biased_get(chans) for _ in jobs])
+    th.join()
+    return len(jobs) / (time.perf_counter() - start)
+
+
+def bench_priority(jobs):
+    c = PriorityChan(len(jobs), key=lambda job: job[0])
+    start = time.perf_counter()
+    for job in jobs:
+        c.put(job)
+    th = quickthread(lambda: [c.get() for _ in jobs])
+    th.join()
+    return len(jobs) / (time.perf_counter() - start)
+
+
+def main():
+    print("%6s  %8s  %22s  %20s  %8s" % (
+        "levels", "backlog", "Chans + select (op/s)",
+        "PriorityChan (op/s)", "speedup"))
+    for levels in LEVELS:
+        for n in BACKLOGS:
+            jobs = [(random.randrange(levels), i) for i in range(n)]
+            chans = bench_levels(jobs, levels)
+            priority = bench_priority(jobs)
+            print("%6d  %8d  %22.0f  %20.0f  %7.2fx" % (
+                levels, n, chans, priority, priority / chans))
+
+
+if __name__ == '__main__':
+    main()
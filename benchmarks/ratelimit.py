@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+#
+# Compares a RateLimitedChan against the sleep-loop forwarder it replaces:
+# a thread that moves items from one Chan to another, sleeping 1/rate
+# seconds after each.  Shows the rate each one achieves, and the p99 of
+# how far the gaps between items stray from 1/rate.
+#
+#   python -m benchmarks.ratelimit
+
+import time
+
+from chan import Chan, RateLimitedChan, quickthread
+
+RATES = [100, 1000, 5000]
+SECONDS = 1.0
+
+
+def sleep_forwarder(rate):
+    inp, out = Chan(1000), Chan()
+
+    def forward():
+        for value in inp:
+            out.put(value)
+            time.sleep(1.0 / rate)
+        out.close()
+    quickthread(forward)
+    return inp, out
+
+
+def measure(inp, out, rate):
+    """Returns (achieved rate, p99 gap error in seconds)."""
+    n = int(rate * SECONDS)
+
+    def produce():
+        for i in range(n):
+            inp.put(i)
+        inp.close()
+    quickthread(produce)
+    stamps = [time.perf_counter() for _ in out]
+    gaps = sorted(abs(b - a - 1.0 / rate) for a, b in zip(stamps, stamps[1:]))
+    elapsed = stamps[-1] - stamps[0]
+    return (len(stamps) - 1) / elapsed, gaps[int(0.99 * len(gaps))]
+
+
+def main():
+    print("%8s  %16s  %16s  %16s  %16s" % (
+        "target", "sleep (op/s)", "sleep p99 err", "limited (op/s)",
+        "limited p99 err"))
+    for rate in RATES:
+        sleep_rate, sleep_err = measure(*sleep_forwarder(rate), rate=rate)
+        # burst=1, so a closed channel's drain is the only burst.
+        c = RateLimitedChan(rate, buflen=1000)
+        limited_rate, limited_err = measure(c, c, rate)
+        print("%8d  %16.0f  %14.0fus  %16.0f  %14.0fus" % (
+            rate, sleep_rate, sleep_err * 1e6,
+            limited_rate, limited_err * 1e6))
+
+
+if __name__ == '__main__':
+    main()
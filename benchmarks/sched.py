@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+#
+# Runs the patterns from examples/pike-conc-patt.py with goroutines on a
+# Scheduler, at a scale that would need far too many threads, and the
+# daisy chain with threads at a smaller scale for comparison.  Results are
+# collected by goroutines too, so the timings are of the scheduler alone.
+#
+#   python -m benchmarks.sched [goroutines]
+
+import random
+import sys
+import time
+
+from chan import Chan, ChanClosed, quickthread
+from chan import Scheduler, Get, Put, Select, Sleep
+
+N = 100000
+
+
+def daisy(sched, n):
+    """A chain of n goroutines, each adding one to what it's passed."""
+    def f(left, right):
+        value = yield Get(right)
+        yield Put(left, value + 1)
+
+    leftmost = left = Chan()
+    for _ in range(n):
+        right = Chan()
+        sched.spawn(f, left, right)
+        left = right
+    sched.spawn(collect, Put(right, 1))
+    sched.spawn(collect, Get(leftmost), [n + 1])
+
+
+def collect(op, expected=None):
+    """Runs op, and then checks that it received the expected values."""
+    if expected is None:
+        yield op
+        return
+    for value in expected:
+        got = yield op
+        assert value is None or got == value, (got, value)
+
+
+def fan_in(sched, n):
+    """n boring senders, each with a forwarder onto one channel."""
+    def boring(msg, c):
+        for i in range(3):
+            yield Put(c, "%s: %d" % (msg, i))
+
+    def forward(input, output):
+        for _ in range(3):
+            value = yield Get(input)
+            yield Put(output, value)
+
+    out = Chan()
+    for i in range(n):
+        c = Chan()
+        sched.spawn(boring, i, c)
+        sched.spawn(forward, c, out)
+    sched.spawn(collect, Get(out), [None] * (3 * n))
+
+
+def select(sched, n):
+    """n/2 forwarders, each selecting over two boring senders."""
+    def boring(msg, c):
+        yield Sleep(0.1 * random.random())
+        yield Put(c, msg)
+        c.close()
+
+    def forward(input1, input2, output):
+        inputs = [input1, input2]
+        while inputs:
+            try:
+                _, value = yield Select(inputs, [])
+            except ChanClosed as ex:
+                inputs.remove(ex.which)
+                continue
+            yield Put(output, value)
+
+    out = Chan()
+    for i in range(n // 2):
+        a, b = Chan(), Chan()
+        sched.spawn(boring, 'a', a)
+        sched.spawn(boring, 'b', b)
+        sched.spawn(forward, a, b, out)
+    sched.spawn(collect, Get(out), [None] * (n // 2 * 2))
+
+
+def timeout(sched, n):
+    """n goroutines timing out of a Get on a channel nobody sends on."""
+    def wait(c, done):
+        try:
+            yield Get(c, timeout=0.1 + 0.1 * random.random())
+        except Exception:
+            yield Put(done, True)
+
+    c, done = Chan(), Chan()
+    for _ in range(n):
+        sched.spawn(wait, c, done)
+    sched.spawn(collect, Get(done), [True] * n)
+
+
+def rcvquit(sched, n):
+    """n senders, each told to quit after sending a few messages."""
+    def boring(c, quit):
+        i = 0
+        while True:
+            ch, _ = yield Select([quit], [(c, i)])
+            if ch is quit:
+                yield Put(quit, "See you!")
+                return
+            i += 1
+
+    def listen(c, quit, out):
+        for _ in range(random.randint(0, 3)):
+            yield Get(c)
+        yield Put(quit, "Bye!")
+        yield Put(out, (yield Get(quit)))
+
+    out = Chan()
+    for _ in range(n // 2):
+        c, quit = Chan(), Chan()
+        sched.spawn(boring, c, quit)
+        sched.spawn(listen, c, quit, out)
+    sched.spawn(collect, Get(out), ["See you!"] * (n // 2))
+
+
+def daisy_threads(n):
+    def f(left, right):
+        left.put(1 + right.get())
+
+    leftmost = left = Chan()
+    for _ in range(n):
+        right = Chan()
+        quickthread(f, left, right)
+        left = right
+    right.put(1)
+    assert leftmost.get() == n + 1
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else N
+    print("%16s  %11s  %12s  %14s" % (
+        "pattern", "goroutines", "seconds", "us/goroutine"))
+    for pattern in [daisy, fan_in, select, timeout, rcvquit]:
+        sched = Scheduler()
+        start = time.perf_counter()
+        pattern(sched, n)
+        if not sched.wait(60):
+            raise RuntimeError("%s left goroutines running" % pattern.__name__)
+        elapsed = time.perf_counter() - start
+        sched.shutdown()
+        print("%16s  %11d  %12.2f  %14.2f" % (
+            pattern.__name__, n, elapsed, elapsed / n * 1e6))
+
+    threads = min(n, 1000)
+    start = time.perf_counter()
+    daisy_threads(threads)
+    elapsed = time.perf_counter() - start
+    print("%16s  %11d  %12.2f  %14.2f" % (
+        "daisy (threads)", threads, elapsed, elapsed / threads * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python
+#
+# Compares messages/sec and bytes/sec between two processes, through a
+# ShmChan and through a multiprocessing.Queue.
+#
+#   python -m benchmarks.shm
+
+import multiprocessing
+import time
+
+from chan import ShmChan
+
+SIZES = [64, 1024, 16384]
+MESSAGES = 20000
+
+
+def shm_producer(name, size, n):
+    c = ShmChan.attach(name)
+    payload = b'x' * size
+    for _ in range(n):
+        c.put(payload)
+    c.close()
+    c.detach()
+
+
+def queue_producer(q, size, n):
+    payload = b'x' * size
+    for _ in range(n):
+        q.put(payload)
+    q.put(None)
+
+
+def bench_shm(ctx, size, n=MESSAGES):
+    """Seconds to move n messages of size bytes through a ShmChan."""
+    c = ShmChan(nslots=256, slot_size=size)
+    try:
+        p = ctx.Process(target=shm_producer, args=(c.name, size, n))
+        p.start()
+        c.get()  # Waits for the producer to start up
+        start = time.perf_counter()
+        for _ in c:
+            pass
+        elapsed = time.perf_counter() - start
+        p.join()
+    finally:
+        c.detach()
+        c.unlink()
+    return elapsed
+
+
+def bench_queue(ctx, size, n=MESSAGES):
+    """Seconds to move n messages of size bytes through a Queue."""
+    q = ctx.Queue(256)
+    p = ctx.Process(target=queue_producer, args=(q, size, n))
+    p.start()
+    q.get()  # Waits for the producer to start up
+    start = time.perf_counter()
+    while q.get() is not None:
+        pass
+    elapsed = time.perf_counter() - start
+    p.join()
+    return elapsed
+
+
+def main():
+    ctx = multiprocessing.get_context('spawn')
+    print("%8s  %-8s  %12s  %12s" % ("size", "", "msg/s", "MB/s"))
+    for size in SIZES:
+        for label, bench in [("ShmChan", bench_shm), ("Queue", bench_queue)]:
+            elapsed = bench(ctx, size)
+            rate = (MESSAGES - 1) / elapsed
+            print("%8d  %-8s  %12.0f  %12.1f" % (
+                size, label, rate, rate * size / 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+#!/usr/bin/env python
+#
+# Compares one-producer/one-consumer throughput of SPSCChan against a
+# buffered Chan of the same size.
+#
+#   python -m benchmarks.spsc
+
+import time
+
+from chan import Chan, SPSCChan, quickthread
+
+BUFLENS = [1, 16, 128, 1024]
+ITEMS = 200000
+
+
+def producer(chan, n):
+    for i in range(n):
+        chan.put(i)
+    chan.close()
+
+
+def bench_throughput(chan, n=ITEMS):
+    """Items per second moved from one thread to another."""
+    start = time.perf_counter()
+    th = quickthread(producer, chan, n)
+    for _ in chan:
+        pass
+    elapsed = time.perf_counter() - start
+    th.join()
+    return n / elapsed
+
+
+def main():
+    print("%8s  %16s  %16s  %8s" % (
+        "buflen", "Chan (op/s)", "SPSCChan (op/s)", "speedup"))
+    for buflen in BUFLENS:
+        general = bench_throughput(Chan(buflen))
+        spsc = bench_throughput(SPSCChan(buflen))
+        print("%8d  %16.0f  %16.0f  %7.2fx" % (
+            buflen, general, spsc, spsc / general))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,181 @@
+# The workloads run by ``python -m benchmarks``.
+#
+# Each workload yields (name, result) pairs, where a result holds the
+# throughput in operations per second and latency percentiles in seconds.
+# Workloads that make sense for queue.Queue also run it, as a baseline.
+
+import itertools
+import queue
+import threading
+import time
+
+from chan import Chan, chanselect, Selector, Timeout, quickthread
+
+PERCENTILES = [('p50', 0.50), ('p99', 0.99), ('p999', 0.999)]
+
+
+class QueueChan(object):
+    """queue.Queue behind the Chan ``put``/``get`` surface, as a baseline."""
+    def __init__(self, buflen=0):
+        # A Queue can't be unbuffered, so the closest is a buffer of one.
+        self._q = queue.Queue(max(buflen, 1))
+
+    def put(self, value, timeout=None):
+        try:
+            self._q.put(value, timeout=timeout)
+        except queue.Full:
+            raise Timeout()
+
+    def get(self, timeout=None):
+        try:
+            return self._q.get(timeout=timeout)
+        except queue.Empty:
+            raise Timeout()
+
+
+IMPLS = [('Chan', Chan), ('queue.Queue', QueueChan)]
+
+
+def summarize(ops, elapsed, latencies):
+    """Builds a result from a count of operations and their latencies."""
+    result = {'ops': ops, 'seconds': elapsed, 'throughput': ops / elapsed}
+    latencies = sorted(latencies)
+    for name, p in PERCENTILES:
+        if latencies:
+            result[name] = latencies[min(len(latencies) - 1,
+                                         int(p * len(latencies)))]
+    return result
+
+
+def _join(threads):
+    for th in threads:
+        th.join()
+
+
+def pingpong(scale):
+    """Round trips between two threads over unbuffered channels."""
+    n = int(20000 * scale)
+
+    def echo(ping, pong):
+        for _ in range(n):
+            pong.put(ping.get())
+
+    for impl_name, make_chan in IMPLS:
+        ping, pong = make_chan(), make_chan()
+        th = quickthread(echo, ping, pong)
+        latencies = []
+        start = time.perf_counter()
+        for i in range(n):
+            sent = time.perf_counter()
+            ping.put(i)
+            pong.get()
+            latencies.append(time.perf_counter() - sent)
+        elapsed = time.perf_counter() - start
+        th.join()
+        yield 'pingpong[%s]' % impl_name, summarize(n, elapsed, latencies)
+
+
+def _transfer(make_chan, producers, consumers, n):
+    """
+    Moves n timestamps from producer threads to consumer threads.  Returns
+    a result whose latencies run from each put to its get.
+    """
+    c = make_chan()
+    per_producer = n // producers
+    total = per_producer * producers
+    latencies = []
+    lock = threading.Lock()
+
+    def produce():
+        for _ in range(per_producer):
+            c.put(time.perf_counter())
+
+    def consume(count):
+        mine = []
+        for _ in range(count):
+            mine.append(time.perf_counter() - c.get())
+        with lock:
+            latencies.extend(mine)
+
+    counts = [total // consumers] * consumers
+    counts[0] += total - sum(counts)
+    start = time.perf_counter()
+    threads = [quickthread(consume, count) for count in counts]
+    threads += [quickthread(produce) for _ in range(producers)]
+    _join(threads)
+    return summarize(total, time.perf_counter() - start, latencies)
+
+
+def buffered(scale):
+    """One producer and one consumer, over different buffer sizes."""
+    n = int(100000 * scale)
+    for buflen in [1, 16, 128, 1024]:
+        for impl_name, make_chan in IMPLS:
+            yield ('buffered[%s,buflen=%d]' % (impl_name, buflen),
+                   _transfer(lambda: make_chan(buflen), 1, 1, n))
+
+
+def contention(scale):
+    """N producers and N consumers sharing one buffered channel."""
+    n = int(100000 * scale)
+    for threads in [1, 2, 4, 8, 16]:
+        for impl_name, make_chan in IMPLS:
+            yield ('contention[%s,%dx%d]' % (impl_name, threads, threads),
+                   _transfer(lambda: make_chan(64), threads, threads, n))
+
+
+def fanin(scale):
+    """One consumer selecting over many channels, each with a value
+    waiting in its buffer."""
+    n = int(20000 * scale)
+    for width in [2, 10, 100, 1000]:
+        chans = [Chan(1) for _ in range(width)]
+        for c in chans:
+            c.put(0)
+        sel = Selector(chans)
+        for name, select in [('chanselect', lambda: chanselect(chans, [])),
+                             ('Selector', sel.select)]:
+            rounds = max(100, n // width)
+            latencies = []
+            start = time.perf_counter()
+            for _ in range(rounds):
+                began = time.perf_counter()
+                c, value = select()
+                latencies.append(time.perf_counter() - began)
+                c.put(value)
+            elapsed = time.perf_counter() - start
+            yield ('fanin[%s,%d]' % (name, width),
+                   summarize(rounds, elapsed, latencies))
+
+
+def timeouts(scale):
+    """Threads repeatedly timing out of ``get`` on an empty channel.
+    Latencies are how late each timeout fired."""
+    n = int(200 * scale)
+    timeout = 0.001
+    for threads in [1, 16]:
+        for impl_name, make_chan in IMPLS:
+            c = make_chan()
+            lateness = []
+            lock = threading.Lock()
+
+            def wait():
+                mine = []
+                for _ in itertools.repeat(None, n):
+                    began = time.perf_counter()
+                    try:
+                        c.get(timeout=timeout)
+                    except Timeout:
+                        pass
+                    mine.append(time.perf_counter() - began - timeout)
+                with lock:
+                    lateness.extend(mine)
+
+            start = time.perf_counter()
+            _join([quickthread(wait) for _ in range(threads)])
+            elapsed = time.perf_counter() - start
+            yield ('timeouts[%s,threads=%d]' % (impl_name, threads),
+                   summarize(n * threads, elapsed, lateness))
+
+
+WORKLOADS = [pingpong, buffered, contention, fanin, timeouts]
@@ -0,0 +1,51 @@
+#!/usr/bin/env python
+#
+# Creates 100k concurrent timers with after(), and measures how quickly they
+# are scheduled, cancelled, and delivered by the shared timer service.
+#
+#   python -m benchmarks.timers
+
+import random
+import threading
+import time
+
+from chan import after
+from chan.timer import TimerService
+
+TIMERS = 100000
+SPREAD = 3.0  # Timers fire over this many seconds
+
+
+def main():
+    service = TimerService()
+    threads_before = threading.active_count()
+
+    start = time.perf_counter()
+    timers = []
+    last_deadline = 0.0
+    for _ in range(TIMERS):
+        delay = random.random() * SPREAD
+        last_deadline = max(last_deadline, time.monotonic() + delay)
+        timers.append(after(delay, service))
+    created = time.perf_counter() - start
+    print("created %d timers in %.3f s (%.2f us each), %d extra thread(s)" % (
+        TIMERS, created, created / TIMERS * 1e6,
+        threading.active_count() - threads_before))
+
+    start = time.perf_counter()
+    stopped = sum(t.stop() for t in timers[::2])
+    cancelled = time.perf_counter() - start
+    print("stopped %d timers in %.3f s (%.2f us each)" % (
+        stopped, cancelled, cancelled / stopped * 1e6))
+
+    for t in timers[1::2]:
+        t.get()
+    while service.pending:
+        time.sleep(0.001)
+    late = time.monotonic() - last_deadline
+    print("remaining %d timers all delivered %.3f s after the last deadline"
+          % (len(timers[1::2]), max(late, 0.0)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+#
+# Measures what tracing costs: buffered put/get pairs on one thread, and an
+# unbuffered ping-pong between two, with tracing off and with a
+# TraceRecorder on.
+#
+#   python -m benchmarks.trace
+
+import time
+
+from chan import Chan, TraceRecorder, quickthread
+
+PAIRS = 200000
+ROUND_TRIPS = 20000
+
+
+def buffered(n=PAIRS):
+    c = Chan(1)
+    start = time.perf_counter()
+    for i in range(n):
+        c.put(i)
+        c.get()
+    return n / (time.perf_counter() - start)
+
+
+def ping_pong(n=ROUND_TRIPS):
+    ping, pong = Chan(), Chan()
+
+    def echo():
+        for _ in range(n):
+            pong.put(ping.get())
+    th = quickthread(echo)
+    start = time.perf_counter()
+    for i in range(n):
+        ping.put(i)
+        pong.get()
+    elapsed = time.perf_counter() - start
+    th.join()
+    return n / elapsed
+
+
+def main():
+    print("%-12s  %14s  %14s  %9s  %8s" % (
+        "workload", "off (op/s)", "on (op/s)", "overhead", "events"))
+    for name, fn in [("buffered", buffered), ("ping-pong", ping_pong)]:
+        off = fn()
+        with TraceRecorder() as rec:
+            on = fn()
+        events = len(rec.chrome_trace()['traceEvents'])
+        print("%-12s  %14.0f  %14.0f  %8.0f%%  %8d" % (
+            name, off, on, (off / on - 1) * 100, events))
+
+
+if __name__ == '__main__':
+    main()
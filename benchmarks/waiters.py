@@ -0,0 +1,57 @@
+#!/usr/bin/env python
+#
+# Measures how handoff and cancellation costs scale with the number of
+# waiters parked on a single channel.
+#
+#   python -m benchmarks.waiters
+
+import time
+
+from chan import Chan
+from chan.chan import Wish, WishGroup, WISH_CONSUME
+
+WAITER_COUNTS = [10, 100, 1000, 10000, 100000]
+ROUNDS = 20000
+
+
+def park_consumers(chan, n):
+    """Queues n consumer wishes on chan, as if n threads were blocked."""
+    wishes = [Wish(WishGroup(), WISH_CONSUME, chan) for _ in range(n)]
+    with chan._lock:
+        for wish in wishes:
+            chan._waiting_consumers.append(wish)
+    return wishes
+
+
+def bench_handoff(n, rounds=ROUNDS):
+    """Seconds per put, handing off to the oldest of n waiting consumers."""
+    c = Chan()
+    park_consumers(c, n)
+    start = time.perf_counter()
+    for i in range(rounds):
+        c.put(i)
+        # Replaces the fulfilled waiter, keeping n waiting.
+        c._waiting_consumers.append(Wish(WishGroup(), WISH_CONSUME, c))
+    return (time.perf_counter() - start) / rounds
+
+
+def bench_cancel(n, rounds=ROUNDS):
+    """Seconds per cancellation of a waiter from the middle of n waiters."""
+    c = Chan()
+    wishes = park_consumers(c, n)
+    middle = wishes[n // 2:n // 2 + rounds]
+    start = time.perf_counter()
+    for wish in middle:
+        c._waiting_consumers.discard(wish)
+    return (time.perf_counter() - start) / len(middle)
+
+
+def main():
+    print("%10s  %14s  %14s" % ("waiters", "handoff (us)", "cancel (us)"))
+    for n in WAITER_COUNTS:
+        print("%10d  %14.3f  %14.3f" % (
+            n, bench_handoff(n) * 1e6, bench_cancel(n) * 1e6))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,19 @@
 from .chan import Error, ChanClosed, Timeout
-from .chan import Chan, chanselect
-from .chan import quickthread
+from .chan import Chan, chanselect, Selector
+from .chan import quickthread, set_trace_hook
+from .spsc import SPSCChan
+from .aio import AsyncChan, async_chanselect
+from .shm import ShmChan
+from .byteschan import BytesChan
+from .timer import after, tick
+from .broadcast import BroadcastChan
+from .priority import PriorityChan
+from .ratelimit import RateLimitedChan
+from .stats import live_chans, openmetrics
+from .trace import TraceRecorder
+from .profile import BlockProfiler
+from .pool import Pool, Task, go
+from .sched import Scheduler, Goroutine, Get, Put, Select, Sleep
+from . import pipeline
 
 __version__ = '0.3.1'
@@ -0,0 +1,255 @@
+import asyncio
+import random
+import threading
+
+from .chan import Chan, ChanClosed, Timeout, _EMPTY
+from .chan import WishGroup, Wish, WISH_CONSUME, WISH_PRODUCE
+from .chan import all_locked
+from .chan import _select_locks, _select_nowait, _select_enqueue
+from .chan import _select_missed, _select_withdraw
+
+
+class FutureWishGroup(WishGroup):
+    """A WishGroup whose waiter is a coroutine, parked on a future.
+
+    The group may be fulfilled from any thread.  Fulfillment on the event
+    loop's own thread resolves the future directly, while other threads go
+    through ``call_soon_threadsafe``.
+    """
+    __slots__ = ('loop', 'future')
+
+    def __init__(self, loop):
+        self.fulfilled_by = None
+        self._claim = threading.Lock()
+        self.wishes = []
+        self.loop = loop
+        self.future = loop.create_future()
+
+    def wake(self):
+        try:
+            on_loop = asyncio.get_running_loop() is self.loop
+        except RuntimeError:  # Not on any event loop's thread
+            on_loop = False
+        if on_loop:
+            self._resolve()
+        else:
+            self.loop.call_soon_threadsafe(self._resolve)
+
+    def _resolve(self):
+        if not self.future.done():
+            self.future.set_result(None)
+
+
+async def _wait_fulfilled(group, timeout, withdraw):
+    """Waits until group is fulfilled, or until the timeout expires.
+
+    Returns True if the group was fulfilled.  ``withdraw`` takes the group's
+    wishes back off their channels if the wait is abandoned.  Fulfillment
+    happens with the channels locked, so once the wishes are withdrawn the
+    group can't be fulfilled any more.
+
+    If the wait is cancelled after all, a value already received is given
+    back to its channel, for the next consumer, before the cancellation is
+    raised.  A value already sent stays sent.
+    """
+    try:
+        if timeout is None:
+            await group.future
+        else:
+            await asyncio.wait_for(group.future, timeout)
+        return True
+    except asyncio.TimeoutError:
+        withdraw()
+        return group.fulfilled
+    except asyncio.CancelledError:
+        withdraw()
+        wish = group.fulfilled_by
+        if (wish is not None and wish.kind == WISH_CONSUME and
+                not wish.closed):
+            _give_back(wish.chan, wish.value)
+        raise
+
+
+def _give_back(chan, value):
+    """
+    Returns a value received by a cancelled wait to chan.  It goes to a
+    waiting consumer or the buffer if it can, and otherwise waits in line
+    like a producer, one that nothing is parked on.  Like any waiting
+    producer's, its value is dropped if the channel is closed first.
+    """
+    with chan._lock:
+        if not chan._put_nowait(value):
+            chan._waiting_producers.append(
+                Wish(WishGroup(), WISH_PRODUCE, chan, value))
+
+
+class AsyncChan(object):
+    """A channel for asyncio coroutines.
+
+    ``await get()`` and ``await put()`` park the calling coroutine on a future
+    instead of blocking a thread, and otherwise behave like :class:`Chan`.
+    Iterate over the channel with ``async for``.
+
+    Every :class:`AsyncChan` is backed by a plain :class:`Chan`, available as
+    :attr:`chan`.  Threads may use that :class:`Chan` at the same time as
+    coroutines use the :class:`AsyncChan`: a thread calling ``chan.put``
+    wakes a waiting coroutine through the event loop's
+    ``call_soon_threadsafe``, and a coroutine calling ``put`` wakes a thread
+    blocked in ``chan.get``.
+
+    A ``get`` cancelled just as a value reached it gives the value back to
+    the channel, so it isn't lost.  A ``put`` cancelled just as its value
+    was taken has still sent it.
+
+    :param buflen: The size of the channel's buffer, as for :class:`Chan`.
+    :param chan: An existing :class:`Chan` to bridge to coroutines.  If given,
+                 ``buflen`` is ignored.
+
+    """
+    def __init__(self, buflen=0, chan=None):
+        if chan is None:
+            chan = Chan(buflen)
+        #: The :class:`Chan` shared with threaded code.
+        self.chan = chan
+
+    def __repr__(self):
+        return "<AsyncChan 0x%x>" % id(self)
+
+    async def get(self, timeout=None):
+        """Returns an item that was ``put`` onto the channel.
+
+        Behaves like :meth:`Chan.get`, except that it waits without blocking
+        the event loop.
+        """
+        chan = self.chan
+        with chan._lock:
+            value = chan._get_nowait()
+            if value is not _EMPTY:
+                return value
+
+            if chan._drained():
+                raise ChanClosed(which=self)
+            if timeout is not None and timeout <= 0:
+                raise Timeout()
+
+            group = FutureWishGroup(asyncio.get_running_loop())
+            wish = Wish(group, WISH_CONSUME, chan)
+            chan._waiting_consumers.append(wish)
+
+        def withdraw():
+            with chan._lock:
+                chan._waiting_consumers.discard(wish)
+
+        if not await _wait_fulfilled(group, timeout, withdraw):
+            raise Timeout()
+        if wish.closed:
+            raise ChanClosed(which=self)
+        return wish.value
+
+    async def put(self, value, timeout=None):
+        """Places an item onto the channel.
+
+        Behaves like :meth:`Chan.put`, except that it waits without blocking
+        the event loop.
+        """
+        chan = self.chan
+        with chan._lock:
+            if chan._closed:
+                raise ChanClosed(which=self)
+            if chan._put_nowait(value):
+                return
+
+            if timeout is not None and timeout <= 0:
+                raise Timeout()
+
+            group = FutureWishGroup(asyncio.get_running_loop())
+            wish = Wish(group, WISH_PRODUCE, chan, value)
+            chan._waiting_producers.append(wish)
+
+        def withdraw():
+            with chan._lock:
+                chan._waiting_producers.discard(wish)
+
+        if not await _wait_fulfilled(group, timeout, withdraw):
+            raise Timeout()
+        if wish.closed:
+            raise ChanClosed(which=self)
+
+    def close(self):
+        """Closes the channel, allowing no further ``put`` operations.
+
+        Behaves like :meth:`Chan.close`, waking both coroutines and threads.
+        """
+        self.chan.close()
+
+    @property
+    def closed(self):
+        """Returns True if the channel is closed."""
+        return self.chan.closed
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return await self.get()
+        except ChanClosed:
+            raise StopAsyncIteration
+
+
+async def async_chanselect(consumers, producers, timeout=None):
+    """Waits until exactly one consume or produce operation succeeds.
+
+    The coroutine version of :func:`chanselect`, with the same arguments,
+    return values, fairness, and errors.  Cases may be :class:`AsyncChan` or
+    plain :class:`Chan` objects, and the channel returned (or given as
+    ``ChanClosed.which``) is the one that was passed in.
+
+    The coroutine waits on a single future, which is resolved by whichever
+    channel is ready first.
+    """
+    group = FutureWishGroup(asyncio.get_running_loop())
+    passed = {}  # Chan -> the channel object from the caller
+    for ch in consumers:
+        chan = ch.chan if isinstance(ch, AsyncChan) else ch
+        passed[chan] = ch
+        Wish(group, WISH_CONSUME, chan)
+    for ch, value in producers:
+        chan = ch.chan if isinstance(ch, AsyncChan) else ch
+        passed[chan] = ch
+        Wish(group, WISH_PRODUCE, chan, value)
+
+    # Makes all cases fair
+    random.shuffle(group.wishes)
+
+    chan_locks_ordered = _select_locks(group.wishes)
+
+    try:
+        with all_locked(chan_locks_ordered):
+            while True:
+                wish, value = _select_nowait(group.wishes)
+                if wish is not None:
+                    return passed[wish.chan], value
+
+                if timeout is not None and timeout <= 0:
+                    raise Timeout()
+
+                _select_enqueue(group.wishes)
+                if not _select_missed(group.wishes):
+                    break
+                _select_withdraw(group.wishes)
+    except ChanClosed as ex:
+        raise ChanClosed(which=passed[ex.which])
+
+    def withdraw():
+        with all_locked(chan_locks_ordered):
+            _select_withdraw(group.wishes)
+
+    if not await _wait_fulfilled(group, timeout, withdraw):
+        raise Timeout()
+    withdraw()
+
+    wish = group.fulfilled_by
+    if wish.closed:
+        raise ChanClosed(which=passed[wish.chan])
+    return passed[wish.chan], wish.value
@@ -0,0 +1,257 @@
+import threading
+import time
+
+from .chan import ChanClosed, Timeout
+
+#: Lagging subscribers hold up ``put`` until they catch up.
+BLOCK = 'block'
+#: Lagging subscribers are unsubscribed, and their ``get`` raises
+#: :class:`ChanClosed`.
+DROP = 'drop'
+#: Lagging subscribers jump ahead to the oldest item still in the ring.
+SKIP = 'skip'
+
+POLICIES = (BLOCK, DROP, SKIP)
+
+
+class BroadcastChan(object):
+    """A channel whose every item is received by every subscriber.
+
+    Each ``put`` writes the item once into a ring shared by all the
+    subscribers, which each read it through their own cursor, so fanning
+    out to N consumers costs one lock and one ring rather than N channels.
+    Subscribers read items that are already in the ring without locking.
+
+    A subscriber that falls ``buflen`` items behind is lagging, and its
+    ``policy`` (:data:`BLOCK`, :data:`DROP`, or :data:`SKIP`) decides what
+    happens next.
+
+    .. code-block:: python
+
+        prices = BroadcastChan(64)
+        chart = prices.subscribe()
+        log = prices.subscribe(policy=SKIP)
+        prices.put(101.5)
+        chart.get(), log.get()  # Both 101.5
+
+    :param buflen: The size of the ring.  Must be at least 1.
+
+    """
+    def __init__(self, buflen):
+        if buflen < 1:
+            raise ValueError("BroadcastChan needs a buffer")
+        self._ring = [None] * buflen
+        self._cap = buflen
+        self._seq = 0  # Items ever put
+        self._closed = False
+        self._subscribers = []
+        self._writers_waiting = 0
+        self._lock = threading.Lock()
+        self._readable = threading.Condition(self._lock)
+        self._writable = threading.Condition(self._lock)
+
+    def __repr__(self):
+        return "<BroadcastChan 0x%x>" % id(self)
+
+    def subscribe(self, policy=BLOCK):
+        """Returns a new :class:`Subscription`, which receives the items put
+        from now on.
+
+        :param policy: What to do once the subscriber falls behind by the
+                       size of the ring: :data:`BLOCK`, :data:`DROP`, or
+                       :data:`SKIP`.
+        """
+        if policy not in POLICIES:
+            raise ValueError("Unknown policy %r" % (policy,))
+        policy = POLICIES[POLICIES.index(policy)]  # Compared with ``is``
+        sub = Subscription(self, policy)
+        with self._lock:
+            sub._cursor = self._seq
+            if self._closed:
+                sub._active = False
+            else:
+                self._subscribers.append(sub)
+        return sub
+
+    def _blocked_by(self, oldest):
+        """
+        Returns True if a BLOCK subscriber still needs the item at
+        ``oldest``.  Assumes that the channel is locked.
+        """
+        for sub in self._subscribers:
+            if sub._policy is BLOCK and sub._cursor <= oldest:
+                return True
+        return False
+
+    def put(self, value, timeout=None):
+        """Sends value to every subscriber.
+
+        Blocks only while a :data:`BLOCK` subscriber still has to read the
+        item that ``value`` would overwrite.
+
+        :param timeout: An optional floating point number representing the
+                        maximum amount of time to block, in seconds.  If the
+                        timeout expires, then a :class:`Timeout` error is
+                        raised.
+
+        :raises: :class:`ChanClosed` If the channel has been closed.
+
+        """
+        with self._lock:
+            if self._closed:
+                raise ChanClosed(which=self)
+            oldest = self._seq - self._cap
+            if oldest >= 0 and self._blocked_by(oldest):
+                if timeout is not None:
+                    deadline = time.monotonic() + timeout
+                # Counted before checking again, so that a subscriber
+                # reading without the lock either moves its cursor before
+                # the check, or sees the count and wakes this thread.
+                self._writers_waiting += 1
+                try:
+                    while self._blocked_by(oldest):
+                        if timeout is None:
+                            self._writable.wait()
+                        else:
+                            remaining = deadline - time.monotonic()
+                            if remaining <= 0:
+                                raise Timeout()
+                            self._writable.wait(remaining)
+                        if self._closed:
+                            raise ChanClosed(which=self)
+                finally:
+                    self._writers_waiting -= 1
+
+            self._ring[self._seq % self._cap] = value
+            self._seq += 1
+            self._readable.notify_all()
+
+    def close(self):
+        """Closes the channel.  Subscribers can still read the items already
+        put, and then their ``get`` raises :class:`ChanClosed`."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Channel double-closed")
+            self._closed = True
+            self._readable.notify_all()
+            self._writable.notify_all()
+
+    @property
+    def subscribers(self):
+        """The number of active subscribers."""
+        with self._lock:
+            return len(self._subscribers)
+
+
+class Subscription(object):
+    """One subscriber's view of a :class:`BroadcastChan`, returned by
+    :meth:`BroadcastChan.subscribe`.
+
+    It has the ``get`` and iteration surface of a :class:`Chan`, but may
+    only be read by one thread at a time.  A subscription that is no longer
+    read should be :meth:`unsubscribe`-d, so that it doesn't hold up the
+    producer.
+    """
+    __slots__ = ('_bc', '_policy', '_cursor', '_active', 'skipped')
+
+    def __init__(self, bc, policy):
+        self._bc = bc
+        self._policy = policy
+        self._cursor = 0
+        self._active = True
+        #: Items passed over by a :data:`SKIP` subscriber that lagged.
+        self.skipped = 0
+
+    def __repr__(self):
+        return "<Subscription %s 0x%x>" % (self._policy, id(self))
+
+    @property
+    def dropped(self):
+        """True if the subscriber lagged, under the :data:`DROP` policy."""
+        bc = self._bc
+        with bc._lock:
+            return (self._policy is DROP and
+                    self._cursor < bc._seq - bc._cap)
+
+    def get(self, timeout=None):
+        """Returns the subscriber's next item, blocking until it's put.
+
+        :param timeout: An optional floating point number representing the
+                        maximum amount of time to wait, in seconds.  If the
+                        timeout expires, then a :class:`Timeout` error is
+                        raised.
+
+        :raises: :class:`ChanClosed` If the channel has been closed and the
+                 subscriber has read every item, if the subscriber was
+                 dropped for lagging, or if it has unsubscribed.
+
+        """
+        bc = self._bc
+        cursor = self._cursor
+        if self._active and cursor < bc._seq:
+            value = bc._ring[cursor % bc._cap]
+            # put writes item n into the slot while _seq is n, so if _seq
+            # hasn't reached cursor + cap, the slot still held the item.
+            if bc._seq - bc._cap < cursor:
+                self._cursor = cursor + 1
+                if self._policy is BLOCK and bc._writers_waiting:
+                    with bc._lock:
+                        bc._writable.notify_all()
+                return value
+
+        deadline = None
+        with bc._lock:
+            while True:
+                if not self._active:
+                    raise ChanClosed(which=self)
+                seq = bc._seq
+                oldest = seq - bc._cap
+                if self._cursor < oldest:
+                    if self._policy is DROP:
+                        self._leave()
+                        raise ChanClosed(which=self)
+                    self.skipped += oldest - self._cursor
+                    self._cursor = oldest
+                if self._cursor < seq:
+                    value = bc._ring[self._cursor % bc._cap]
+                    self._cursor += 1
+                    if self._policy is BLOCK:
+                        bc._writable.notify_all()
+                    return value
+
+                if bc._closed:
+                    self._leave()
+                    raise ChanClosed(which=self)
+                if timeout is None:
+                    bc._readable.wait()
+                    continue
+                if deadline is None:
+                    deadline = time.monotonic() + timeout
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise Timeout()
+                bc._readable.wait(remaining)
+
+    def _leave(self):
+        """Assumes that the channel is locked."""
+        if self._active:
+            self._active = False
+            self._bc._subscribers.remove(self)
+            self._bc._writable.notify_all()
+
+    def unsubscribe(self):
+        """Stops receiving items.  Later calls to ``get`` raise
+        :class:`ChanClosed`."""
+        with self._bc._lock:
+            self._leave()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return self.get()
+        except ChanClosed:
+            raise StopIteration
+
+    next = __next__
@@ -0,0 +1,275 @@
+import collections
+import threading
+import time
+
+from .chan import ChanClosed, Timeout
+
+_RESERVED = 0
+_COMMITTED = 1
+_DELIVERED = 2
+_RELEASED = 3
+
+
+class Region(object):
+    """A region of a :class:`BytesChan`'s slab, holding one message.
+
+    Producers get a region from :meth:`BytesChan.reserve`, fill in
+    :attr:`view`, and :meth:`commit` it.  Consumers get the same region from
+    :meth:`BytesChan.get`, read :attr:`view`, and :meth:`release` it so its
+    space can be reused.
+
+    Used as a context manager, a reserved region is committed on exit (or
+    aborted if an exception is raised), and a received region is released.
+    """
+    def __init__(self, chan, offset, size):
+        self._chan = chan
+        self._offset = offset
+        self._size = size
+        self._state = _RESERVED
+        #: A writable ``memoryview`` onto the region.
+        self.view = chan._view[offset:offset + size]
+
+    def __repr__(self):
+        return "<Region %d+%d>" % (self._offset, len(self.view))
+
+    def commit(self, nbytes=None):
+        """Delivers the region's contents to the channel's consumers.
+
+        :param nbytes: Sends only the first ``nbytes`` of the region, when
+                       less than was reserved.
+        """
+        self._chan._commit(self, nbytes)
+
+    def abort(self):
+        """Gives back a reserved region without sending it."""
+        self._chan._release(self, _RESERVED)
+
+    def release(self):
+        """Hands a received region back to the channel for reuse.
+
+        :attr:`view` is released as well, so reading it afterwards fails
+        instead of seeing a later message.
+        """
+        self._chan._release(self, _DELIVERED)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        if self._state == _RESERVED:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.abort()
+        elif self._state == _DELIVERED:
+            self.release()
+
+
+class BytesChan(object):
+    """A channel that passes bytes through a preallocated slab.
+
+    Messages are written in place into a contiguous ``bytearray``, and
+    consumers read them through ``memoryview`` objects onto the same memory,
+    so passing a message allocates and copies no ``bytes``.
+
+    .. code-block:: python
+
+        c = BytesChan(1 << 20)
+
+        # Producer
+        with c.reserve(len(header) + n) as region:
+            region.view[:len(header)] = header
+            sock.recv_into(region.view[len(header):])
+
+        # Consumer
+        with c.get() as region:
+            handle(region.view)
+
+    Regions are handed to consumers in the order they are committed, and
+    their space is reused once they, and every region reserved before them,
+    are released.
+
+    :param size: The size of the slab, in bytes.  No single message can be
+                 larger than this.
+
+    """
+    def __init__(self, size):
+        self._slab = bytearray(size)
+        self._view = memoryview(self._slab)
+        self._size = size
+        self._head = 0  # Start of the oldest region still in use
+        self._tail = 0  # Where the next region is placed
+        self._used = 0  # Bytes held by regions, telling full from empty
+        self._regions = collections.deque()  # In slab order
+        self._ready = collections.deque()  # Committed, in commit order
+        self._reserved = 0  # Regions reserved and not committed or aborted
+        self._closed = False
+
+        self._lock = threading.Lock()
+        self._space_freed = threading.Condition(self._lock)
+        self._committed = threading.Condition(self._lock)
+
+    def __repr__(self):
+        return "<BytesChan 0x%x>" % id(self)
+
+    def _place(self, n):
+        """
+        Returns the offset of n free bytes, or None if there's no room.
+
+        Assumes that the BytesChan is locked.
+        """
+        if not self._regions:
+            self._head = self._tail = 0
+            return 0
+        head, tail = self._head, self._tail
+        # With tail == head, the slab is either full or only holds
+        # zero-length regions.
+        if tail > head or (tail == head and not self._used):
+            if self._size - tail >= n:
+                return tail
+            if head >= n:
+                # Wraps around, leaving the end of the slab as padding.
+                pad = Region(self, tail, self._size - tail)
+                pad._state = _RELEASED
+                pad.view.release()
+                self._regions.append(pad)
+                self._used += pad._size
+                return 0
+        elif tail < head and head - tail >= n:
+            return tail
+        return None
+
+    def reserve(self, nbytes, timeout=None):
+        """Reserves ``nbytes`` of the slab for a message.
+
+        Blocks until that much contiguous space is free.
+
+        :returns: A :class:`Region`, which must be committed or aborted.
+
+        :raises: :class:`ChanClosed` If the channel has been closed.
+        """
+        if nbytes > self._size:
+            raise ValueError("%d bytes doesn't fit in a %d byte slab" %
+                             (nbytes, self._size))
+        timeout_deadline = None
+        if timeout is not None:
+            timeout_deadline = time.time() + timeout
+
+        with self._lock:
+            while True:
+                if self._closed:
+                    raise ChanClosed(which=self)
+                offset = self._place(nbytes)
+                if offset is not None:
+                    break
+                if timeout is None:
+                    self._space_freed.wait()
+                else:
+                    remaining = timeout_deadline - time.time()
+                    if remaining <= 0:
+                        raise Timeout()
+                    self._space_freed.wait(remaining)
+
+            region = Region(self, offset, nbytes)
+            self._regions.append(region)
+            self._used += nbytes
+            self._tail = (offset + nbytes) % self._size
+            self._reserved += 1
+            return region
+
+    def _commit(self, region, nbytes):
+        with self._lock:
+            if region._state != _RESERVED:
+                raise RuntimeError("Region is not reserved")
+            if nbytes is not None:
+                region.view = region.view[:nbytes]
+            region._state = _COMMITTED
+            self._reserved -= 1
+            self._ready.append(region)
+            self._committed.notify()
+
+    def _release(self, region, expected_state):
+        with self._lock:
+            if region._state != expected_state:
+                raise RuntimeError("Region can't be released twice")
+            region.view.release()
+            if expected_state == _RESERVED:
+                self._reserved -= 1
+                if self._closed and not self._reserved:
+                    self._committed.notify_all()
+            region._state = _RELEASED
+
+            # Reclaims space in slab order.
+            while self._regions and self._regions[0]._state == _RELEASED:
+                self._used -= self._regions.popleft()._size
+            if self._regions:
+                self._head = self._regions[0]._offset
+            self._space_freed.notify_all()
+
+    def put(self, data, timeout=None):
+        """Copies ``data`` into the slab as one message."""
+        with self.reserve(len(data), timeout) as region:
+            region.view[:] = data
+
+    def get(self, timeout=None):
+        """Returns the next committed :class:`Region`.
+
+        The caller must :meth:`Region.release` it once done reading.
+
+        :raises: :class:`ChanClosed` If the channel has been closed, and no \
+                 committed or reserved messages remain.
+        """
+        timeout_deadline = None
+        if timeout is not None:
+            timeout_deadline = time.time() + timeout
+
+        with self._lock:
+            while not self._ready:
+                if self._closed and not self._reserved:
+                    raise ChanClosed(which=self)
+                if timeout is None:
+                    self._committed.wait()
+                else:
+                    remaining = timeout_deadline - time.time()
+                    if remaining <= 0:
+                        raise Timeout()
+                    self._committed.wait(remaining)
+            region = self._ready.popleft()
+            region._state = _DELIVERED
+            return region
+
+    def close(self):
+        """Closes the channel, allowing no further reservations.
+
+        Regions already reserved may still be committed, and are delivered
+        before ``get`` raises :class:`ChanClosed`.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Channel double-closed")
+            self._closed = True
+            self._committed.notify_all()
+            self._space_freed.notify_all()
+
+    @property
+    def closed(self):
+        """Returns True if the channel is closed and drained."""
+        with self._lock:
+            return self._closed and not self._ready and not self._reserved
+
+    @property
+    def free(self):
+        """The number of slab bytes not held by any region."""
+        with self._lock:
+            return self._size - self._used
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return self.get()
+        except ChanClosed:
+            raise StopIteration
+
+    next = __next__
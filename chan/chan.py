@@ -1,8 +1,11 @@
 import contextlib
+import math
 import random
 import threading
 import time
 
+from .stats import ChanStats, register
+
 
 class Error(Exception):
     """Base exception class for ``chan``.
@@ -34,31 +37,136 @@ def all_locked(locks):
             l.release()
 
 
-class Empty(Exception):
-    pass
+# Returned by _get_nowait when no value is ready.  Raising an exception
+# instead would allocate on every get that blocks.
+_EMPTY = object()
 
+# The default ``default`` of chanselect, meaning that it may block.
+_NO_DEFAULT = object()
 
-class Full(Exception):
-    pass
+# Called as hook(event, phase, chan) by the puts, gets, and closes of a Chan,
+# and by chanselect, if set.  See set_trace_hook.
+_trace_hook = None
+
+
+def set_trace_hook(hook):
+    """Sets the function called at each traced point of :meth:`Chan.put`,
+    :meth:`Chan.get`, :meth:`Chan.close`, and :func:`chanselect`, or clears
+    it, if ``hook`` is None.  Costs one check per operation while unset.
+
+    The ``try_``, ``get_many``, and ``put_many`` variants of ``get`` and
+    ``put`` are traced too, with one event for each item of a batch.
+
+    The hook is called as ``hook(event, phase, chan)``, where ``phase`` is
+    ``'i'`` for a point in time, or ``'B'`` and ``'E'`` for the beginning
+    and end of a wait, in the manner of the Chrome trace event format:
+
+    - ``'put'``, ``'get'``, ``'close'`` (``'i'``) -- The operation went
+      through on ``chan``.
+    - ``'select'`` (``'i'``) -- A :func:`chanselect` went through on
+      ``chan``.
+    - ``'put parked'``, ``'get parked'``, ``'select parked'`` (``'B'``,
+      ``'E'``) -- The thread blocked, and was woken up.  ``chan`` is None for
+      a select.
+
+    The hook runs on the thread doing the operation, sometimes with ``chan``
+    locked, so it must be quick, and mustn't use channels itself.  See
+    :class:`chan.trace.TraceRecorder` for one that records a timeline.
+    """
+    global _trace_hook
+    _trace_hook = hook
+
+
+def _trace_items(event, chan, n):
+    """Calls the trace hook once for each of n items that a batch moved."""
+    hook = _trace_hook
+    if hook is not None:
+        for _ in range(n):
+            hook(event, 'i', chan)
+
+
+# Overflow policies, for what ``put`` does when a channel's buffer is full.
+#: Waits for room.  The default.
+BLOCK = 'block'
+#: Discards the item being put.
+DROP_NEWEST = 'drop_newest'
+#: Discards the oldest buffered item, to make room.
+DROP_OLDEST = 'drop_oldest'
+#: Keeps a uniform random sample of the items put since the buffer filled.
+SAMPLE = 'sample'
+
+OVERFLOW_POLICIES = (BLOCK, DROP_NEWEST, DROP_OLDEST, SAMPLE)
 
 
 class WishGroup(object):
+    __slots__ = ('fulfilled_by', 'wishes', '_claim', '_waiter', '__weakref__')
+
     def __init__(self):
         self.fulfilled_by = None
-        self.lock = threading.Lock()
-        self.cond = threading.Condition(self.lock)
         self.wishes = []
+        self._claim = threading.Lock()  # Held once a fulfiller has claimed
+
+        # Only one thread ever waits on a group, so a lock that the waker
+        # releases does the job of a Condition.  It's held while no wake is
+        # pending.
+        self._waiter = threading.Lock()
+        self._waiter.acquire()
 
     @property
     def fulfilled(self):
         return self.fulfilled_by is not None
 
+    def claim(self):
+        """
+        Claims the group for fulfillment.  Returns False if it has already
+        been claimed, by a close or by another channel in a select.
+
+        A non-blocking acquire is an atomic test-and-set, so claiming costs
+        one call, rather than locking the group to check and set a flag.
+        """
+        return self._claim.acquire(False)
+
+    @property
+    def claimed(self):
+        return self._claim.locked()
+
+    def unclaim(self):
+        """
+        Gives up a claim that the selecting thread took to run one of its
+        own cases, once the case turned out not to be ready after all.
+        """
+        self._claim.release()
+
+    def wake(self):
+        """Wakes the waiter once the group is fulfilled."""
+        self._waiter.release()
+
+    def wait(self, timeout=None):
+        """Blocks until woken.  Returns False if the timeout expires first."""
+        if timeout is None:
+            return self._waiter.acquire()
+        return self._waiter.acquire(True, timeout)
+
+    def reset(self):
+        """
+        Readies the group to be waited on again.  None of its wishes may be
+        queued on a channel.
+        """
+        self.fulfilled_by = None
+        if self._claim.locked():  # Also claimed by a select that timed out
+            self._claim.release()
+        # Drops a wake that came in after a wait timed out.
+        self._waiter.acquire(False)
+
 
 WISH_PRODUCE = 0
 WISH_CONSUME = 1
 
 
 class Wish(object):
+    __slots__ = ('group', 'kind', 'chan', 'value', 'closed',
+                 '_queue', '_prev', '_next')
+
     def __init__(self, group, kind, chan, value=None):
         self.group = group
         self.kind = kind
@@ -66,6 +174,11 @@ class Wish(object):
         self.value = value
         self.closed = False
 
+        # Links for the WaitQueue this wish is waiting in, if any.
+        self._queue = None
+        self._prev = None
+        self._next = None
+
         self.group.wishes.append(self)
 
     def __repr__(self):
@@ -78,19 +191,147 @@ class Wish(object):
         return self.group.fulfilled
 
     def fulfill(self, value=None, closed=False):
-        """group must be locked"""
+        """The group must have been claimed"""
         assert not self.fulfilled
         self.closed = closed
+        if self.kind == WISH_CONSUME:
+            self.value = value
         self.group.fulfilled_by = self
-        self.group.cond.notify()
+        self.group.wake()
         if self.kind == WISH_PRODUCE:
             return self.value
+
+
+class WaitQueue(object):
+    """FIFO queue of wishes waiting on a channel.
+
+    Wishes are linked into the queue in place, so appending, popping, and
+    discarding a wish (on timeout, or after a ``chanselect``) are all O(1).
+    Assumes that the owning Chan is locked.
+    """
+    __slots__ = ('_head', '_tail', '_len')
+
+    def __init__(self):
+        self._head = None
+        self._tail = None
+        self._len = 0
+
+    def append(self, wish):
+        assert wish._queue is None
+        wish._queue = self
+        wish._prev = self._tail
+        wish._next = None
+        if self._tail is None:
+            self._head = wish
         else:
-            self.value = value
+            self._tail._next = wish
+        self._tail = wish
+        self._len += 1
+
+    def popleft(self):
+        wish = self._head
+        if wish is None:
+            raise IndexError()
+        self.discard(wish)
+        return wish
+
+    def discard(self, wish):
+        """Removes wish from the queue, if it's still there."""
+        if wish._queue is not self:
             return
+        if wish._prev is None:
+            self._head = wish._next
+        else:
+            wish._prev._next = wish._next
+        if wish._next is None:
+            self._tail = wish._prev
+        else:
+            wish._next._prev = wish._prev
+        wish._queue = wish._prev = wish._next = None
+        self._len -= 1
+
+    def __len__(self):
+        return self._len
+
+    def __iter__(self):
+        wish = self._head
+        while wish is not None:
+            yield wish
+            wish = wish._next
+
+
+# Told as each thread parks and wakes, if set.  See chan.profile.
+_block_hook = None
+
+
+def _set_block_hook(hook):
+    global _block_hook
+    _block_hook = hook
+
+
+def _wait_fulfilled(group, timeout, timeout_deadline):
+    """Blocks until group is fulfilled, or until the deadline passes.
+
+    Returns True if the group was fulfilled.  Groups are only woken once
+    they're fulfilled.
+    """
+    hook = _block_hook
+    if hook is not None:
+        hook.parked(group, timeout)
+        try:
+            return _wait_group(group, timeout, timeout_deadline)
+        finally:
+            hook.woken(group)
+    return _wait_group(group, timeout, timeout_deadline)
+
+
+def _wait_group(group, timeout, timeout_deadline):
+    if timeout is None:
+        return group.wait()
+    remaining = timeout_deadline - time.time()
+    return remaining > 0 and group.wait(remaining)
+
+
+_local = threading.local()
+
+
+def _thread_wish(kind, chan, value=None):
+    """
+    Returns the calling thread's own wish, alone in its own group, ready for
+    a new wait.  Reusing it saves allocating a group and wish every time a
+    ``get`` or ``put`` blocks.
+    """
+    try:
+        wish = _local.wish
+    except AttributeError:
+        wish = _local.wish = Wish(WishGroup(), kind, chan, value)
+        return wish
+    wish.group.reset()
+    wish.kind = kind
+    wish.chan = chan
+    wish.value = value
+    wish.closed = False
+    return wish
+
+
+def _finish_wish(wish):
+    """
+    Finishes a wait on a thread's own wish, returning the value it received.
+    Drops the wish's references, so they aren't kept alive until the
+    thread's next wait.
+
+    :raises: :class:`ChanClosed` If the wish was fulfilled by a close.
+    """
+    chan, value, closed = wish.chan, wish.value, wish.closed
+    wish.chan = wish.value = None
+    if closed:
+        raise ChanClosed(which=chan)
+    return value
 
 
 class RingBuffer(object):
+    __slots__ = ('buf', 'next_pop', '_len')
+
     def __init__(self, buflen):
         self.buf = [None] * buflen
         self.next_pop = 0
@@ -116,6 +357,32 @@ class RingBuffer(object):
         self._len -= 1
         return value
 
+    def extend(self, values):
+        """Pushes as many of values as fit.  Returns how many were pushed."""
+        count = min(len(values), len(self.buf) - self._len)
+        next_push = (self.next_pop + self._len) % len(self.buf)
+        first = min(count, len(self.buf) - next_push)
+        self.buf[next_push:next_push + first] = values[:first]
+        self.buf[:count - first] = values[first:count]
+        self._len += count
+        return count
+
+    def replace(self, i, value):
+        """Overwrites the value i places from the front."""
+        self.buf[(self.next_pop + i) % len(self.buf)] = value
+
+    def pop_many(self, n):
+        """Pops and returns a list of up to n values."""
+        count = min(n, self._len)
+        first = min(count, len(self.buf) - self.next_pop)
+        values = self.buf[self.next_pop:self.next_pop + first]
+        values.extend(self.buf[:count - first])
+        self.buf[self.next_pop:self.next_pop + first] = [None] * first
+        self.buf[:count - first] = [None] * (count - first)
+        self.next_pop = (self.next_pop + count) % len(self.buf)
+        self._len -= count
+        return values
+
     def __len__(self):
         return self._len
 
@@ -128,6 +395,151 @@ class RingBuffer(object):
         return self._len == len(self.buf)
 
 
+class GrowableRingBuffer(RingBuffer):
+    """A RingBuffer that starts small and grows up to ``buflen`` slots.
+
+    It doubles when a push finds it full, and halves once it has stayed
+    under a quarter full for as many pops as it has slots, so its memory
+    follows the backlog rather than the biggest burst.
+
+    A resize doesn't copy the buffered values all at once.  The new ring
+    keeps their places at its front, and each later push and pop copies a
+    couple of them over from the old ring, so no single operation stalls
+    on a copy of the whole backlog.  The new ring has room for as many
+    pushes as there are values left to copy, so the copying is done before
+    the ring can fill up again.
+    """
+    __slots__ = ('max_len', 'min_len', '_low', '_old', '_old_pop',
+                 '_old_end', '_copied')
+
+    def __init__(self, buflen, min_len=16):
+        min_len = min(min_len, buflen)
+        super(GrowableRingBuffer, self).__init__(min_len)
+        self.max_len = buflen
+        self.min_len = min_len
+        self._low = 0  # Pops in a row while under a quarter full
+
+        # The ring from before the last resize, while values are still being
+        # copied from it into slots [_copied, _old_end) of the new one.
+        self._old = None
+        self._old_pop = 0
+        self._old_end = 0
+        self._copied = 0
+
+    @property
+    def cap(self):
+        return self.max_len
+
+    @property
+    def full(self):
+        return self._len == self.max_len
+
+    def _resize(self, size):
+        if self._old is not None:
+            self._migrate(self._old_end)  # Finishes the last resize first
+        self._old = self.buf
+        self._old_pop = self.next_pop
+        self._old_end = self._len
+        self._copied = 0
+        self.buf = [None] * size
+        self.next_pop = 0
+        self._low = 0
+        if not self._len:
+            self._old = None
+
+    def _migrate(self, count):
+        """
+        Copies up to count values over from the ring from before the last
+        resize, starting at the front.  Values already popped are skipped.
+        """
+        old = self._old
+        start = max(self._copied, self.next_pop)
+        end = min(start + count, self._old_end)
+        if end > start:
+            count = end - start
+            size = len(old)
+            i = (self._old_pop + start) % size
+            first = min(count, size - i)
+            self.buf[start:start + first] = old[i:i + first]
+            self.buf[start + first:end] = old[:count - first]
+        self._copied = end
+        if end >= self._old_end:
+            self._old = None
+
+    def _grow(self, needed):
+        size = len(self.buf)
+        while size < needed:
+            size *= 2
+        self._resize(min(size, self.max_len))
+
+    def _popped(self):
+        size = len(self.buf)
+        if size > self.min_len and self._len * 4 < size:
+            self._low += 1
+            if self._low >= size:
+                self._resize(max(size // 2, self.min_len))
+        else:
+            self._low = 0
+
+    # push and pop repeat RingBuffer's, rather than calling them, as they
+    # run on every buffered put and get.
+    def push(self, value):
+        if self._old is not None:
+            self._migrate(2)
+        buf = self.buf
+        n = self._len
+        if n == len(buf):
+            if n == self.max_len:
+                raise IndexError()
+            self._grow(n + 1)
+            buf = self.buf
+        buf[(self.next_pop + n) % len(buf)] = value
+        self._len = n + 1
+
+    def pop(self):
+        n = self._len
+        if n == 0:
+            raise IndexError()
+        if self._old is not None:
+            self._migrate(2)  # Including the value popped here
+        buf = self.buf
+        size = len(buf)
+        i = self.next_pop
+        value = buf[i]
+        buf[i] = None  # Safety
+        self.next_pop = (i + 1) % size
+        self._len = n = n - 1
+        if n * 4 < size and size > self.min_len:
+            self._low += 1
+            if self._low >= size:
+                self._resize(max(size // 2, self.min_len))
+        elif self._low:
+            self._low = 0
+        return value
+
+    def extend(self, values):
+        """Pushes as many of values as fit.  Returns how many were pushed."""
+        needed = min(self._len + len(values), self.max_len)
+        if needed > len(self.buf):
+            self._grow(needed)
+        return RingBuffer.extend(self, values)
+
+    def replace(self, i, value):
+        """Overwrites the value i places from the front."""
+        if self._old is not None:
+            self._migrate(i + 1)
+        RingBuffer.replace(self, i, value)
+
+    def pop_many(self, n):
+        """Pops and returns a list of up to n values."""
+        if self._old is not None:
+            self._migrate(n + 2)
+        values = RingBuffer.pop_many(self, n)
+        if values:
+            self._popped()
+        return values
+
+
 class Chan(object):
     """Chan objects allow multiple threads to communicate.
 
@@ -137,71 +549,272 @@ class Chan(object):
                    already waiting, while a buffered channel will accept puts
                    without blocking as long as the buffer is not full.
 
+    :param growable: If True, the buffer starts small, grows as items back
+                     up, up to ``buflen``, and shrinks again once the
+                     backlog clears, instead of taking ``buflen`` slots for
+                     good.  Use it for channels sized for rare bursts.
+
+    :param overflow: What ``put`` does when the buffer is full and no thread
+                     is waiting on ``get``, for channels that should shed
+                     load rather than hold up producers:
+
+                     - ``'block'`` -- Waits for room.  The default.
+                     - ``'drop_newest'`` -- Discards the item being put.
+                     - ``'drop_oldest'`` -- Discards the oldest buffered
+                       item, to make room.
+                     - ``'sample'`` -- Keeps a uniform random sample of the
+                       items put since the buffer filled.
+
+                     Other than ``'block'``, a full buffer never makes
+                     ``put``, ``put_many``, or a producer case in
+                     :func:`chanselect` wait.  Discarded items are counted
+                     by :attr:`dropped`.
+
     """
-    def __init__(self, buflen=0):
+    __slots__ = ('_lock', '_closed', '_buf', '_waiting_producers',
+                 '_waiting_consumers', '_stats', '_overflow', '_dropped',
+                 '_sampled', '__weakref__')
+
+    # Every put and get takes the lock, so a wish enqueued under it can't be
+    # missed.  See _select_missed.
+    _lock_free = False
+
+    def __init__(self, buflen=0, growable=False, overflow=BLOCK):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError("Unknown overflow policy %r" % (overflow,))
+        if overflow != BLOCK and buflen <= 0:
+            raise ValueError("Overflow policies need a buffer")
         self._lock = threading.Lock()
         self._closed = False
-
-        if buflen > 0:
+        # Compared with ``is``
+        self._overflow = OVERFLOW_POLICIES[OVERFLOW_POLICIES.index(overflow)]
+        self._dropped = 0
+        self._sampled = 0  # Items offered to SAMPLE since the buffer filled
+
+        if buflen > 0 and growable:
+            self._buf = GrowableRingBuffer(buflen)
+        elif buflen > 0:
             self._buf = RingBuffer(buflen)
         else:
             self._buf = None
 
-        # TODO: Lists are inefficient lifo queues
-        self._waiting_producers = []
-        self._waiting_consumers = []
+        self._waiting_producers = WaitQueue()
+        self._waiting_consumers = WaitQueue()
+        self._stats = None  # Set by enable_stats()
 
     def __repr__(self):
         return "<Chan 0x%x>" % id(self)
 
-    def _get_nowait(self):
+    def enable_stats(self, name=None):
+        """Starts keeping statistics on the channel, for :meth:`stats`.
+
+        Stats are off by default, costing only a check on each operation.
+        Once enabled, the channel is also listed by :func:`openmetrics`.
+
+        :param name: Names the channel in :func:`openmetrics` output.
+                     Defaults to the channel's id.
+        :returns: The channel, for chaining.
+        """
+        with self._lock:
+            if self._stats is None:
+                self._stats = ChanStats(name or '0x%x' % id(self))
+        register(self)
+        return self
+
+    def stats(self):
+        """Returns a snapshot of the channel's statistics, as a dict.
+
+        Holds the counters from :class:`ChanStats` along with the current
+        ``buffer_len``, ``waiting_producers``, and ``waiting_consumers``.
+        Returns None if :meth:`enable_stats` hasn't been called.
+        """
+        with self._lock:
+            if self._stats is None:
+                return None
+            snap = self._stats.snapshot()
+            snap['buffer_len'] = len(self._buf) if self._buf is not None else 0
+            snap['waiting_producers'] = len(self._waiting_producers)
+            snap['waiting_consumers'] = len(self._waiting_consumers)
+            return snap
+
+    @property
+    def dropped(self):
+        """The number of items discarded by the channel's overflow policy."""
+        with self._lock:
+            return self._dropped
+
+    def _count_wait(self, producing, blocked_at, timed_out):
+        with self._lock:
+            self._stats.blocked(producing, time.monotonic() - blocked_at,
+                                timed_out)
+
+    def _fulfill_waiting_producer(self):
         """
-        Returns a value from a waiting producer, or raises Empty
+        Fulfills a waiting producer, returning its value, or returns _EMPTY
+        if no fulfillable producers are waiting.
 
         Assumes that the Chan is locked.
         """
-        # Fulfills a waiting producer, returning its value, or raising Empty if
-        # no fulfillable producers are waiting.
-        def fulfill_waiting_producer():
-            while True:
-                if self._waiting_producers:
-                    produce_wish = self._waiting_producers.pop(0)
-                    with produce_wish.group.lock:
-                        if not produce_wish.group.fulfilled:
-                            return produce_wish.fulfill()
-                else:
-                    raise Empty()
+        waiting = self._waiting_producers
+        while waiting:
+            produce_wish = waiting.popleft()
+            if produce_wish.group.claim():
+                return produce_wish.fulfill()
+        return _EMPTY
+
+    def _get_nowait(self):
+        """
+        Returns a value from the buffer or a waiting producer, or _EMPTY
 
+        Assumes that the Chan is locked.
+        """
+        stats = self._stats
         if self._buf is not None and not self._buf.empty:
             value = self._buf.pop()
-            try:
-                # Cycles a producer's value onto the buffer
-                produced = fulfill_waiting_producer()
+            # Cycles a producer's value onto the buffer
+            produced = self._fulfill_waiting_producer()
+            if produced is not _EMPTY:
                 self._buf.push(produced)
-            except Empty:
-                pass
+                if stats is not None:
+                    stats.buffered_put(1, len(self._buf))
+            if stats is not None:
+                stats.buffered_get(1)
             return value
-        else:
-            return fulfill_waiting_producer()
+        value = self._fulfill_waiting_producer()
+        if stats is not None and value is not _EMPTY:
+            stats.handoff()
+        return value
+
+    def _drained(self):
+        """
+        Returns True if nothing is left to get.  Only asked once
+        _get_nowait has come up empty, which for a Chan means that it's
+        drained once closed.
+
+        Assumes that the Chan is locked.
+        """
+        return self._closed
+
+    def _get_ready(self):
+        """
+        Returns False if _get_nowait would surely come up empty on a channel
+        that isn't drained, which lets chanselect pass over the channel
+        without claiming its wishes.
+
+        Assumes that the Chan is locked.
+        """
+        return bool(self._closed or self._waiting_producers or
+                    (self._buf is not None and not self._buf.empty))
+
+    def _put_ready(self):
+        """
+        Returns False if _put_nowait would surely fail on an open channel.
+
+        Assumes that the Chan is locked.
+        """
+        return bool(self._closed or self._waiting_consumers or
+                    self._overflow is not BLOCK or
+                    (self._buf is not None and not self._buf.full))
 
     def _put_nowait(self, value):
         """
-        Gives value to a waiting consumer, or raises Full
+        Gives value to a waiting consumer or the buffer.  Returns False if
+        neither can take it.
+
+        Assumes that the Chan is locked.
+        """
+        waiting = self._waiting_consumers
+        while waiting:
+            consume_wish = waiting.popleft()
+            if consume_wish.group.claim():
+                consume_wish.fulfill(value)
+                if self._stats is not None:
+                    self._stats.handoff()
+                return True
+        if self._buf is not None and not self._buf.full:
+            self._buf.push(value)
+            if self._stats is not None:
+                self._stats.buffered_put(1, len(self._buf))
+            if self._sampled:
+                self._sampled = 0
+            return True
+        if self._overflow is not BLOCK:
+            self._shed(value)
+            return True
+        return False
+
+    def _shed(self, value):
+        """
+        Applies the overflow policy to value, which doesn't fit in the full
+        buffer.
+
+        Assumes that the Chan is locked.
+        """
+        buf = self._buf
+        policy = self._overflow
+        kept = False
+        if policy is DROP_OLDEST:
+            buf.pop()
+            buf.push(value)
+            kept = True
+        elif policy is SAMPLE:
+            # Reservoir sampling: the n-th item since the buffer filled
+            # replaces a random buffered one with probability len/n.
+            self._sampled += 1
+            i = random.randrange(len(buf) + self._sampled)
+            if i < len(buf):
+                buf.replace(i, value)
+                kept = True
+        self._dropped += 1
+        if self._stats is not None:
+            if kept:
+                self._stats.buffered_put(1, len(buf))
+            self._stats.dropped += 1
+
+    def _get_many_nowait(self, items, max_items):
+        """
+        Appends values onto items until it holds max_items, or until no more
+        values are ready.
 
         Assumes that the Chan is locked.
         """
-        while True:
-            if self._waiting_consumers:
-                consume_wish = self._waiting_consumers.pop(0)
-                with consume_wish.group.lock:
-                    if not consume_wish.group.fulfilled:
-                        consume_wish.fulfill(value)
-                        return
-            elif self._buf is not None and not self._buf.full:
-                self._buf.push(value)
+        while len(items) < max_items:
+            if self._buf is not None and not self._waiting_producers:
+                # Nothing to cycle onto the buffer, so it drains in one go.
+                popped = self._buf.pop_many(max_items - len(items))
+                if self._stats is not None:
+                    self._stats.buffered_get(len(popped))
+                items.extend(popped)
                 return
-            else:
-                raise Full()
+            value = self._get_nowait()
+            if value is _EMPTY:
+                return
+            items.append(value)
+
+    def _put_many_nowait(self, values, start):
+        """
+        Puts values[start:] until one would block.  Returns the index of the
+        first value not put.
+
+        Assumes that the Chan is locked.
+        """
+        i = start
+        while i < len(values) and self._waiting_consumers:
+            if not self._put_nowait(values[i]):
+                return i
+            i += 1
+        if self._buf is not None and i < len(values):
+            n = self._buf.extend(values[i:])
+            if self._stats is not None:
+                self._stats.buffered_put(n, len(self._buf))
+            if n and self._sampled:
+                self._sampled = 0
+            i += n
+        if self._overflow is not BLOCK:
+            while i < len(values):
+                self._shed(values[i])
+                i += 1
+        return i
 
     def get(self, timeout=None):
         """Returns an item that was ``put`` onto the channel.
@@ -219,42 +832,57 @@ class Chan(object):
                  buffer is empty, and no threads are waiting on ``put``.
 
         """
+        timeout_deadline = None
         if timeout is not None:
             timeout_deadline = time.time() + timeout
 
-        with self._lock:
-            try:
-                return self._get_nowait()
-            except Empty:
-                pass
+        # Locks without ``with``, which allocates on every use.
+        self._lock.acquire()
+        try:
+            value = self._get_nowait()
+            if value is not _EMPTY:
+                if _trace_hook is not None:
+                    _trace_hook('get', 'i', self)
+                return value
 
-            if self._closed:
+            if self._drained():
                 raise ChanClosed(which=self)
 
             # Shortcut for if the operation shouldn't block.
             if timeout is not None and timeout <= 0:
+                if self._stats is not None:
+                    self._stats.timeouts += 1
                 raise Timeout()
 
-            group = WishGroup()
-            wish = Wish(group, WISH_CONSUME, self)
+            wish = _thread_wish(WISH_CONSUME, self)
             self._waiting_consumers.append(wish)
+            stats = self._stats
+            if stats is not None:
+                blocked_at = time.monotonic()
+            hook = _trace_hook
+            if hook is not None:
+                hook('get parked', 'B', self)
+        finally:
+            self._lock.release()
+
+        fulfilled = _wait_fulfilled(wish.group, timeout, timeout_deadline)
+        if not fulfilled:
+            # Only time out if the wish wasn't fulfilled.  Fulfillment happens
+            # with the Chan locked, so it can't sneak in once the wish is gone.
+            with self._lock:
+                self._waiting_consumers.discard(wish)
+            fulfilled = wish.group.fulfilled
+        if stats is not None:
+            self._count_wait(False, blocked_at, not fulfilled)
+        if hook is not None:
+            hook('get parked', 'E', self)
+            if fulfilled and not wish.closed:
+                hook('get', 'i', self)
+        if not fulfilled:
+            _finish_wish(wish)
+            raise Timeout()
 
-        with group.lock:
-            while not group.fulfilled:
-                if timeout is None:
-                    group.cond.wait()
-                else:
-                    group.cond.wait(timeout_deadline - time.time())
-
-                    if time.time() >= timeout_deadline:
-                        # Only time out if the wish wasn't fulfilled
-                        if not group.fulfilled:
-                            self._waiting_consumers.remove(wish)
-                            raise Timeout()
-
-        if wish.closed:
-            raise ChanClosed(which=self)
-        return wish.value
+        return _finish_wish(wish)
 
     def put(self, value, timeout=None):
         """Places an item onto the channel.
@@ -276,41 +904,224 @@ class Chan(object):
         :raises: :class:`ChanClosed` If the channel has already been closed.
 
         """
+        timeout_deadline = None
         if timeout is not None:
             timeout_deadline = time.time() + timeout
 
-        with self._lock:
+        # Locks without ``with``, which allocates on every use.
+        self._lock.acquire()
+        try:
             if self._closed:
                 raise ChanClosed(which=self)
-            try:
-                self._put_nowait(value)
+            if self._put_nowait(value):
+                if _trace_hook is not None:
+                    _trace_hook('put', 'i', self)
                 return
-            except Full:
-                pass
 
             # Shortcut for if the operation shouldn't block.
             if timeout is not None and timeout <= 0:
+                if self._stats is not None:
+                    self._stats.timeouts += 1
                 raise Timeout()
 
-            group = WishGroup()
-            wish = Wish(group, WISH_PRODUCE, self, value)
+            wish = _thread_wish(WISH_PRODUCE, self, value)
             self._waiting_producers.append(wish)
+            stats = self._stats
+            if stats is not None:
+                blocked_at = time.monotonic()
+            hook = _trace_hook
+            if hook is not None:
+                hook('put parked', 'B', self)
+        finally:
+            self._lock.release()
+
+        fulfilled = _wait_fulfilled(wish.group, timeout, timeout_deadline)
+        if not fulfilled:
+            # Only time out if the wish wasn't fulfilled.  Fulfillment happens
+            # with the Chan locked, so it can't sneak in once the wish is gone.
+            with self._lock:
+                self._waiting_producers.discard(wish)
+            fulfilled = wish.group.fulfilled
+        if stats is not None:
+            self._count_wait(True, blocked_at, not fulfilled)
+        if hook is not None:
+            hook('put parked', 'E', self)
+            if fulfilled and not wish.closed:
+                hook('put', 'i', self)
+        if not fulfilled:
+            _finish_wish(wish)
+            raise Timeout()
 
-        with group.lock:
-            while not group.fulfilled:
-                if timeout is None:
-                    group.cond.wait()
-                else:
-                    group.cond.wait(timeout_deadline - time.time())
+        _finish_wish(wish)
+
+    def try_get(self, default=None):
+        """Returns an item if one is ready, or ``default`` right away if not.
+
+        Like ``get(timeout=0)``, but without raising and catching a
+        :class:`Timeout` on every miss, which is most of the cost of a
+        polling loop.  Pass a sentinel as ``default`` if the channel may
+        carry None.
+
+        :raises: :class:`ChanClosed` If the channel has been closed, the \
+                 buffer is empty, and no threads are waiting on ``put``.
+
+        """
+        self._lock.acquire()
+        try:
+            value = self._get_nowait()
+            if value is not _EMPTY:
+                if _trace_hook is not None:
+                    _trace_hook('get', 'i', self)
+                return value
+            if self._drained():
+                raise ChanClosed(which=self)
+            return default
+        finally:
+            self._lock.release()
+
+    def try_put(self, value):
+        """Places an item onto the channel if that can be done without
+        blocking.
+
+        :returns: True if the item was placed, or False if the buffer is full
+                  and no thread is waiting on ``get``.
+
+        :raises: :class:`ChanClosed` If the channel has been closed.
+
+        """
+        self._lock.acquire()
+        try:
+            if self._closed:
+                raise ChanClosed(which=self)
+            if not self._put_nowait(value):
+                return False
+            if _trace_hook is not None:
+                _trace_hook('put', 'i', self)
+            return True
+        finally:
+            self._lock.release()
+
+    def get_many(self, max_items, timeout=None, linger=None):
+        """Returns a list of between 1 and ``max_items`` items.
+
+        Takes as many items as are ready, from the buffer and from threads
+        blocked on ``put``, while locking the channel once.  If no items are
+        ready, ``get_many`` blocks like ``get`` until one is.
+
+        :param max_items: The largest number of items to return.
 
-                    if time.time() >= timeout_deadline:
-                        # Only time out if the wish wasn't fulfilled
-                        if not group.fulfilled:
-                            self._waiting_producers.remove(wish)
-                            raise Timeout()
+        :param timeout: An optional floating point number representing the
+                        maximum amount of time to wait for the first item, in
+                        seconds.  If the timeout expires, then a
+                        :class:`Timeout` error is raised.
+
+        :param linger: An optional floating point number of seconds.  When
+                       given, ``get_many`` keeps waiting up to this long after
+                       the first item for the batch to fill up, returning
+                       early once it has ``max_items`` items.
+
+        :raises: :class:`ChanClosed` If the channel has been closed and no \
+                 items remain.
+
+        """
+        items = []
+        with self._lock:
+            self._get_many_nowait(items, max_items)
+            if _trace_hook is not None:
+                _trace_items('get', self, len(items))
+        if not items:
+            items.append(self.get(timeout))
+            with self._lock:
+                self._get_many_nowait(items, max_items)
+                if _trace_hook is not None:
+                    _trace_items('get', self, len(items) - 1)
+
+        if linger is not None:
+            linger_deadline = time.time() + linger
+            while len(items) < max_items:
+                remaining = linger_deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self.get(remaining))
+                except (Timeout, ChanClosed):
+                    break
+                got = len(items)
+                with self._lock:
+                    self._get_many_nowait(items, max_items)
+                    if _trace_hook is not None:
+                        _trace_items('get', self, len(items) - got)
+        return items
+
+    def put_many(self, values, timeout=None):
+        """Places several items onto the channel, in order.
 
-        if wish.closed:
-            raise ChanClosed(which=self)
+        Hands as many items as possible to threads blocked on ``get`` and into
+        the buffer while locking the channel once, and then blocks like
+        ``put`` whenever the channel can't take more.
+
+        :param values: An iterable of values to place on the channel.
+
+        :param timeout: An optional floating point number representing the
+                        maximum amount of time to block, in seconds.  If the
+                        timeout expires, ``put_many`` stops early.
+
+        :returns: The number of items placed on the channel, which is less
+                  than the number of ``values`` only if the timeout expired.
+
+        :raises: :class:`ChanClosed` If the channel has been closed.  Items \
+                 before the one that failed have already been placed.
+
+        """
+        timeout_deadline = None
+        if timeout is not None:
+            timeout_deadline = time.time() + timeout
+
+        values = list(values)
+        i = 0
+        while i < len(values):
+            with self._lock:
+                if self._closed:
+                    raise ChanClosed(which=self)
+                start = i
+                i = self._put_many_nowait(values, i)
+                if _trace_hook is not None:
+                    _trace_items('put', self, i - start)
+                if i == len(values):
+                    break
+
+                if timeout is not None and timeout_deadline <= time.time():
+                    if self._stats is not None:
+                        self._stats.timeouts += 1
+                    break
+
+                wish = _thread_wish(WISH_PRODUCE, self, values[i])
+                self._waiting_producers.append(wish)
+                stats = self._stats
+                if stats is not None:
+                    blocked_at = time.monotonic()
+                hook = _trace_hook
+                if hook is not None:
+                    hook('put parked', 'B', self)
+
+            fulfilled = _wait_fulfilled(wish.group, timeout, timeout_deadline)
+            if not fulfilled:
+                with self._lock:
+                    self._waiting_producers.discard(wish)
+                fulfilled = wish.group.fulfilled
+            if stats is not None:
+                self._count_wait(True, blocked_at, not fulfilled)
+            if hook is not None:
+                hook('put parked', 'E', self)
+                if fulfilled and not wish.closed:
+                    hook('put', 'i', self)
+            if not fulfilled:
+                _finish_wish(wish)
+                break
+
+            _finish_wish(wish)
+            i += 1
+        return i
 
     def close(self):
         """Closes the channel, allowing no further ``put`` operations.
@@ -323,14 +1134,17 @@ class Chan(object):
             if self._closed:
                 raise RuntimeError("Channel double-closed")
             self._closed = True
-
-            # Copies waiting wishes, to be fulfilled when the Chan is unlocked.
-            wishes = self._waiting_producers[:] + self._waiting_consumers[:]
-
-        for wish in wishes:
-            with wish.group.lock:
-                if not wish.fulfilled:
-                    wish.fulfill(closed=True)
+            if _trace_hook is not None:
+                _trace_hook('close', 'i', self)
+
+            # Fulfills the waiting wishes with the Chan still locked, like any
+            # other fulfillment, so a waiter that timed out knows its wish
+            # can't be fulfilled later, once it's reused.
+            for waiting in (self._waiting_producers, self._waiting_consumers):
+                while waiting:
+                    wish = waiting.popleft()
+                    if wish.group.claim():
+                        wish.fulfill(closed=True)
 
     @property
     def closed(self):
@@ -355,7 +1169,112 @@ class Chan(object):
     next = __next__
 
 
-def chanselect(consumers, producers, timeout=None):
+def _select_locks(wishes):
+    """Returns the locks of the wishes' channels, in locking order."""
+    locks = list(set(wish.chan._lock for wish in wishes))
+    locks.sort(key=id)
+    return locks
+
+
+def _select_nowait(wishes):
+    """
+    Carries out the first wish that can go ahead without blocking.  Returns
+    (wish, value received), or (None, None) if no wish is ready.
+
+    Assumes that all the wishes' channels are locked.
+    """
+    for wish in wishes:
+        if wish.kind == WISH_CONSUME:
+            # Buffered values are still delivered after a close.
+            value = wish.chan._get_nowait()
+            if value is not _EMPTY:
+                return wish, value
+            if wish.chan._drained():
+                raise ChanClosed(which=wish.chan)
+        else:  # PRODUCE
+            if wish.chan._closed:
+                raise ChanClosed(which=wish.chan)
+            if wish.chan._put_nowait(wish.value):
+                return wish, None
+    return None, None
+
+
+def _select_enqueue(wishes):
+    """
+    Enqueues wishes on their channels, to wait for fulfillment.
+
+    Assumes that all the wishes' channels are locked.
+    """
+    for wish in wishes:
+        if wish.kind == WISH_CONSUME:
+            wish.chan._waiting_consumers.append(wish)
+        else:
+            wish.chan._waiting_producers.append(wish)
+
+
+def _wish_ready(wish):
+    """Assumes that the wish's channel is locked."""
+    if wish.kind == WISH_CONSUME:
+        return wish.chan._get_ready()
+    return wish.chan._put_ready()
+
+
+def _select_missed(wishes):
+    """
+    Returns True if a channel became ready while its wish was being enqueued.
+
+    The fast paths of a lock-free channel, like SPSCChan, move values without
+    the lock and only then look for waiting wishes, so a value can land after
+    a select found the channel not ready, yet before its wish was in the
+    queue.  Checking again once the wishes are enqueued catches that value.
+
+    Assumes that all the wishes' channels are locked.
+    """
+    for wish in wishes:
+        if wish.chan._lock_free and _wish_ready(wish):
+            return True
+    return False
+
+
+def _select_withdraw(wishes):
+    """
+    Removes any wishes still waiting from their channels' queues.
+
+    Assumes that all the wishes' channels are locked.
+    """
+    for wish in wishes:
+        if wish._queue is not None:
+            wish._queue.discard(wish)
+
+
+def _try_case(chan, kind, value):
+    """
+    Runs one select case if it can go ahead without blocking.  Returns the
+    value received (None for a produce), or _EMPTY.
+    """
+    lock = chan._lock
+    lock.acquire()
+    try:
+        if kind == WISH_CONSUME:
+            got = chan._get_nowait()
+            if got is _EMPTY:
+                if chan._drained():
+                    raise ChanClosed(which=chan)
+                return got
+        elif chan._closed:
+            raise ChanClosed(which=chan)
+        elif chan._put_nowait(value):
+            got = None
+        else:
+            return _EMPTY
+        if _trace_hook is not None:
+            _trace_hook('select', 'i', chan)
+        return got
+    finally:
+        lock.release()
+
+
+def chanselect(consumers, producers, timeout=None, default=_NO_DEFAULT):
     """Returns when exactly one consume or produce operation succeeds.
 
     When this function returns, either a channel is closed, or one value has
@@ -369,6 +1288,10 @@ def chanselect(consumers, producers, timeout=None):
     - (:class:`Chan`, None) -- If a produce channel is first
     - Raises :class:`ChanClosed`\ ``(which=Chan)`` - If any channel is closed
 
+    Cases are tried in random order, one channel at a time, so no channel is
+    favored, and no channel is locked for longer than a single ``get`` or
+    ``put`` would lock it, even in a select over thousands of channels.
+
     :param consumers: A list of :class:`Chan` objects to consume from.
     :param producers: A list of (:class:`Chan`, value), containing a channel
                       and a value to put into the channel.
@@ -377,6 +1300,10 @@ def chanselect(consumers, producers, timeout=None):
                     amount of time to block.  If no channel is ready by this
                     time, then a :class:`Timeout` error is raised.
 
+    :param default: If given, ``chanselect`` never blocks, like a Go
+                    ``select`` with a ``default`` case: it returns
+                    ``(None, default)`` if no channel is ready.
+
     Here's a quick example.  Let's say we're waiting to receive on channels
     ``chan_a`` and ``chan_b``, and waiting to send on channels ``chan_c`` and
     ``chan_d``.  The call to ``chanselect`` looks something like this:
@@ -397,8 +1324,23 @@ def chanselect(consumers, producers, timeout=None):
             raise RuntimeError("Can't get here")
 
     """
-    if timeout is not None:
-        timeout_deadline = time.time() + timeout
+    n_consumers = len(consumers)
+    n = n_consumers + len(producers)
+    start, stride = _case_order(n)
+    for i in range(n):
+        j = (start + i * stride) % n
+        if j < n_consumers:
+            chan, kind, value = consumers[j], WISH_CONSUME, None
+        else:
+            chan, value = producers[j - n_consumers]
+            kind = WISH_PRODUCE
+        got = _try_case(chan, kind, value)
+        if got is not _EMPTY:
+            return chan, got
+    if default is not _NO_DEFAULT:
+        return None, default
+    if timeout is not None and timeout <= 0:
+        raise Timeout()
 
     group = WishGroup()
     for chan in consumers:
@@ -406,77 +1348,237 @@ def chanselect(consumers, producers, timeout=None):
     for chan, value in producers:
         Wish(group, WISH_PRODUCE, chan, value)
 
-    # Makes all cases fair
-    random.shuffle(group.wishes)
+    wish, value = _select(group, timeout)
+    return wish.chan, value
 
-    chan_locks_ordered = list(set(wish.chan._lock for wish in group.wishes))
-    chan_locks_ordered.sort(key=id)
 
-    with all_locked(chan_locks_ordered):
-        # Checks for blocked threads that we can satisfy
-        for wish in group.wishes:
-            if wish.chan._closed:
-                raise ChanClosed(which=wish.chan)
+def _case_order(n):
+    """
+    Returns (start, stride) for trying n select cases in the order
+    ``(start + i * stride) % n``.  With both random, and the stride prime to
+    n, every case is as likely to be tried first, at none of the cost of
+    shuffling thousands of cases.
+    """
+    if n < 2:
+        return 0, 1
+    stride = random.randrange(1, n)
+    while math.gcd(stride, n) != 1:
+        stride = random.randrange(1, n)
+    return random.randrange(n), stride
 
-            if wish.kind == WISH_CONSUME:
-                try:
-                    value = wish.chan._get_nowait()
-                    return wish.chan, value
-                except Empty:
-                    pass
-            else:  # PRODUCE
-                try:
-                    wish.chan._put_nowait(wish.value)
-                    return wish.chan, None
-                except Full:
-                    pass
 
-        # If chanselect shouldn't block, then we can exit here, and shortcut
-        # adding wishes to other channels.
-        if timeout is not None and timeout <= 0:
-            raise Timeout()
+def _run_case(wish):
+    """
+    Runs the case of a select that has claimed its own group.  Returns True
+    if the case went ahead or found its channel closed, and False if it
+    couldn't go ahead after all.
 
-        # Enqueues wishes, to wait for fulfillment
-        for wish in group.wishes:
-            if wish.kind == WISH_CONSUME:
-                wish.chan._waiting_consumers.append(wish)
-            else:
-                wish.chan._waiting_producers.append(wish)
-
-    # Waits for the wish to be fulfilled
-    with group.lock:
-        while not group.fulfilled:
-            if timeout is None:
-                group.cond.wait()
-            else:
-                group.cond.wait(timeout_deadline - time.time())
-                if time.time() >= timeout_deadline:
-                    break
+    Assumes that the wish's channel is locked.
+    """
+    chan = wish.chan
+    if wish.kind == WISH_CONSUME:
+        value = chan._get_nowait()
+        if value is not _EMPTY:
+            wish.value = value
+        elif chan._drained():
+            wish.closed = True
+        else:
+            return False
+    elif chan._closed:
+        wish.closed = True
+    elif not chan._put_nowait(wish.value):
+        return False
+    wish.group.fulfilled_by = wish
+    return True
 
-    # Removes the wishes from waiting queues
-    with all_locked(chan_locks_ordered):
-        for wish in group.wishes:
-            if wish.kind == WISH_CONSUME:
-                try:
-                    wish.chan._waiting_consumers.remove(wish)
-                except ValueError:
-                    pass
-            else:
-                try:
-                    wish.chan._waiting_producers.remove(wish)
-                except ValueError:
-                    pass
 
-    # Even if the blocking wait timed out, it's possible for wish to get
-    # fulfilled before getting removed from a Chan's waiting queue.  No big
-    # deal.  We'll just pretend that the wish was fulfilled before the timeout.
+def _select_enqueue_each(group, wishes):
+    """
+    Enqueues wishes one channel at a time, running any case that has become
+    ready instead.  Returns True if this thread ran a case, and False if the
+    wishes are waiting or another thread has claimed the group.
+
+    A ready case is run by claiming the group first, like any fulfiller
+    would, since the earlier wishes are already out for fulfillment.  If the
+    case turns out not to be ready, the claim is given up, but meanwhile a
+    fulfiller may have dropped one of the group's wishes from its channel,
+    so those are enqueued again.
+    """
+    n = len(wishes)
+    while True:
+        start, stride = _case_order(n)
+        unclaimed = False
+        for i in range(n):
+            wish = wishes[(start + i * stride) % n]
+            chan = wish.chan
+            lock = chan._lock
+            lock.acquire()
+            try:
+                if group.claimed:  # By a fulfiller
+                    return False
+                if wish._queue is not None:
+                    continue
+                if wish.kind == WISH_CONSUME:
+                    waiting = chan._waiting_consumers
+                else:
+                    waiting = chan._waiting_producers
+                if not _wish_ready(wish):
+                    waiting.append(wish)
+                    # See _select_missed
+                    if not (chan._lock_free and _wish_ready(wish)):
+                        continue
+                    waiting.discard(wish)
+                if not group.claim():
+                    return False
+                if _run_case(wish):
+                    return True
+                group.unclaim()
+                unclaimed = True
+                waiting.append(wish)
+            finally:
+                lock.release()
+        if not unclaimed:
+            return False
+
+
+def _select_withdraw_each(wishes):
+    """Removes the wishes still waiting from their queues, one at a time."""
+    for wish in wishes:
+        queue = wish._queue
+        if queue is not None:
+            lock = wish.chan._lock
+            lock.acquire()
+            try:
+                queue.discard(wish)
+            finally:
+                lock.release()
+
+
+def _select(group, timeout):
+    """
+    Runs a select over group's wishes, none of which were ready a moment
+    ago.  Returns (wish, value received) for the wish that went ahead, or
+    raises ChanClosed or Timeout.
+
+    Channels are locked one at a time, never all at once, so a select over
+    thousands of channels holds up each of them only as long as a ``get``
+    would.  The group's claim decides which channel gets to fulfill it.
+    """
+    timeout_deadline = None
+    if timeout is not None:
+        timeout_deadline = time.time() + timeout
+
+    wishes = group.wishes
+    hook = _trace_hook
+    if not _select_enqueue_each(group, wishes):
+        if hook is not None:
+            hook('select parked', 'B', None)
+        if not _wait_fulfilled(group, timeout, timeout_deadline):
+            # Claims the group so that nothing can fulfill it from now on,
+            # unless a fulfiller got there first, and is about to wake it.
+            if not group.claim():
+                group.wait()
+        if hook is not None:
+            hook('select parked', 'E', None)
+    _select_withdraw_each(wishes)
 
     wish = group.fulfilled_by
     if wish is None:
         raise Timeout()
     if wish.closed:
         raise ChanClosed(which=wish.chan)
-    return wish.chan, wish.value
+    if hook is not None:
+        hook('select', 'i', wish.chan)
+    return wish, wish.value
+
+
+class Selector(object):
+    """A :func:`chanselect` that can be run over and over.
+
+    Building a :class:`Selector` does the setup work of :func:`chanselect`
+    once, so each :meth:`select` only has to run the cases.
+    Cases can be added and removed between runs, for example to drop
+    channels from a fan-in as they close:
+
+    .. code-block:: python
+
+        sel = Selector([chan_a, chan_b, chan_c])
+        while len(sel):
+            try:
+                ch, value = sel.select()
+            except ChanClosed as ex:
+                sel.remove(ex.which)
+                continue
+            print("Got {} from {}".format(value, ch))
+
+    A :class:`Selector` must only be run by one thread at a time.
+
+    :param consumers: A list of :class:`Chan` objects to consume from.
+    :param producers: A list of (:class:`Chan`, value) pairs to produce onto.
+
+    """
+    def __init__(self, consumers=(), producers=()):
+        self._group = WishGroup()
+        self._cases = {}  # (chan, kind) -> Wish
+        for chan in consumers:
+            self.add_consumer(chan)
+        for chan, value in producers:
+            self.add_producer(chan, value)
+
+    def __len__(self):
+        return len(self._cases)
+
+    def _add(self, chan, kind, value):
+        if (chan, kind) in self._cases:
+            raise ValueError("%r is already a case" % chan)
+        self._cases[chan, kind] = Wish(self._group, kind, chan, value)
+
+    def add_consumer(self, chan):
+        """Adds a case that consumes from ``chan``."""
+        self._add(chan, WISH_CONSUME, None)
+
+    def add_producer(self, chan, value):
+        """Adds a case that puts ``value`` onto ``chan``."""
+        self._add(chan, WISH_PRODUCE, value)
+
+    def set_value(self, chan, value):
+        """Changes the value that the producer case for ``chan`` puts."""
+        self._cases[chan, WISH_PRODUCE].value = value
+
+    def remove(self, chan):
+        """Removes every case for ``chan``."""
+        for kind in (WISH_CONSUME, WISH_PRODUCE):
+            wish = self._cases.pop((chan, kind), None)
+            if wish is None:
+                continue
+            self._group.wishes.remove(wish)
+
+    def select(self, timeout=None, default=_NO_DEFAULT):
+        """Returns when exactly one case succeeds.
+
+        Takes the same ``timeout`` and ``default``, and returns and raises
+        the same things, as :func:`chanselect`.
+        """
+        group = self._group
+        wishes = group.wishes
+        n = len(wishes)
+        start, stride = _case_order(n)
+        for i in range(n):
+            wish = wishes[(start + i * stride) % n]
+            got = _try_case(wish.chan, wish.kind, wish.value)
+            if got is not _EMPTY:
+                return wish.chan, got
+        if default is not _NO_DEFAULT:
+            return None, default
+        if timeout is not None and timeout <= 0:
+            raise Timeout()
+
+        group.reset()
+        for wish in wishes:
+            wish.closed = False
+
+        wish, value = _select(group, timeout)
+        return wish.chan, value
 
 
 def quickthread(fn, *args, **kwargs):
@@ -0,0 +1,328 @@
+"""Stages that connect channels into pipelines.
+
+Each function here starts the threads of one stage and returns a
+:class:`Stage`, whose :attr:`~Stage.output` feeds the next one:
+
+.. code-block:: python
+
+    from chan import pipeline
+
+    lines = pipeline.flat_map(read_lines, paths)
+    parsed = pipeline.map(parse, lines, workers=4, buffer=64, batch=16)
+    errors = pipeline.filter(is_error, parsed)
+    done = pipeline.sink(report, errors)
+    done.join()
+
+Closing a stage's input closes its output once the stage has handled every
+item, so closing the first channel winds down the whole pipeline.  Stages
+with more than one worker may reorder items.
+
+"""
+import threading
+import time
+
+from .chan import Chan, ChanClosed, chanselect
+
+
+class Stage(object):
+    """The running threads of one pipeline stage.
+
+    :attr:`outputs` are the channels the stage sends on, and
+    :meth:`metrics` reports how busy its workers are, so the slowest stage
+    in a pipeline is the one with the highest ``utilization`` and a full
+    input queue (see :func:`bottleneck`).
+
+    If the stage's function raises, the stage stops sending, but keeps
+    draining its input so that upstream stages still finish, and
+    :meth:`join` raises the error.
+    """
+    def __init__(self, name, inputs, outputs, workers):
+        self.name = name
+        #: The channels the stage receives from.
+        self.inputs = inputs
+        #: The channels the stage sends on.
+        self.outputs = outputs
+        self.workers = workers
+        self._done = Chan()
+        self._lock = threading.Lock()
+        self._running = workers
+        self._items_in = 0
+        self._items_out = 0
+        self._busy = 0.0
+        self._started = time.monotonic()
+        self._finished = None
+        self._error = None
+
+    def __repr__(self):
+        return "<Stage %s 0x%x>" % (self.name, id(self))
+
+    @property
+    def output(self):
+        """The channel the stage sends on, for stages with one output."""
+        if len(self.outputs) != 1:
+            raise AttributeError("Stage %s has %d outputs" %
+                                 (self.name, len(self.outputs)))
+        return self.outputs[0]
+
+    def __iter__(self):
+        return iter(self.output)
+
+    def _start(self, i, target, *args):
+        """Starts worker i, of the ``workers`` the stage was made with."""
+        th = threading.Thread(
+            name='chan-pipeline-%s-%d' % (self.name, i),
+            target=self._work, args=(target,) + args)
+        th.daemon = True
+        th.start()
+
+    def _work(self, target, *args):
+        try:
+            target(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                last = not self._running
+                if last:
+                    self._finished = time.monotonic()
+            if last:
+                for out in self.outputs:
+                    out.close()
+                self._done.close()
+
+    def _count(self, items_in, items_out, busy):
+        with self._lock:
+            self._items_in += items_in
+            self._items_out += items_out
+            self._busy += busy
+
+    def _fail(self, ex):
+        with self._lock:
+            if self._error is None:
+                self._error = ex
+
+    def _failed(self):
+        with self._lock:
+            return self._error is not None
+
+    def join(self, timeout=None):
+        """Waits for the stage to finish, which it does once its inputs are
+        closed and drained.
+
+        :raises: :class:`Timeout` If the stage is still running after
+                 ``timeout`` seconds.  Otherwise raises the exception the
+                 stage's function raised, if it raised one.
+        """
+        try:
+            self._done.get(timeout)
+        except ChanClosed:
+            pass
+        if self._error is not None:
+            raise self._error
+
+    def metrics(self):
+        """Returns a snapshot of the stage, as a dict.
+
+        ``queue_depth`` counts the items waiting in the stage's inputs, and
+        ``utilization`` is the fraction of its workers' time spent in the
+        stage's function.  ``throughput`` is in items received per second.
+        """
+        queue_depth = sum(_queue_depth(c) for c in self.inputs)
+        with self._lock:
+            elapsed = (self._finished or time.monotonic()) - self._started
+            return {
+                'name': self.name,
+                'workers': self.workers,
+                'running': self._running,
+                'items_in': self._items_in,
+                'items_out': self._items_out,
+                'busy_seconds': self._busy,
+                'elapsed': elapsed,
+                'throughput': self._items_in / elapsed if elapsed else 0.0,
+                'utilization': (self._busy / (self.workers * elapsed)
+                                if elapsed else 0.0),
+                'queue_depth': queue_depth,
+            }
+
+
+def _queue_depth(c):
+    """Items buffered in c, or waiting to be put on it."""
+    with c._lock:
+        buffered = len(c._buf) if c._buf is not None else 0
+        return buffered + len(c._waiting_producers)
+
+
+def _chan(source):
+    return source.output if isinstance(source, Stage) else source
+
+
+def _name(name, fn, default):
+    return name or getattr(fn, '__name__', default)
+
+
+def _transform(stage, source, output, batch, apply):
+    """A worker that sends ``apply(items)`` for each batch of items."""
+    while True:
+        try:
+            items = source.get_many(batch)
+        except ChanClosed:
+            return
+        if stage._failed():
+            stage._count(len(items), 0, 0.0)
+            continue
+        began = time.monotonic()
+        try:
+            results = apply(items)
+        except Exception as ex:
+            stage._count(len(items), 0, time.monotonic() - began)
+            stage._fail(ex)
+            continue
+        stage._count(len(items), len(results), time.monotonic() - began)
+        try:
+            output.put_many(results)
+        except ChanClosed as ex:
+            stage._fail(ex)
+
+
+def _transform_stage(name, source, workers, buffer, batch, apply):
+    if workers < 1 or batch < 1:
+        raise ValueError("A stage needs at least one worker and a batch of 1")
+    source = _chan(source)
+    output = Chan(buffer)
+    stage = Stage(name, [source], [output], workers)
+    for i in range(workers):
+        stage._start(i, _transform, stage, source, output, batch, apply)
+    return stage
+
+
+def map(fn, source, workers=1, buffer=0, batch=1, name=None):
+    """Sends ``fn(item)`` for each item received from ``source``.
+
+    :param fn: The function to apply.
+    :param source: A :class:`Chan`, or the :class:`Stage` to read from.
+    :param workers: The number of threads calling ``fn``.
+    :param buffer: The buffer size of the output channel.
+    :param batch: The most items each worker takes from ``source``, and
+                  sends on, at once.  Batches cut the per-item locking cost
+                  for cheap functions.
+    :param name: Names the stage in its metrics.  Defaults to
+                 ``fn.__name__``.
+    :returns: A :class:`Stage`.
+    """
+    return _transform_stage(
+        _name(name, fn, 'map'), source, workers, buffer, batch,
+        lambda items: [fn(item) for item in items])
+
+
+def filter(predicate, source, workers=1, buffer=0, batch=1, name=None):
+    """Sends on the items from ``source`` for which ``predicate(item)`` is
+    true.  Takes the same arguments as :func:`map`."""
+    return _transform_stage(
+        _name(name, predicate, 'filter'), source, workers, buffer, batch,
+        lambda items: [item for item in items if predicate(item)])
+
+
+def flat_map(fn, source, workers=1, buffer=0, batch=1, name=None):
+    """Sends each of the values in the iterable ``fn(item)``, for each item
+    from ``source``.  Takes the same arguments as :func:`map`."""
+    return _transform_stage(
+        _name(name, fn, 'flat_map'), source, workers, buffer, batch,
+        lambda items: [value for item in items for value in fn(item)])
+
+
+def _distribute(stage, source, outputs, batch):
+    """A worker that sends each item on whichever output is ready first."""
+    while True:
+        try:
+            items = source.get_many(batch)
+        except ChanClosed:
+            return
+        stage._count(len(items), 0, 0.0)
+        for item in items:
+            try:
+                chanselect([], [(out, item) for out in outputs])
+            except ChanClosed as ex:
+                stage._fail(ex)
+                break
+            stage._count(0, 1, 0.0)
+
+
+def fan_out(source, n, workers=1, buffer=0, batch=1, name='fan_out'):
+    """Spreads the items from ``source`` over ``n`` output channels.
+
+    Each item goes to one output, whichever can take it first, so a slow
+    consumer gets fewer items.
+
+    :param n: The number of outputs.
+    :returns: A :class:`Stage`, with its outputs in :attr:`Stage.outputs`.
+    """
+    if n < 1 or workers < 1 or batch < 1:
+        raise ValueError("fan_out needs at least one output, one worker, "
+                         "and a batch of 1")
+    source = _chan(source)
+    stage = Stage(name, [source], [Chan(buffer) for _ in range(n)], workers)
+    for i in range(workers):
+        stage._start(i, _distribute, stage, source, stage.outputs, batch)
+    return stage
+
+
+def merge(sources, buffer=0, batch=1, name='merge'):
+    """Sends the items from all of ``sources`` on one channel.
+
+    Runs one worker per source, and closes the output once every source is
+    closed.
+
+    :param sources: Channels, or :class:`Stage` objects, to read from.
+    :returns: A :class:`Stage`.
+    """
+    if batch < 1:
+        raise ValueError("merge needs a batch of at least 1")
+    sources = [_chan(s) for s in sources]
+    output = Chan(buffer)
+    stage = Stage(name, sources, [output], len(sources))
+    for i, source in enumerate(sources):
+        stage._start(i, _transform, stage, source, output, batch, list)
+    if not sources:
+        output.close()
+        stage._done.close()
+    return stage
+
+
+def _consume(stage, source, batch, fn):
+    while True:
+        try:
+            items = source.get_many(batch)
+        except ChanClosed:
+            return
+        if stage._failed():
+            stage._count(len(items), 0, 0.0)
+            continue
+        began = time.monotonic()
+        try:
+            for item in items:
+                fn(item)
+        except Exception as ex:
+            stage._fail(ex)
+        stage._count(len(items), 0, time.monotonic() - began)
+
+
+def sink(fn, source, workers=1, batch=1, name=None):
+    """Calls ``fn(item)`` for each item from ``source``, ending a pipeline.
+
+    Call :meth:`Stage.join` on the result to wait for the pipeline to
+    finish.  Takes the same arguments as :func:`map`.
+
+    :returns: A :class:`Stage`, with no outputs.
+    """
+    if workers < 1 or batch < 1:
+        raise ValueError("A stage needs at least one worker and a batch of 1")
+    source = _chan(source)
+    stage = Stage(_name(name, fn, 'sink'), [source], [], workers)
+    for i in range(workers):
+        stage._start(i, _consume, stage, source, batch, fn)
+    return stage
+
+
+def bottleneck(stages):
+    """Returns the stage whose workers are busiest, which is the one to
+    give more workers, or to speed up."""
+    return max(stages, key=lambda s: s.metrics()['utilization'])
@@ -0,0 +1,239 @@
+import itertools
+import threading
+
+from .chan import Chan, ChanClosed, Timeout
+
+
+class Task(object):
+    """A function call running on a :class:`Pool`, returned by :func:`go`.
+
+    :attr:`done` is a channel that is closed once the call finishes, so a
+    task can be waited on in :func:`chanselect` alongside other channels,
+    like Go's ``done`` channels.
+    """
+    __slots__ = ('done', '_fn', '_args', '_kwargs', '_result', '_exception')
+
+    def __init__(self, fn, args, kwargs):
+        #: A :class:`Chan` that is closed when the task finishes.
+        self.done = Chan()
+        self._fn = fn
+        self._args = args
+        self._kwargs = kwargs
+        self._result = None
+        self._exception = None
+
+    def __repr__(self):
+        return "<Task %r 0x%x>" % (self._fn, id(self))
+
+    def _run(self):
+        try:
+            self._result = self._fn(*self._args, **self._kwargs)
+        except Exception as ex:
+            self._exception = ex
+        finally:
+            self._fn = self._args = self._kwargs = None
+            self.done.close()
+
+    def join(self, timeout=None):
+        """Waits for the task to finish.
+
+        :raises: :class:`Timeout` If the task is still running after
+                 ``timeout`` seconds.
+        """
+        try:
+            self.done.get(timeout)
+        except ChanClosed:
+            pass
+
+    def result(self, timeout=None):
+        """Waits for the task to finish, and returns what it returned.
+
+        Raises the exception the task raised, if it raised one.
+        """
+        self.join(timeout)
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+
+class Pool(object):
+    """An elastic pool of worker threads, running :class:`Task` objects.
+
+    Starting a thread for every short call is slow, and bursts of them can
+    pile up tens of thousands of threads.  A pool starts workers only while
+    submitted tasks outnumber its idle workers, up to ``max_workers``, and
+    a worker that sits idle for ``idle_timeout`` seconds exits, down to
+    ``min_workers``.
+
+    Tasks wait for a worker in a buffered :class:`Chan`, so :meth:`go`
+    blocks once ``queue_size`` tasks are waiting.
+
+    :param min_workers: Workers that are kept even when idle.
+    :param max_workers: The most workers that run at once.
+    :param idle_timeout: Seconds a worker above ``min_workers`` waits for a
+                         task before exiting.
+    :param queue_size: The most tasks waiting for a worker.
+
+    """
+    _ids = itertools.count()
+
+    def __init__(self, min_workers=0, max_workers=64, idle_timeout=5.0,
+                 queue_size=1024):
+        if max_workers < max(min_workers, 1):
+            raise ValueError("max_workers must be at least 1 and min_workers")
+        self.min_workers = min_workers
+        self.max_workers = max_workers
+        self.idle_timeout = idle_timeout
+        self._tasks = Chan(queue_size, growable=True)
+        self._id = next(self._ids)
+
+        self._lock = threading.Lock()
+        self._threads = set()
+        self._spawned = 0  # Numbers the worker threads
+        self._workers = 0
+        self._idle = 0
+        self._queued = 0  # Submitted, and not taken by a worker yet
+        self._submitted = 0
+        self._completed = 0
+
+        with self._lock:
+            for _ in range(min_workers):
+                self._spawn()
+
+    def __repr__(self):
+        return "<Pool %d 0x%x>" % (self._id, id(self))
+
+    def _spawn(self):
+        """Starts a worker.  Assumes that the pool is locked."""
+        # A new worker counts as idle until it takes a task, so a burst of
+        # submissions doesn't start a worker apiece.
+        self._workers += 1
+        self._idle += 1
+        self._spawned += 1
+        th = threading.Thread(
+            name='chan-pool-%d-%d' % (self._id, self._spawned),
+            target=self._work)
+        th.daemon = True
+        self._threads.add(th)
+        th.start()
+
+    def _exit(self):
+        """Counts the calling worker out.  Assumes that the pool is
+        locked."""
+        self._workers -= 1
+        self._threads.discard(threading.current_thread())
+
+    def _work(self):
+        while True:
+            try:
+                task = self._tasks.get(timeout=self.idle_timeout)
+            except Timeout:
+                with self._lock:
+                    # Stays if the other idle workers can't take every
+                    # waiting task.
+                    if (self._workers > self.min_workers and
+                            self._queued < self._idle):
+                        self._idle -= 1
+                        self._exit()
+                        return
+                continue
+            except ChanClosed:
+                with self._lock:
+                    self._idle -= 1
+                    self._exit()
+                return
+
+            with self._lock:
+                self._idle -= 1
+                self._queued -= 1
+            try:
+                task._run()
+            except BaseException:
+                # SystemExit and the like end the worker, as they would end
+                # a thread of its own.
+                with self._lock:
+                    self._exit()
+                raise
+            with self._lock:
+                self._completed += 1
+                self._idle += 1
+
+    def go(self, fn, *args, **kwargs):
+        """Runs ``fn(*args, **kwargs)`` on a worker.
+
+        :returns: A :class:`Task`, to wait for the call and get its result.
+
+        :raises: :class:`ChanClosed` If the pool has been shut down.
+        """
+        task = Task(fn, args, kwargs)
+        with self._lock:
+            if self._tasks._closed:
+                raise ChanClosed(which=self._tasks)
+            self._queued += 1
+            self._submitted += 1
+            if self._queued > self._idle and self._workers < self.max_workers:
+                self._spawn()
+        try:
+            self._tasks.put(task)
+        except ChanClosed:
+            with self._lock:
+                self._queued -= 1
+                self._submitted -= 1
+            raise
+        return task
+
+    def shutdown(self, wait=True):
+        """Stops taking tasks.  Tasks already submitted still run.
+
+        :param wait: If True, waits for the workers to finish them.
+        """
+        self._tasks.close()
+        if wait:
+            with self._lock:
+                threads = list(self._threads)
+            for th in threads:
+                if th is not threading.current_thread():
+                    th.join()
+
+    def metrics(self):
+        """Returns a snapshot of the pool, as a dict.
+
+        ``queue_depth`` is the number of tasks waiting for a worker, and
+        ``active`` the number of workers running a task.
+        """
+        with self._lock:
+            return {
+                'queue_depth': self._queued,
+                'workers': self._workers,
+                'active': self._workers - self._idle,
+                'idle': self._idle,
+                'submitted': self._submitted,
+                'completed': self._completed,
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def default_pool():
+    """Returns the process-wide :class:`Pool` used by :func:`go`."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = Pool()
+        return _pool
+
+
+def go(fn, *args, **kwargs):
+    """Runs ``fn(*args, **kwargs)`` on the default :class:`Pool`, like Go's
+    ``go`` statement.
+
+    Unlike :func:`quickthread`, which starts a new thread for every call,
+    ``go`` reuses worker threads.  Calls may wait for a worker once the pool
+    is at ``max_workers``, so a task that blocks forever holds a worker
+    forever.
+
+    :returns: A :class:`Task`.
+    """
+    return default_pool().go(fn, *args, **kwargs)
@@ -0,0 +1,118 @@
+import heapq
+import itertools
+
+from .chan import Chan, _EMPTY
+
+
+class HeapBuffer(object):
+    """A bounded buffer that pops the value with the lowest key first.
+
+    Has the interface of :class:`RingBuffer`, so it can stand in for a
+    :class:`Chan`'s buffer.  Values with equal keys pop in the order they
+    were pushed.
+    """
+    __slots__ = ('heap', 'key', '_cap', '_seq')
+
+    def __init__(self, buflen, key):
+        self.heap = []
+        self.key = key
+        self._cap = buflen
+        self._seq = itertools.count()  # Breaks ties between equal keys
+
+    @property
+    def cap(self):
+        return self._cap
+
+    def push(self, value, force=False):
+        """Pushes value.  ``force`` pushes past the cap, by one at most."""
+        if len(self.heap) >= self._cap and not force:
+            raise IndexError()
+        heapq.heappush(self.heap, (self.key(value), next(self._seq), value))
+
+    def pop(self):
+        if not self.heap:
+            raise IndexError()
+        return heapq.heappop(self.heap)[2]
+
+    def extend(self, values):
+        """Pushes as many of values as fit.  Returns how many were pushed."""
+        count = min(len(values), self._cap - len(self.heap))
+        for i in range(count):
+            self.push(values[i])
+        return count
+
+    def pop_many(self, n):
+        """Pops and returns a list of up to n values, lowest keys first."""
+        heap = self.heap
+        return [heapq.heappop(heap)[2] for _ in range(min(n, len(heap)))]
+
+    def __len__(self):
+        return len(self.heap)
+
+    @property
+    def empty(self):
+        return not self.heap
+
+    @property
+    def full(self):
+        return len(self.heap) >= self._cap
+
+
+def _identity(value):
+    return value
+
+
+class PriorityChan(Chan):
+    """A buffered channel that delivers the most urgent item first.
+
+    ``get`` returns the item with the lowest ``key(item)`` out of the buffer
+    and any threads blocked on ``put``, and items with equal keys come out in
+    the order they were put.  Otherwise a :class:`PriorityChan` behaves like
+    a :class:`Chan`: a ``put`` hands its item straight to a waiting ``get``,
+    and it can be a case in :func:`chanselect`.
+
+    The buffer is a binary heap, so ``put`` and ``get`` stay O(log n) no
+    matter how big the backlog grows.
+
+    .. code-block:: python
+
+        jobs = PriorityChan(1024, key=lambda job: job.priority)
+
+    :param buflen: The size of the buffer.  Must be at least 1, since
+                   without a buffer there's nothing to order.
+    :param key: A function of an item, returning its priority.  Lower
+                priorities come out first.  Defaults to the item itself.
+
+    """
+    __slots__ = ()
+
+    def __init__(self, buflen, key=None):
+        if buflen < 1:
+            raise ValueError("PriorityChan needs a buffer")
+        super(PriorityChan, self).__init__()
+        self._buf = HeapBuffer(buflen, key or _identity)
+
+    def __repr__(self):
+        return "<PriorityChan 0x%x>" % id(self)
+
+    def _get_nowait(self):
+        """
+        Returns the lowest value from the buffer and any waiting producer,
+        or _EMPTY.
+
+        Assumes that the Chan is locked.
+        """
+        buf = self._buf
+        stats = self._stats
+        # Moves a producer's value into the heap before popping, rather than
+        # after, in case it's more urgent than anything buffered.
+        produced = self._fulfill_waiting_producer()
+        if produced is not _EMPTY:
+            buf.push(produced, force=True)
+            if stats is not None:
+                stats.buffered_put(1, len(buf))
+        if buf.empty:
+            return _EMPTY
+        if stats is not None:
+            stats.buffered_get(1)
+        return buf.pop()
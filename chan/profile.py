@@ -0,0 +1,311 @@
+"""Where threads block on channels, and for how long.
+
+A :class:`BlockProfiler` is something like Go's block profile.  It adds up
+the time threads spend parked in ``get``, ``put``, and :func:`chanselect`,
+by call site and channel.  It can also list the threads waiting on
+channels, and report when every thread it watches is parked at once,
+which means they're deadlocked:
+
+.. code-block:: python
+
+    from chan import BlockProfiler
+
+    profiler = BlockProfiler(threshold=0.01).start()
+    for stage in stages:
+        profiler.watch(stage_thread)
+    ...
+    for record in profiler.profile()[:10]:
+        print(record['seconds'], record['site'], record['chan'])
+
+Nothing is measured until a thread parks, so waits that don't block cost
+nothing.
+
+"""
+import os
+import sys
+import threading
+import time
+import traceback
+
+from . import chan as _chan
+from . import spsc as _spsc
+from .stats import live_chans
+from .trace import _chan_name
+
+# Frames in these files are the waiting itself, not where it was called.
+_INTERNAL_FILES = frozenset(os.path.normcase(os.path.abspath(f))
+                            for f in (_chan.__file__, _spsc.__file__,
+                                      __file__))
+
+
+def _internal(filename):
+    return os.path.normcase(os.path.abspath(filename)) in _INTERNAL_FILES
+
+
+def _call_stack(frame, depth):
+    """
+    Returns the stack from frame outwards, as (filename, line, function)
+    tuples, starting at the first frame outside the channel internals.
+    """
+    while frame is not None and _internal(frame.f_code.co_filename):
+        frame = frame.f_back
+    stack = []
+    while frame is not None and len(stack) < depth:
+        code = frame.f_code
+        stack.append((code.co_filename, frame.f_lineno, code.co_name))
+        frame = frame.f_back
+    return tuple(stack)
+
+
+def _waiting_groups(frames):
+    """
+    Returns {id(group): (thread id, frame, timeout)} for the threads in
+    frames that are waiting on a wish group, found from their stacks, so
+    threads that parked before the profiler started are found too.
+    """
+    groups = {}
+    for ident, frame in frames.items():
+        while frame is not None:
+            if frame.f_code is _chan._wait_fulfilled.__code__:
+                local = frame.f_locals
+                group = local.get('group')
+                if group is not None:
+                    groups[id(group)] = (ident, frame, local.get('timeout'))
+                break
+            frame = frame.f_back
+    return groups
+
+
+def _format_stack(stack):
+    return ['File "%s", line %d, in %s' % entry for entry in stack]
+
+
+class BlockProfiler(object):
+    """Profiles the waits of threads parked on channels.
+
+    Waits that last ``threshold`` seconds or more are sampled: the stack
+    they were called from is walked, and their time is added to the total
+    for that stack and channel, which :meth:`profile` reports.
+
+    Threads given to :meth:`watch` are checked for deadlock.  When the last
+    of them parks without a timeout, while the rest are parked without
+    being woken, ``on_deadlock`` is called with a :meth:`snapshot`.  The
+    check can only see the watched threads, so a thread that will be woken
+    by an unwatched one, such as a timer, shouldn't be watched.
+
+    Only waits on a :class:`Chan` or :class:`SPSCChan`, alone or in a
+    select, are seen.  :class:`BytesChan` and :class:`BroadcastChan` wait on
+    conditions of their own, and goroutines park in their scheduler, so
+    those waits are neither profiled, nor counted by the deadlock check, nor
+    listed by :meth:`snapshot`.
+
+    Only one profiler can be running at a time.
+
+    :param threshold: The shortest wait to sample, in seconds.
+    :param depth: The most stack frames to keep for each sample.
+    :param on_deadlock: Called as ``on_deadlock(snapshot)`` on the thread
+                        that completed the deadlock.  Defaults to writing
+                        :func:`format_snapshot` to stderr.
+    """
+    def __init__(self, threshold=0.001, depth=16, on_deadlock=None):
+        self.threshold = threshold
+        self.depth = depth
+        self.on_deadlock = on_deadlock or _print_deadlock
+        self._lock = threading.Lock()
+        self._parked = {}  # thread id -> (group, parked at, timeout)
+        self._records = {}  # (stack, chan name) -> [count, seconds]
+        self._watched = {}  # thread id -> Thread
+        self._reported = False
+
+    def __repr__(self):
+        return "<BlockProfiler 0x%x>" % id(self)
+
+    def start(self):
+        """Starts profiling."""
+        _chan._set_block_hook(self)
+        return self
+
+    def stop(self):
+        """Stops profiling.  The samples so far are kept."""
+        _chan._set_block_hook(None)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def watch(self, thread=None):
+        """Checks ``thread``, or the calling thread, for deadlock.
+
+        Watch all the threads before any of them can block, or the first
+        to park may look deadlocked on its own.
+        """
+        thread = thread or threading.current_thread()
+        with self._lock:
+            self._watched[thread.ident] = thread
+
+    def unwatch(self, thread=None):
+        """Stops checking ``thread``, or the calling thread."""
+        thread = thread or threading.current_thread()
+        with self._lock:
+            self._watched.pop(thread.ident, None)
+
+    def parked(self, group, timeout):
+        """Called by a thread about to wait on group."""
+        ident = threading.get_ident()
+        self._parked[ident] = (group, time.monotonic(), timeout)
+        if timeout is None and ident in self._watched:
+            try:
+                self._check_deadlock()
+            except Exception:
+                traceback.print_exc()
+
+    def woken(self, group):
+        """Called by a thread once its wait on group is over."""
+        ident = threading.get_ident()
+        _, parked_at, _ = self._parked.pop(ident)
+        seconds = time.monotonic() - parked_at
+        if self._reported and ident in self._watched:
+            self._reported = False
+        if seconds < self.threshold:
+            return
+
+        stack = _call_stack(sys._getframe(1), self.depth)
+        wish = group.fulfilled_by
+        if wish is None and len(group.wishes) == 1:
+            wish = group.wishes[0]  # A get or put that timed out
+        chan = wish.chan if wish is not None else None
+        key = (stack, _chan_name(chan) if chan is not None else 'select')
+        with self._lock:
+            record = self._records.get(key)
+            if record is None:
+                self._records[key] = [1, seconds]
+            else:
+                record[0] += 1
+                record[1] += seconds
+
+    def _check_deadlock(self):
+        with self._lock:
+            if self._reported:
+                return
+            for ident, thread in self._watched.items():
+                if not thread.is_alive():
+                    continue
+                parked = self._parked.get(ident)
+                # A claimed group is about to be woken.
+                if (parked is None or parked[2] is not None or
+                        parked[0].claimed):
+                    return
+            self._reported = True
+        self.on_deadlock(self.snapshot())
+
+    def profile(self):
+        """Returns the sampled waits, added up by call site and channel, as
+        a list of dicts, with the most time blocked first.
+
+        Each has the ``site`` that called the wait, the ``chan`` it waited
+        on (``'select'`` for a select that timed out), the ``count`` of
+        waits, their total ``seconds``, and the ``stack`` they were called
+        from, innermost frame first.
+        """
+        with self._lock:
+            records = list(self._records.items())
+        result = []
+        for (stack, chan), (count, seconds) in records:
+            lines = _format_stack(stack)
+            result.append({
+                'site': lines[0] if lines else None,
+                'chan': chan,
+                'count': count,
+                'seconds': seconds,
+                'stack': lines,
+            })
+        result.sort(key=lambda record: -record['seconds'])
+        return result
+
+    def clear(self):
+        """Drops the samples so far."""
+        with self._lock:
+            self._records.clear()
+
+    def snapshot(self, chans=None):
+        """Returns the wishes waiting on channels, as a list of dicts, one
+        for each channel with something waiting on it.
+
+        Each has the ``chan``, and its waiting ``producers`` and
+        ``consumers``.  A waiter is a dict of its ``thread`` name, the
+        ``seconds`` it has been parked, whether it has a ``timeout``, and
+        the ``stack`` it's parked in, innermost frame first.  A thread in a
+        select is listed under each of its channels.
+
+        Threads that parked before the profiler started are listed too, with
+        ``seconds`` of None.  A waiter that isn't a thread, such as a
+        coroutine, has a ``thread`` of None and no ``stack``.
+
+        :param chans: The channels to look at.  Defaults to
+                      :func:`live_chans`, along with the channels of every
+                      wait seen since :meth:`start`.
+        """
+        now = time.monotonic()
+        parked = dict((id(group), parked_at) for group, parked_at, _
+                      in list(self._parked.values()))
+        if chans is None:
+            chans = live_chans()
+            for group, _, _ in list(self._parked.values()):
+                chans.extend(wish.chan for wish in list(group.wishes))
+        frames = sys._current_frames()
+        waiting = _waiting_groups(frames)
+        names = dict((t.ident, t.name) for t in threading.enumerate())
+
+        result = []
+        seen = set()
+        for chan in chans:
+            if chan is None or id(chan) in seen:
+                continue
+            seen.add(id(chan))
+            with chan._lock:
+                queues = [('producers', list(chan._waiting_producers)),
+                          ('consumers', list(chan._waiting_consumers))]
+            entry = {'chan': _chan_name(chan)}
+            for role, wishes in queues:
+                entry[role] = []
+                for wish in wishes:
+                    ident, frame, timeout = waiting.get(
+                        id(wish.group), (None, None, None))
+                    parked_at = parked.get(id(wish.group))
+                    entry[role].append({
+                        'thread': (names.get(ident, str(ident))
+                                   if ident is not None else None),
+                        'seconds': (now - parked_at
+                                    if parked_at is not None else None),
+                        'timeout': timeout is not None,
+                        'stack': _format_stack(_call_stack(frame,
+                                                           self.depth)),
+                    })
+            if entry['producers'] or entry['consumers']:
+                result.append(entry)
+        return sorted(result, key=lambda entry: entry['chan'])
+
+
+def format_snapshot(snapshot):
+    """Formats a :meth:`BlockProfiler.snapshot` as text."""
+    lines = []
+    for entry in snapshot:
+        lines.append('%s:' % entry['chan'])
+        for role in ('producers', 'consumers'):
+            for waiter in entry[role]:
+                if waiter['seconds'] is None:
+                    parked = 'parked'
+                else:
+                    parked = 'parked %.3fs' % waiter['seconds']
+                lines.append('  %s %s, %s%s' % (
+                    role[:-1], waiter['thread'] or 'coroutine', parked,
+                    ' with a timeout' if waiter['timeout'] else ''))
+                lines.extend('    ' + line for line in waiter['stack'])
+    return '\n'.join(lines) + '\n'
+
+
+def _print_deadlock(snapshot):
+    sys.stderr.write('chan: deadlock, every watched thread is parked\n' +
+                     format_snapshot(snapshot))
@@ -0,0 +1,184 @@
+import time
+
+from .chan import Chan, BLOCK, _EMPTY
+from .timer import timer_service
+
+
+class RateLimitedChan(Chan):
+    """A buffered channel that releases at most ``rate`` items per second.
+
+    The limit is a token bucket: each item taken from the channel uses up a
+    token, and tokens come back at ``rate`` per second, up to ``burst`` of
+    them.  Items put while the bucket is empty wait in the buffer.  Instead
+    of a sleep per item, the channel keeps one timer on the shared
+    :class:`~chan.timer.TimerService`, due when the next token comes back,
+    and hands the buffered items to waiting consumers when it fires.
+
+    Otherwise it behaves like a :class:`Chan`, with ``put`` blocking once the
+    buffer is full (or applying the ``overflow`` policy), and it can be a
+    case in :func:`chanselect`.  Items still buffered when the channel is
+    closed keep draining at ``rate``.
+
+    .. code-block:: python
+
+        requests = RateLimitedChan(50, burst=10, buflen=1000)
+        for req in requests:  # At most 50 per second, after 10 at once
+            send(req)
+
+    :param rate: Items per second.
+    :param burst: The most items that can be taken at once, after the
+                  channel has been idle.
+    :param buflen: The size of the buffer.  Must be at least 1.
+    :param overflow: What ``put`` does when the buffer is full, as for
+                     :class:`Chan`.
+
+    """
+    __slots__ = ('rate', 'burst', '_tokens', '_stamp', '_service', '_entry')
+
+    def __init__(self, rate, burst=1, buflen=1, overflow=BLOCK, service=None):
+        if rate <= 0 or burst < 1:
+            raise ValueError("RateLimitedChan needs a positive rate and burst")
+        if buflen < 1:
+            raise ValueError("RateLimitedChan needs a buffer")
+        super(RateLimitedChan, self).__init__(buflen, overflow=overflow)
+        self.rate = float(rate)
+        self.burst = burst
+        self._tokens = float(burst)
+        self._stamp = time.monotonic()
+        self._service = service or timer_service()
+        self._entry = None  # The pending timer, if any
+
+    def __repr__(self):
+        return "<RateLimitedChan %g/s 0x%x>" % (self.rate, id(self))
+
+    @property
+    def tokens(self):
+        """The number of items that could be taken right now, as a float.
+        Producers can watch it to slow down before the buffer fills."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def _refill(self):
+        now = time.monotonic()
+        tokens = self._tokens + (now - self._stamp) * self.rate
+        self._tokens = tokens if tokens < self.burst else float(self.burst)
+        self._stamp = now
+
+    def _schedule(self):
+        """
+        Sets the timer for when the next token comes back, unless it's
+        already set.
+
+        Assumes that the Chan is locked.
+        """
+        if self._entry is None:
+            delay = max(1 - self._tokens, 0.0) / self.rate
+            self._entry = self._service.schedule(
+                time.monotonic() + delay, self._release)
+
+    def _deliver(self):
+        """
+        Hands buffered items to waiting consumers, while there are tokens,
+        and closes out the consumers once a closed channel is drained.
+
+        Assumes that the Chan is locked.
+        """
+        waiting = self._waiting_consumers
+        while waiting and not self._buf.empty and self._tokens >= 1:
+            wish = waiting.popleft()
+            if wish.group.claim():
+                wish.fulfill(Chan._get_nowait(self))
+                self._tokens -= 1
+        if self._closed and self._buf.empty:
+            self._close_waiting(waiting)
+
+    def _close_waiting(self, waiting):
+        while waiting:
+            wish = waiting.popleft()
+            if wish.group.claim():
+                wish.fulfill(closed=True)
+
+    def _release(self):
+        """Runs on the timer thread, once a token has come back."""
+        self._lock.acquire()
+        try:
+            self._entry = None
+            self._refill()
+            self._deliver()
+            if self._waiting_consumers and not self._buf.empty:
+                self._schedule()
+        finally:
+            self._lock.release()
+
+    def _get_nowait(self):
+        """
+        Returns a value from the buffer if there's a token for it, or
+        _EMPTY.
+
+        Assumes that the Chan is locked.
+        """
+        self._refill()
+        if self._tokens < 1:
+            self._schedule()
+            return _EMPTY
+        value = Chan._get_nowait(self)
+        if value is not _EMPTY:
+            self._tokens -= 1
+        return value
+
+    def _drained(self):
+        """Assumes that the Chan is locked."""
+        return self._closed and self._buf.empty
+
+    def _get_many_nowait(self, items, max_items):
+        while len(items) < max_items:
+            value = self._get_nowait()
+            if value is _EMPTY:
+                return
+            items.append(value)
+
+    def _put_nowait(self, value):
+        """
+        Gives value to a waiting consumer if there's a token for it, or else
+        to the buffer.  Returns False if neither can take it.
+
+        Assumes that the Chan is locked.
+        """
+        buf = self._buf
+        waiting = self._waiting_consumers
+        if waiting and buf.empty:
+            self._refill()
+            while waiting and self._tokens >= 1:
+                wish = waiting.popleft()
+                if wish.group.claim():
+                    wish.fulfill(value)
+                    self._tokens -= 1
+                    if self._stats is not None:
+                        self._stats.handoff()
+                    return True
+
+        if not buf.full:
+            buf.push(value)
+            if self._stats is not None:
+                self._stats.buffered_put(1, len(buf))
+            if self._sampled:
+                self._sampled = 0
+            if waiting:
+                self._schedule()
+            return True
+        if self._overflow is not BLOCK:
+            self._shed(value)
+            return True
+        return False
+
+    def close(self):
+        """Closes the channel, like :meth:`Chan.close`.  Consumers keep
+        getting the buffered items, at ``rate``, before
+        :class:`ChanClosed`."""
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Channel double-closed")
+            self._closed = True
+            self._close_waiting(self._waiting_producers)
+            self._deliver()
@@ -0,0 +1,351 @@
+import collections
+import random
+import threading
+import types
+
+from .chan import ChanClosed, Timeout
+from .chan import WishGroup, Wish, WISH_CONSUME, WISH_PRODUCE
+from .chan import all_locked
+from .chan import _select_locks, _select_nowait, _select_enqueue
+from .chan import _select_missed, _select_withdraw
+from .pool import Task
+from .timer import after
+
+
+class _Op(object):
+    """A channel operation, yielded by a goroutine to the scheduler."""
+    __slots__ = ('consumers', 'producers', 'timeout')
+
+    def result(self, chan, value):
+        return chan, value
+
+    def timed_out(self):
+        raise Timeout()
+
+
+class Get(_Op):
+    """``value = yield Get(chan)`` receives from ``chan``, like
+    :meth:`Chan.get`, with the same ``timeout`` and errors."""
+    __slots__ = ()
+
+    def __init__(self, chan, timeout=None):
+        self.consumers = (chan,)
+        self.producers = ()
+        self.timeout = timeout
+
+    def result(self, chan, value):
+        return value
+
+
+class Put(_Op):
+    """``yield Put(chan, value)`` sends on ``chan``, like :meth:`Chan.put`,
+    with the same ``timeout`` and errors."""
+    __slots__ = ()
+
+    def __init__(self, chan, value, timeout=None):
+        self.consumers = ()
+        self.producers = ((chan, value),)
+        self.timeout = timeout
+
+    def result(self, chan, value):
+        return None
+
+
+class Select(_Op):
+    """``chan, value = yield Select(consumers, producers)`` waits for one
+    case, like :func:`chanselect`, with the same arguments and errors."""
+    __slots__ = ()
+
+    def __init__(self, consumers, producers, timeout=None):
+        self.consumers = consumers
+        self.producers = producers
+        self.timeout = timeout
+
+
+class Sleep(_Op):
+    """``yield Sleep(seconds)`` pauses the goroutine, without holding up its
+    thread."""
+    __slots__ = ()
+
+    def __init__(self, seconds):
+        self.consumers = ()
+        self.producers = ()
+        self.timeout = seconds
+
+    def timed_out(self):
+        return None
+
+
+class _GoroutineWishGroup(WishGroup):
+    """A WishGroup whose waiter is a parked goroutine.
+
+    Waking it puts the goroutine back on its scheduler's run queue.
+    """
+    __slots__ = ('scheduler', 'goroutine', 'op', 'locks', 'timer')
+
+    def __init__(self, scheduler, goroutine, op):
+        self.fulfilled_by = None
+        self._claim = threading.Lock()
+        self.wishes = []
+        self.scheduler = scheduler
+        self.goroutine = goroutine
+        self.op = op
+        self.locks = None
+        self.timer = None
+
+    def wake(self):
+        self.scheduler._ready(self.goroutine)
+
+
+class Goroutine(Task):
+    """A generator running on a :class:`Scheduler`, returned by
+    :meth:`Scheduler.spawn`.
+
+    Like a :class:`Task`, its :attr:`done` channel is closed when it
+    finishes, and :meth:`result` returns what the generator returned.
+    """
+    __slots__ = ('_gen', '_group')
+
+    def __init__(self, gen):
+        super(Goroutine, self).__init__(None, None, None)
+        self._gen = gen
+        self._group = None  # While parked
+
+    def __repr__(self):
+        return "<Goroutine %s 0x%x>" % (
+            getattr(self._gen, '__name__', '?'), id(self))
+
+    def _finish(self, result, exception):
+        self._gen = None
+        self._result = result
+        self._exception = exception
+        self.done.close()
+
+
+class Scheduler(object):
+    """Runs very many goroutines on a few threads.
+
+    Goroutines are generators that ``yield`` a :class:`Get`, :class:`Put`,
+    :class:`Select`, or :class:`Sleep` wherever a thread would block.  The
+    scheduler carries out the operation, and if it can't go ahead yet,
+    parks the goroutine and runs another one on the thread instead.  A
+    parked goroutine costs only its generator and a wait entry, so hundreds
+    of thousands of them can be waiting at once.
+
+    .. code-block:: python
+
+        def player(name, table):
+            while True:
+                ball = yield Get(table)
+                ball.hits += 1
+                yield Sleep(0.1)
+                yield Put(table, ball)
+
+        sched = Scheduler()
+        sched.spawn(player, 'ping', table)
+        sched.spawn(player, 'pong', table)
+
+    The operations work on any :class:`Chan`, and threads may use the same
+    channels with the usual blocking calls: a thread's ``put`` wakes a
+    goroutine waiting in :class:`Get`, and the other way around.  A
+    goroutine that calls a blocking method directly blocks its whole
+    thread, though.
+
+    :param threads: The number of threads that run goroutines.
+
+    """
+    def __init__(self, threads=1):
+        if threads < 1:
+            raise ValueError("A Scheduler needs at least one thread")
+        self._nthreads = threads
+        self._cond = threading.Condition()
+        self._runq = collections.deque()
+        self._threads = []
+        self._live = 0
+        self._stopping = False
+
+    def __repr__(self):
+        return "<Scheduler 0x%x>" % id(self)
+
+    def spawn(self, fn, *args, **kwargs):
+        """Starts the goroutine ``fn(*args, **kwargs)``.
+
+        :param fn: A generator function.
+        :returns: A :class:`Goroutine`.
+        """
+        gen = fn(*args, **kwargs)
+        if not isinstance(gen, types.GeneratorType):
+            raise TypeError("%r is not a generator function" % fn)
+        g = Goroutine(gen)
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("Scheduler is shut down")
+            if not self._threads:
+                for i in range(self._nthreads):
+                    th = threading.Thread(name='chan-sched-%d' % i,
+                                          target=self._work)
+                    th.daemon = True
+                    self._threads.append(th)
+                    th.start()
+            self._live += 1
+            self._runq.append(g)
+            self._cond.notify()
+        return g
+
+    @property
+    def live(self):
+        """The number of goroutines that haven't finished."""
+        with self._cond:
+            return self._live
+
+    def wait(self, timeout=None):
+        """Waits until every goroutine has finished.
+
+        Returns False if ``timeout`` seconds pass first.
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: not self._live, timeout)
+
+    def shutdown(self):
+        """Stops the scheduler's threads once no goroutines are runnable.
+
+        Goroutines that are still parked never run again.
+        """
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+            threads = self._threads
+        for th in threads:
+            if th is not threading.current_thread():
+                th.join()
+
+    def _ready(self, g):
+        with self._cond:
+            self._runq.append(g)
+            self._cond.notify()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._runq:
+                    if self._stopping:
+                        return
+                    self._cond.wait()
+                g = self._runq.popleft()
+            self._run(g)
+
+    def _run(self, g):
+        """Steps g until it parks or finishes."""
+        value = exc = None
+        if g._group is not None:
+            try:
+                value = self._resume(g)
+            except Exception as ex:
+                exc = ex
+
+        while True:
+            try:
+                if exc is None:
+                    op = g._gen.send(value)
+                else:
+                    op = g._gen.throw(exc)
+            except StopIteration as ex:
+                self._finished(g, ex.value, None)
+                return
+            except BaseException as ex:
+                self._finished(g, None, ex)
+                return
+
+            value = exc = None
+            try:
+                parked, value = self._start(g, op)
+            except Exception as ex:
+                exc = ex
+                continue
+            if parked:
+                return
+
+    def _start(self, g, op):
+        """
+        Carries out op for g if it can go ahead, or parks g.  Returns
+        (parked, value for g).
+        """
+        if not isinstance(op, _Op):
+            raise TypeError(
+                "Goroutines must yield Get, Put, Select, or Sleep, not %r" %
+                (op,))
+        group = _GoroutineWishGroup(self, g, op)
+        for chan in op.consumers:
+            Wish(group, WISH_CONSUME, chan)
+        for chan, value in op.producers:
+            Wish(group, WISH_PRODUCE, chan, value)
+        if op.timeout is not None and op.timeout > 0:
+            group.timer = after(op.timeout)
+            Wish(group, WISH_CONSUME, group.timer)
+
+        wishes = group.wishes
+        if len(wishes) == 1:
+            group.locks = (wishes[0].chan._lock,)
+        else:
+            # Makes all cases fair
+            random.shuffle(wishes)
+            group.locks = _select_locks(wishes)
+
+        # Locks without all_locked, whose generator costs more than the rest
+        # of a one-case operation.
+        for lock in group.locks:
+            lock.acquire()
+        try:
+            wish, value = _select_nowait(wishes)
+            parked = wish is None and (op.timeout is None or op.timeout > 0)
+            while parked:
+                _select_enqueue(wishes)
+                if not _select_missed(wishes):
+                    break
+                _select_withdraw(wishes)
+                wish, value = _select_nowait(wishes)
+                parked = wish is None
+            if parked:
+                # Fulfillment needs one of the locks held here, so g can't
+                # be woken before it's parked.
+                g._group = group
+        except ChanClosed:
+            if group.timer is not None:
+                group.timer.stop()
+            raise
+        finally:
+            for lock in group.locks:
+                lock.release()
+        if parked:
+            return True, None
+
+        if group.timer is not None:
+            group.timer.stop()
+        if wish is None or wish.chan is group.timer:
+            return False, op.timed_out()
+        return False, op.result(wish.chan, value)
+
+    def _resume(self, g):
+        """Finishes the operation g was parked on.  Returns the value for g,
+        or raises the error for it."""
+        group = g._group
+        g._group = None
+        if len(group.wishes) > 1:
+            with all_locked(group.locks):
+                _select_withdraw(group.wishes)
+        if group.timer is not None:
+            group.timer.stop()
+
+        wish = group.fulfilled_by
+        if wish.chan is group.timer:
+            return group.op.timed_out()
+        if wish.closed:
+            raise ChanClosed(which=wish.chan)
+        return group.op.result(wish.chan, wish.value)
+
+    def _finished(self, g, result, exception):
+        g._finish(result, exception)
+        with self._cond:
+            self._live -= 1
+            if not self._live:
+                self._cond.notify_all()
@@ -0,0 +1,367 @@
+import ctypes
+import errno
+import multiprocessing
+import os
+import pickle
+import platform
+import struct
+import sys
+import tempfile
+import threading
+import time
+from multiprocessing import resource_tracker
+from multiprocessing import shared_memory
+
+try:
+    import fcntl
+except ImportError:  # Not POSIX
+    fcntl = None
+
+from .chan import ChanClosed, Timeout
+
+
+# Header layout.  The futex words must be 4-byte aligned.
+_MAGIC = b'PYCHSHM1'
+_HEADER = struct.Struct('<8sIIQQIIIII')
+_HEADER_SIZE = 64
+_OFF_HEAD = 16
+_OFF_TAIL = 24
+_OFF_CLOSED = 32
+_OFF_NONEMPTY_SEQ = 36
+_OFF_NONFULL_SEQ = 40
+_OFF_WAITING_CONSUMERS = 44
+_OFF_WAITING_PRODUCERS = 48
+
+# Each slot starts with the payload length and kind.
+_SLOT_HEADER = struct.Struct('<IB')
+_SLOT_HEADER_SIZE = 8
+
+_KIND_BYTES = 0
+_KIND_PICKLE = 1
+
+_U32 = struct.Struct('<I')
+_U64 = struct.Struct('<Q')
+
+
+class _Futex(object):
+    """futex(2) wait and wake on words inside a shared mapping (Linux only)."""
+    SYSCALL_NUMBERS = {'x86_64': 202, 'amd64': 202, 'aarch64': 98,
+                       'arm64': 98, 'i386': 240, 'i686': 240}
+    FUTEX_WAIT = 0
+    FUTEX_WAKE = 1
+
+    class timespec(ctypes.Structure):
+        _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+    def __init__(self):
+        nr = self.SYSCALL_NUMBERS.get(platform.machine().lower())
+        if not sys.platform.startswith('linux') or nr is None:
+            raise OSError("futex is not available")
+        self._nr = nr
+        self._syscall = ctypes.CDLL(None, use_errno=True).syscall
+        self._syscall.restype = ctypes.c_long
+
+    def wait(self, addr, expected, timeout):
+        """Sleeps while the word at addr holds expected, up to timeout."""
+        ts = None
+        if timeout is not None:
+            ts = self.timespec(int(timeout), int((timeout % 1) * 1e9))
+            ts = ctypes.byref(ts)
+        self._syscall(ctypes.c_long(self._nr), ctypes.c_void_p(addr),
+                      ctypes.c_int(self.FUTEX_WAIT), ctypes.c_uint(expected),
+                      ts, None, ctypes.c_int(0))
+
+    def wake(self, addr, n):
+        self._syscall(ctypes.c_long(self._nr), ctypes.c_void_p(addr),
+                      ctypes.c_int(self.FUTEX_WAKE), ctypes.c_int(n),
+                      None, None, ctypes.c_int(0))
+
+
+try:
+    _futex = _Futex()
+except OSError:
+    _futex = None
+
+
+def _attach(name):
+    """
+    Attaches to an existing shared memory segment, without letting this
+    process's resource tracker unlink it at exit.  Returns the SharedMemory,
+    and whether it had to be unregistered from the tracker.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False), False
+    except TypeError:  # Before Python 3.13
+        shm = shared_memory.SharedMemory(name=name)
+        # Children of a multiprocessing parent share its tracker, which
+        # already knows about any segment the parent's tree created.
+        if multiprocessing.parent_process() is not None:
+            return shm, False
+        resource_tracker.unregister(shm._name, 'shared_memory')
+        return shm, True
+
+
+def _lock_path(name):
+    return os.path.join(tempfile.gettempdir(), 'pychan-%s.lock' % name)
+
+
+class ShmChan(object):
+    """A channel between processes, backed by shared memory.
+
+    Values are stored in a ring of fixed-size slots in a
+    :mod:`multiprocessing.shared_memory` segment.  ``bytes``-like values are
+    copied in as they are, and anything else is pickled.  Processes that
+    didn't create the channel, and aren't related to the one that did, attach
+    to it by name.
+
+    Blocked ``put`` and ``get`` calls sleep on futexes in the shared segment
+    on Linux, and poll with backoff elsewhere.  Mutual exclusion between
+    processes uses ``flock`` on a lock file, so :class:`ShmChan` needs a
+    POSIX system.
+
+    :param name: The name of the shared memory segment.  Defaults to a random
+                 name when creating the channel.
+    :param nslots: The number of values the ring holds.  Ignored when
+                   attaching.
+    :param slot_size: The largest payload, in bytes, that fits in a slot.
+                      Ignored when attaching.
+    :param create: True to create a new channel, False to attach to an
+                   existing one.
+
+    """
+    def __init__(self, name=None, nslots=1024, slot_size=4096, create=True):
+        if fcntl is None:
+            raise OSError("ShmChan needs a POSIX system")
+
+        self._untracked = False
+        if create:
+            stride = _SLOT_HEADER_SIZE + (slot_size + 7) // 8 * 8
+            self._shm = shared_memory.SharedMemory(
+                name=name, create=True, size=_HEADER_SIZE + stride * nslots)
+            _HEADER.pack_into(self._shm.buf, 0, _MAGIC, slot_size, nslots,
+                              0, 0, 0, 0, 0, 0, 0)
+        else:
+            self._shm, self._untracked = _attach(name)
+            magic, slot_size, nslots = _HEADER.unpack_from(
+                self._shm.buf, 0)[:3]
+            if magic != _MAGIC:
+                self._shm.close()
+                raise ValueError("%r is not a ShmChan" % name)
+            stride = _SLOT_HEADER_SIZE + (slot_size + 7) // 8 * 8
+
+        self.name = self._shm.name
+        self.slot_size = slot_size
+        self.nslots = nslots
+        self._stride = stride
+        self._buf = self._shm.buf
+
+        # flock excludes other processes, but not other threads sharing the
+        # same open file, so threads also take a regular lock.
+        self._thread_lock = threading.Lock()
+        self._lockfd = os.open(_lock_path(self.name), os.O_RDWR | os.O_CREAT,
+                               0o600)
+
+        # Where the segment is mapped, for futex calls.  The mapping stays put
+        # until detach().
+        self._base = ctypes.addressof(ctypes.c_char.from_buffer(self._buf))
+
+    @classmethod
+    def attach(cls, name):
+        """Attaches to an existing :class:`ShmChan` by name."""
+        return cls(name, create=False)
+
+    def __repr__(self):
+        return "<ShmChan %r>" % self.name
+
+    def _acquire(self):
+        self._thread_lock.acquire()
+        fcntl.flock(self._lockfd, fcntl.LOCK_EX)
+
+    def _release(self):
+        fcntl.flock(self._lockfd, fcntl.LOCK_UN)
+        self._thread_lock.release()
+
+    def _u32(self, offset):
+        return _U32.unpack_from(self._buf, offset)[0]
+
+    def _set_u32(self, offset, value):
+        _U32.pack_into(self._buf, offset, value & 0xffffffff)
+
+    def _u64(self, offset):
+        return _U64.unpack_from(self._buf, offset)[0]
+
+    def _set_u64(self, offset, value):
+        _U64.pack_into(self._buf, offset, value)
+
+    def _signal(self, seq_offset, waiting_offset, n):
+        """Bumps a sequence word and wakes n of its waiters.  Locked."""
+        self._set_u32(seq_offset, self._u32(seq_offset) + 1)
+        if _futex is not None and self._u32(waiting_offset):
+            _futex.wake(self._base + seq_offset, n)
+
+    def _wait(self, seq_offset, waiting_offset, seq, deadline, delay):
+        """
+        Sleeps until the sequence word moves past seq, or a while passes.
+
+        Called locked, returns locked.  Returns the next polling delay.
+        """
+        self._set_u32(waiting_offset, self._u32(waiting_offset) + 1)
+        self._release()
+        try:
+            timeout = None
+            if deadline is not None:
+                timeout = max(0.0, deadline - time.time())
+            if _futex is not None:
+                _futex.wait(self._base + seq_offset, seq, timeout)
+            else:
+                if timeout is not None:
+                    delay = min(delay, timeout)
+                time.sleep(delay)
+                delay = min(delay * 2, 0.001)
+        finally:
+            self._acquire()
+            self._set_u32(waiting_offset, self._u32(waiting_offset) - 1)
+        return delay
+
+    def put(self, value, timeout=None):
+        """Places an item onto the channel.
+
+        Behaves like :meth:`Chan.put`.  ``bytes``, ``bytearray``, and
+        ``memoryview`` values are sent as raw bytes, and anything else is
+        pickled.
+
+        :raises: :class:`ValueError` If the value doesn't fit in a slot.
+        """
+        if isinstance(value, (bytes, bytearray, memoryview)):
+            kind, payload = _KIND_BYTES, value
+        else:
+            kind, payload = _KIND_PICKLE, pickle.dumps(
+                value, pickle.HIGHEST_PROTOCOL)
+        if len(payload) > self.slot_size:
+            raise ValueError("%d byte payload doesn't fit in %d byte slots" %
+                             (len(payload), self.slot_size))
+
+        deadline = None
+        if timeout is not None:
+            deadline = time.time() + timeout
+        delay = 0.00005
+
+        self._acquire()
+        try:
+            while True:
+                if self._u32(_OFF_CLOSED):
+                    raise ChanClosed(which=self)
+                head = self._u64(_OFF_HEAD)
+                tail = self._u64(_OFF_TAIL)
+                if tail - head < self.nslots:
+                    break
+                if deadline is not None and time.time() >= deadline:
+                    raise Timeout()
+                delay = self._wait(_OFF_NONFULL_SEQ, _OFF_WAITING_PRODUCERS,
+                                   self._u32(_OFF_NONFULL_SEQ), deadline,
+                                   delay)
+
+            offset = _HEADER_SIZE + (tail % self.nslots) * self._stride
+            _SLOT_HEADER.pack_into(self._buf, offset, len(payload), kind)
+            start = offset + _SLOT_HEADER_SIZE
+            self._buf[start:start + len(payload)] = payload
+            self._set_u64(_OFF_TAIL, tail + 1)
+            self._signal(_OFF_NONEMPTY_SEQ, _OFF_WAITING_CONSUMERS, 1)
+        finally:
+            self._release()
+
+    def get(self, timeout=None):
+        """Returns an item that was ``put`` onto the channel.
+
+        Behaves like :meth:`Chan.get`.  Raw bytes come back as ``bytes``.
+        """
+        deadline = None
+        if timeout is not None:
+            deadline = time.time() + timeout
+        delay = 0.00005
+
+        self._acquire()
+        try:
+            while True:
+                head = self._u64(_OFF_HEAD)
+                if head < self._u64(_OFF_TAIL):
+                    break
+                if self._u32(_OFF_CLOSED):
+                    raise ChanClosed(which=self)
+                if deadline is not None and time.time() >= deadline:
+                    raise Timeout()
+                delay = self._wait(_OFF_NONEMPTY_SEQ, _OFF_WAITING_CONSUMERS,
+                                   self._u32(_OFF_NONEMPTY_SEQ), deadline,
+                                   delay)
+
+            offset = _HEADER_SIZE + (head % self.nslots) * self._stride
+            length, kind = _SLOT_HEADER.unpack_from(self._buf, offset)
+            start = offset + _SLOT_HEADER_SIZE
+            payload = bytes(self._buf[start:start + length])
+            self._set_u64(_OFF_HEAD, head + 1)
+            self._signal(_OFF_NONFULL_SEQ, _OFF_WAITING_PRODUCERS, 1)
+        finally:
+            self._release()
+
+        if kind == _KIND_PICKLE:
+            return pickle.loads(payload)
+        return payload
+
+    def close(self):
+        """Closes the channel, in every attached process.
+
+        Behaves like :meth:`Chan.close`: no further ``put`` operations are
+        allowed, and ``get`` raises :class:`ChanClosed` once the ring is
+        drained.
+        """
+        self._acquire()
+        try:
+            if self._u32(_OFF_CLOSED):
+                raise RuntimeError("Channel double-closed")
+            self._set_u32(_OFF_CLOSED, 1)
+            self._signal(_OFF_NONEMPTY_SEQ, _OFF_WAITING_CONSUMERS, 0x7fffffff)
+            self._signal(_OFF_NONFULL_SEQ, _OFF_WAITING_PRODUCERS, 0x7fffffff)
+        finally:
+            self._release()
+
+    @property
+    def closed(self):
+        """Returns True if the channel is closed and drained."""
+        self._acquire()
+        try:
+            return bool(self._u32(_OFF_CLOSED) and
+                        self._u64(_OFF_HEAD) == self._u64(_OFF_TAIL))
+        finally:
+            self._release()
+
+    def detach(self):
+        """Unmaps the channel from this process, without closing it."""
+        if self._buf is None:
+            return
+        self._buf = None
+        self._shm.close()
+        os.close(self._lockfd)
+
+    def unlink(self):
+        """Destroys the channel's shared memory.  Call once, from any
+        process, after every process is done with it."""
+        try:
+            os.unlink(_lock_path(self.name))
+        except OSError as ex:
+            if ex.errno != errno.ENOENT:
+                raise
+        if self._untracked:
+            # SharedMemory.unlink also unregisters the segment.
+            resource_tracker.register(self._shm._name, 'shared_memory')
+        self._shm.unlink()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return self.get()
+        except ChanClosed:
+            raise StopIteration
+
+    next = __next__
@@ -0,0 +1,290 @@
+import threading
+import time
+
+from .chan import ChanClosed, Timeout
+from .chan import WaitQueue, WISH_CONSUME, WISH_PRODUCE
+from .chan import _wait_fulfilled, _thread_wish, _finish_wish, _EMPTY
+
+
+class SPSCChan(object):
+    """A channel for exactly one producer thread and one consumer thread.
+
+    :class:`SPSCChan` has the same ``put``/``get``/``close`` surface as
+    :class:`Chan`, and can be used in :func:`chanselect`, but is much cheaper
+    when a channel only ever has one sender and one receiver.  Values live in
+    a preallocated ring, where the producer only moves the tail and the
+    consumer only moves the head, so neither side takes a lock unless the
+    other side has to be woken up.
+
+    Using an :class:`SPSCChan` from more than one producer thread or more than
+    one consumer thread at a time loses values.
+
+    :param buflen: The size of the ring.  Must be at least 1.
+
+    """
+    __slots__ = ('_ring', '_cap', '_head', '_tail', '_closed', '_lock',
+                 '_waiting_producers', '_waiting_consumers', '__weakref__')
+
+    # The fast paths don't take the lock.  See _select_missed.
+    _lock_free = True
+
+    def __init__(self, buflen):
+        if buflen < 1:
+            raise ValueError("SPSCChan needs a buffer")
+        self._ring = [None] * buflen
+        self._cap = buflen
+        self._head = 0  # Only moved by the consumer
+        self._tail = 0  # Only moved by the producer
+        self._closed = False
+
+        # The lock is only needed for parking, waking, and chanselect.
+        self._lock = threading.Lock()
+        self._waiting_producers = WaitQueue()
+        self._waiting_consumers = WaitQueue()
+
+    def __repr__(self):
+        return "<SPSCChan 0x%x>" % id(self)
+
+    def _pop(self):
+        head = self._head
+        i = head % self._cap
+        value = self._ring[i]
+        self._ring[i] = None  # Safety
+        self._head = head + 1
+        return value
+
+    def _push(self, value):
+        tail = self._tail
+        self._ring[tail % self._cap] = value
+        self._tail = tail + 1
+
+    def _wake_consumer(self):
+        """
+        Hands a value to a blocked consumer, if there is one.
+
+        Assumes that the SPSCChan is locked.  A consumer with a waiting wish
+        isn't touching the ring, so the head can be moved from here.
+        """
+        while self._waiting_consumers and self._head != self._tail:
+            wish = self._waiting_consumers.popleft()
+            if wish.group.claim():
+                wish.fulfill(self._pop())
+                return
+
+    def _wake_producer(self):
+        """
+        Moves a blocked producer's value onto the ring, if there is one.
+
+        Assumes that the SPSCChan is locked.
+        """
+        while (self._waiting_producers and
+               self._tail - self._head < self._cap):
+            wish = self._waiting_producers.popleft()
+            if wish.group.claim():
+                self._push(wish.fulfill())
+                return
+
+    def _get_nowait(self):
+        """
+        Returns a value from the ring, or _EMPTY
+
+        Assumes that the SPSCChan is locked.
+        """
+        if self._head == self._tail:
+            return _EMPTY
+        value = self._pop()
+        self._wake_producer()
+        return value
+
+    def _drained(self):
+        """Assumes that the SPSCChan is locked."""
+        return self._closed and self._head == self._tail
+
+    def _get_ready(self):
+        """Assumes that the SPSCChan is locked."""
+        return self._closed or self._head != self._tail
+
+    def _put_ready(self):
+        """Assumes that the SPSCChan is locked."""
+        return self._closed or self._tail - self._head < self._cap
+
+    def _put_nowait(self, value):
+        """
+        Pushes value onto the ring.  Returns False if the ring is full.
+
+        Assumes that the SPSCChan is locked.
+        """
+        if self._tail - self._head == self._cap:
+            return False
+        self._push(value)
+        self._wake_consumer()
+        return True
+
+    def _wait(self, wish, waiting, timeout, timeout_deadline):
+        if not _wait_fulfilled(wish.group, timeout, timeout_deadline):
+            with self._lock:
+                waiting.discard(wish)
+            if not wish.group.fulfilled:
+                _finish_wish(wish)
+                raise Timeout()
+        return _finish_wish(wish)
+
+    def get(self, timeout=None):
+        """Returns an item that was ``put`` onto the channel.
+
+        Behaves like :meth:`Chan.get`.
+        """
+        # Fast path: only the consumer moves the head, and a stale tail just
+        # sends us down the slow path.
+        if self._head != self._tail:
+            value = self._pop()
+            if self._waiting_producers:
+                # Locks without ``with``, which allocates on every use.
+                self._lock.acquire()
+                try:
+                    self._wake_producer()
+                finally:
+                    self._lock.release()
+            return value
+
+        timeout_deadline = None
+        if timeout is not None:
+            timeout_deadline = time.time() + timeout
+
+        self._lock.acquire()
+        try:
+            # Parks before checking the ring one last time, so a producer
+            # either sees the wish or its value is seen here.
+            wish = _thread_wish(WISH_CONSUME, self)
+            self._waiting_consumers.append(wish)
+
+            if self._head != self._tail:
+                self._waiting_consumers.discard(wish)
+                _finish_wish(wish)
+                return self._get_nowait()
+            if self._closed:
+                self._waiting_consumers.discard(wish)
+                _finish_wish(wish)
+                raise ChanClosed(which=self)
+            if timeout is not None and timeout <= 0:
+                self._waiting_consumers.discard(wish)
+                _finish_wish(wish)
+                raise Timeout()
+        finally:
+            self._lock.release()
+
+        return self._wait(wish, self._waiting_consumers,
+                          timeout, timeout_deadline)
+
+    def put(self, value, timeout=None):
+        """Places an item onto the channel.
+
+        Behaves like :meth:`Chan.put`.
+        """
+        if self._closed:
+            raise ChanClosed(which=self)
+
+        # Fast path: only the producer moves the tail, and a stale head just
+        # sends us down the slow path.
+        if self._tail - self._head < self._cap:
+            self._push(value)
+            if self._waiting_consumers:
+                self._lock.acquire()
+                try:
+                    self._wake_consumer()
+                finally:
+                    self._lock.release()
+            return
+
+        timeout_deadline = None
+        if timeout is not None:
+            timeout_deadline = time.time() + timeout
+
+        self._lock.acquire()
+        try:
+            wish = _thread_wish(WISH_PRODUCE, self, value)
+            self._waiting_producers.append(wish)
+
+            if self._tail - self._head < self._cap:
+                self._waiting_producers.discard(wish)
+                _finish_wish(wish)
+                self._put_nowait(value)
+                return
+            if timeout is not None and timeout <= 0:
+                self._waiting_producers.discard(wish)
+                _finish_wish(wish)
+                raise Timeout()
+        finally:
+            self._lock.release()
+
+        self._wait(wish, self._waiting_producers,
+                   timeout, timeout_deadline)
+
+    def try_get(self, default=None):
+        """Returns an item if one is ready, or ``default`` if not.
+
+        Behaves like :meth:`Chan.try_get`.
+        """
+        if self._head == self._tail:
+            # Checks the ring again, for a put just before the close.
+            if self._closed and self._head == self._tail:
+                raise ChanClosed(which=self)
+            return default
+        value = self._pop()
+        if self._waiting_producers:
+            self._lock.acquire()
+            try:
+                self._wake_producer()
+            finally:
+                self._lock.release()
+        return value
+
+    def try_put(self, value):
+        """Places an item onto the channel if there's room.
+
+        Behaves like :meth:`Chan.try_put`.
+        """
+        if self._closed:
+            raise ChanClosed(which=self)
+        if self._tail - self._head == self._cap:
+            return False
+        self._push(value)
+        if self._waiting_consumers:
+            self._lock.acquire()
+            try:
+                self._wake_consumer()
+            finally:
+                self._lock.release()
+        return True
+
+    def close(self):
+        """Closes the channel, allowing no further ``put`` operations.
+
+        Behaves like :meth:`Chan.close`.
+        """
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Channel double-closed")
+            self._closed = True
+
+            for waiting in (self._waiting_producers, self._waiting_consumers):
+                while waiting:
+                    wish = waiting.popleft()
+                    if wish.group.claim():
+                        wish.fulfill(closed=True)
+
+    @property
+    def closed(self):
+        """Returns True if the channel is closed and drained."""
+        return self._closed and self._head == self._tail
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            return self.get()
+        except ChanClosed:
+            raise StopIteration
+
+    next = __next__
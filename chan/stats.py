@@ -0,0 +1,126 @@
+import threading
+import weakref
+
+
+class ChanStats(object):
+    """Counters for one channel, kept once :meth:`Chan.enable_stats` is
+    called.
+
+    Counters are only updated with the channel locked.  Read them through
+    :meth:`Chan.stats`, which also fills in the channel's current queue
+    depths.
+    """
+    __slots__ = ('name', 'puts', 'gets', 'handoffs', 'buffered',
+                 'put_blocked_seconds', 'get_blocked_seconds',
+                 'buffer_high_water', 'timeouts', 'dropped')
+
+    def __init__(self, name):
+        self.name = name
+        self.puts = 0
+        self.gets = 0
+        self.handoffs = 0  # Values passed straight from thread to thread
+        self.buffered = 0  # Values that went through the buffer
+        self.put_blocked_seconds = 0.0
+        self.get_blocked_seconds = 0.0
+        self.buffer_high_water = 0
+        self.timeouts = 0
+        self.dropped = 0  # Discarded by the overflow policy
+
+    def handoff(self):
+        self.puts += 1
+        self.gets += 1
+        self.handoffs += 1
+
+    def buffered_put(self, n, buffer_len):
+        self.puts += n
+        self.buffered += n
+        if buffer_len > self.buffer_high_water:
+            self.buffer_high_water = buffer_len
+
+    def buffered_get(self, n):
+        self.gets += n
+
+    def blocked(self, producing, seconds, timed_out):
+        if producing:
+            self.put_blocked_seconds += seconds
+        else:
+            self.get_blocked_seconds += seconds
+        if timed_out:
+            self.timeouts += 1
+
+    def snapshot(self):
+        """Returns the counters as a dict."""
+        return dict((name, getattr(self, name)) for name in self.__slots__)
+
+
+_registry = weakref.WeakSet()
+_registry_lock = threading.Lock()
+
+
+def register(chan):
+    """Adds chan to the channels listed by :func:`live_chans`."""
+    with _registry_lock:
+        _registry.add(chan)
+
+
+def live_chans():
+    """Returns every live channel that has stats enabled."""
+    with _registry_lock:
+        return list(_registry)
+
+
+# (metric, OpenMetrics type, snapshot key, help text)
+_METRICS = [
+    ('chan_puts', 'counter', 'puts', 'Values put onto the channel.'),
+    ('chan_gets', 'counter', 'gets', 'Values taken from the channel.'),
+    ('chan_handoffs', 'counter', 'handoffs',
+     'Values passed directly between threads.'),
+    ('chan_buffered', 'counter', 'buffered',
+     'Values that went through the buffer.'),
+    ('chan_put_blocked_seconds', 'counter', 'put_blocked_seconds',
+     'Time producers spent blocked.'),
+    ('chan_get_blocked_seconds', 'counter', 'get_blocked_seconds',
+     'Time consumers spent blocked.'),
+    ('chan_timeouts', 'counter', 'timeouts', 'Puts and gets that timed out.'),
+    ('chan_dropped', 'counter', 'dropped',
+     'Values discarded by the overflow policy.'),
+    ('chan_buffer_high_water', 'gauge', 'buffer_high_water',
+     'Most values ever held in the buffer.'),
+    ('chan_buffer_len', 'gauge', 'buffer_len', 'Values in the buffer.'),
+    ('chan_waiting_producers', 'gauge', 'waiting_producers',
+     'Producers waiting on the channel.'),
+    ('chan_waiting_consumers', 'gauge', 'waiting_consumers',
+     'Consumers waiting on the channel.'),
+]
+
+
+def _label(value):
+    return (value.replace('\\', '\\\\').replace('"', '\\"')
+            .replace('\n', '\\n'))
+
+
+def openmetrics(chans=None):
+    """Returns the stats of every live channel, in the OpenMetrics text
+    format.
+
+    :param chans: The channels to include.  Defaults to :func:`live_chans`.
+    """
+    if chans is None:
+        chans = live_chans()
+    snapshots = []
+    for chan in chans:
+        snap = chan.stats()
+        if snap is not None:
+            snapshots.append(snap)
+    snapshots.sort(key=lambda snap: snap['name'])
+
+    lines = []
+    for metric, kind, key, help_text in _METRICS:
+        lines.append('# TYPE %s %s' % (metric, kind))
+        lines.append('# HELP %s %s' % (metric, help_text))
+        sample = metric + '_total' if kind == 'counter' else metric
+        for snap in snapshots:
+            lines.append('%s{chan="%s"} %s' % (
+                sample, _label(snap['name']), snap[key]))
+    lines.append('# EOF')
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,198 @@
+import functools
+import heapq
+import itertools
+import threading
+import time
+import traceback
+
+from .chan import Chan, ChanClosed
+
+
+class _Entry(object):
+    __slots__ = ('callback', 'cancelled')
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.cancelled = False
+
+
+class TimerService(object):
+    """Runs every timer in the process from one background thread.
+
+    Timers live in a heap ordered by deadline, and the service thread sleeps
+    until the earliest one is due.  Cancelled timers are dropped lazily, and
+    the heap is rebuilt once most of it is cancelled.
+
+    Callbacks run on the service thread, so they must not block.  An
+    exception from a callback is printed, and the other timers keep running.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._changed = threading.Condition(self._lock)
+        self._heap = []
+        self._seq = itertools.count()  # Breaks ties between equal deadlines
+        self._cancelled = 0
+        self._thread = None
+
+    def schedule(self, deadline, callback):
+        """Calls ``callback()`` at ``deadline``, on the ``time.monotonic``
+        clock.  Returns a handle for :meth:`cancel`."""
+        entry = _Entry(callback)
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    name='chan-timers', target=self._run)
+                self._thread.daemon = True
+                self._thread.start()
+            heapq.heappush(self._heap, (deadline, next(self._seq), entry))
+            # Only the earliest deadline changes how long the thread sleeps.
+            if self._heap[0][2] is entry:
+                self._changed.notify()
+        return entry
+
+    def cancel(self, entry):
+        """Cancels a scheduled callback.  Returns True if it hadn't run."""
+        with self._lock:
+            if entry.cancelled or entry.callback is None:
+                return False
+            entry.cancelled = True
+            self._cancelled += 1
+            if self._cancelled > 64 and self._cancelled * 2 > len(self._heap):
+                self._heap = [item for item in self._heap
+                              if not item[2].cancelled]
+                heapq.heapify(self._heap)
+                self._cancelled = 0
+            return True
+
+    @property
+    def pending(self):
+        """The number of scheduled callbacks that haven't run."""
+        with self._lock:
+            return len(self._heap) - self._cancelled
+
+    def _run(self):
+        while True:
+            due = []
+            with self._lock:
+                while not due:
+                    now = time.monotonic()
+                    while self._heap and (self._heap[0][2].cancelled or
+                                          self._heap[0][0] <= now):
+                        _, _, entry = heapq.heappop(self._heap)
+                        if entry.cancelled:
+                            self._cancelled -= 1
+                        else:
+                            due.append(entry)
+                    if due:
+                        break
+                    if self._heap:
+                        self._changed.wait(self._heap[0][0] - now)
+                    else:
+                        self._changed.wait()
+
+                callbacks = []
+                for entry in due:
+                    callbacks.append(entry.callback)
+                    entry.callback = None  # Marks it as run
+
+            for callback in callbacks:
+                try:
+                    callback()
+                except Exception:
+                    # Keeps the one timer thread alive for every other timer.
+                    traceback.print_exc()
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def timer_service():
+    """Returns the process-wide :class:`TimerService`."""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = TimerService()
+        return _service
+
+
+class TimerChan(Chan):
+    """A channel that receives the time when a timer fires.
+
+    Returned by :func:`after` and :func:`tick`.  It has a buffer of one, so
+    the timer never blocks, and a tick is dropped if the previous one
+    hasn't been received yet.
+    """
+    def __init__(self, service):
+        super(TimerChan, self).__init__(1)
+        self._service = service
+        self._entry = None
+        self._stopped = False
+
+    def _fire(self):
+        try:
+            self.try_put(time.time())
+        except ChanClosed:
+            pass
+
+    def _schedule(self, deadline, callback):
+        self._entry = self._service.schedule(deadline, callback)
+        # stop() may have raced with a tick rescheduling itself.
+        if self._stopped:
+            self._service.cancel(self._entry)
+
+    def stop(self):
+        """Stops the timer.
+
+        Returns True if the timer was stopped before firing.  A ticking
+        timer is always stopped, though this may return False if it was
+        firing at the time.  Values already delivered stay on the channel.
+        """
+        if self._stopped:
+            return False
+        self._stopped = True
+        return self._service.cancel(self._entry)
+
+
+def after(delay, service=None):
+    """Returns a :class:`TimerChan` that receives the time after ``delay``
+    seconds.
+
+    Use it like Go's ``time.After``, for example to time out a
+    :func:`chanselect`:
+
+    .. code-block:: python
+
+        chan, value = chanselect([results, after(1.0)], [])
+
+    Every timer is served by one background thread, so it's fine to have
+    very many of them.  Call :meth:`TimerChan.stop` to cancel the timer.
+    """
+    c = TimerChan(service or timer_service())
+    c._schedule(time.monotonic() + delay, c._fire)
+    return c
+
+
+def tick(interval, service=None):
+    """Returns a :class:`TimerChan` that receives the time every
+    ``interval`` seconds, until :meth:`TimerChan.stop` is called.
+
+    Ticks are scheduled from the previous deadline rather than from when
+    the previous tick ran, so they don't drift.  If the service falls behind
+    by more than an interval, the missed ticks are skipped.
+    """
+    if interval <= 0:
+        raise ValueError("tick interval must be positive")
+    c = TimerChan(service or timer_service())
+
+    def fire(deadline):
+        c._fire()
+        deadline += interval
+        now = time.monotonic()
+        if deadline <= now:
+            deadline += ((now - deadline) // interval + 1) * interval
+        c._schedule(deadline, functools.partial(fire, deadline))
+
+    deadline = time.monotonic() + interval
+    c._schedule(deadline, functools.partial(fire, deadline))
+    return c
@@ -0,0 +1,110 @@
+"""Timelines of channel operations.
+
+A :class:`TraceRecorder` records when each thread put, got, parked, and was
+woken, and writes the timeline out in the Chrome trace event format, which
+both ``chrome://tracing`` and the Perfetto UI (https://ui.perfetto.dev)
+open:
+
+.. code-block:: python
+
+    from chan import TraceRecorder
+
+    with TraceRecorder() as trace:
+        run_pipeline()
+    trace.write_chrome_trace('pipeline.json')
+
+Each thread gets its own track, with a slice for every wait, so the waits
+behind a slow item line up with the ``put`` and ``get`` that ended them.
+
+"""
+import json
+import os
+import threading
+import time
+
+from .chan import set_trace_hook
+
+
+class TraceRecorder(object):
+    """Records channel events, with their threads and monotonic timestamps.
+
+    Each thread appends to a buffer of its own, without locking, so an
+    event costs little more than reading the clock.  The recorder is a hook
+    for :func:`set_trace_hook`, so only one can be recording at a time.  It
+    keeps the channels it has seen alive, to name them in the trace.
+    """
+    def __init__(self):
+        self._local = threading.local()
+        self._threads = []  # (thread id, thread name, events)
+        self._lock = threading.Lock()  # Only taken for a thread's first event
+
+    def __repr__(self):
+        return "<TraceRecorder 0x%x>" % id(self)
+
+    def __call__(self, event, phase, chan):
+        try:
+            events = self._local.events
+        except AttributeError:
+            events = self._new_buffer()
+        events.append((time.monotonic(), event, phase, chan))
+
+    def _new_buffer(self):
+        events = self._local.events = []
+        th = threading.current_thread()
+        with self._lock:
+            self._threads.append((threading.get_native_id(), th.name, events))
+        return events
+
+    def start(self):
+        """Starts recording."""
+        set_trace_hook(self)
+        return self
+
+    def stop(self):
+        """Stops recording.  The events recorded so far are kept."""
+        set_trace_hook(None)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def chrome_trace(self):
+        """Returns the events as a Chrome trace, ready for :func:`json.dump`.
+
+        Times are in microseconds.  Each event's ``args`` name the channel
+        it happened on.
+        """
+        with self._lock:
+            threads = list(self._threads)
+        pid = os.getpid()
+        names = {}
+        trace = []
+        for tid, thread_name, events in threads:
+            trace.append({'name': 'thread_name', 'ph': 'M', 'pid': pid,
+                          'tid': tid, 'args': {'name': thread_name}})
+            for ts, event, phase, chan in events[:]:
+                entry = {'name': event, 'cat': 'chan', 'ph': phase,
+                         'ts': ts * 1e6, 'pid': pid, 'tid': tid}
+                if phase == 'i':
+                    entry['s'] = 't'  # Drawn on the thread's track
+                if chan is not None:
+                    if chan not in names:
+                        names[chan] = _chan_name(chan)
+                    entry['args'] = {'chan': names[chan]}
+                trace.append(entry)
+        return {'traceEvents': trace, 'displayTimeUnit': 'ns'}
+
+    def write_chrome_trace(self, path):
+        """Writes the events to ``path`` as Chrome trace JSON."""
+        with open(path, 'w') as f:
+            json.dump(self.chrome_trace(), f)
+
+
+def _chan_name(chan):
+    """The stats name of chan, if it has one, or its repr."""
+    stats = getattr(chan, '_stats', None)
+    if stats is not None:
+        return stats.name
+    return repr(chan)
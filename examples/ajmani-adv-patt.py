@@ -10,7 +10,7 @@ import random
 import threading
 import time
 
-from chan import Chan, chanselect, quickthread
+from chan import Chan, after, chanselect, quickthread
 
 
 MOCK_POSTS = [
@@ -35,17 +35,6 @@ class MockFetcher(object):
         return item_list, next_time
 
 
-def timeout_after(delay):
-    def thread(ch):
-        time.sleep(delay)
-        ch.put(None)
-    c = Chan()
-    t = threading.Thread(name='timeout', target=thread, args=(c,))
-    t.daemon = True
-    t.start()
-    return c
-
-
 class Subscription(object):
     def __init__(self, fetcher):
         self.fetcher = fetcher
@@ -63,7 +52,7 @@ class Subscription(object):
         err = None
 
         while True:
-            start_fetch = timeout_after(max(0.0, next_time - time.time()))
+            start_fetch = after(max(0.0, next_time - time.time()))
 
             # Does or doesn't wait on updates_chan depending on if we have
             # items ready.
@@ -73,6 +62,7 @@ class Subscription(object):
                 outchans = []
 
             ch, value = chanselect([self.quit, start_fetch], outchans)
+            start_fetch.stop()
             if ch == self.quit:
                 errc = value
                 self.updates_chan.close()
@@ -165,8 +155,8 @@ def main():
         print("{} -- {}".format(it.channel, it.title))
 
     time.sleep(0.1)
-    print("Still active:         (should only be _MainThread and timeouts)")
-    for active in threading._active.itervalues():
+    print("Still active:     (should only be _MainThread and chan-timers)")
+    for active in threading.enumerate():
         print("    {}".format(active))
 
 if __name__ == '__main__':
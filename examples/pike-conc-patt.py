@@ -5,7 +5,7 @@
 #   http://www.youtube.com/watch?v=f6kdp27TYZs
 #   http://code.google.com/p/go/source/browse/2012/concurrency.slide?repo=talks
 
-from chan import Chan, chanselect, quickthread
+from chan import Chan, after, chanselect, quickthread
 
 from collections import namedtuple
 from collections import OrderedDict
@@ -45,9 +45,9 @@ def example_fan_in():
         return c
 
     c = fan_in(boring("Joe"), boring("Ann"))
-    for i in xrange(10):
-        print c.get()
-    print "You're both boring; I'm leaving."
+    for i in range(10):
+        print(c.get())
+    print("You're both boring; I'm leaving.")
 
 EXAMPLES['fanin'] = example_fan_in
 
@@ -84,12 +84,12 @@ def example_sequence():
         return c
 
     c = fan_in(boring('Joe'), boring('Ann'))
-    for i in xrange(5):
-        msg1 = c.get(); print msg1.string
-        msg2 = c.get(); print msg2.string
+    for i in range(5):
+        msg1 = c.get(); print(msg1.string)
+        msg2 = c.get(); print(msg2.string)
         msg1.wait.put(True)
         msg2.wait.put(True)
-    print "You're all boring; I'm leaving"
+    print("You're all boring; I'm leaving")
 
 EXAMPLES['sequence'] = example_sequence
 
@@ -123,9 +123,9 @@ def example_select():
         return c
 
     c = fan_in(boring("Joe"), boring("Ann"))
-    for i in xrange(10):
-        print c.get()
-    print "You're both boring; I'm leaving."
+    for i in range(10):
+        print(c.get())
+    print("You're both boring; I'm leaving.")
 
 EXAMPLES['select'] = example_select
 
@@ -134,15 +134,6 @@ EXAMPLES['select'] = example_select
 #    Timeout
 #---------------------------------------------------------------------------
 
-def timer(duration):
-    def timer_thread(chan, duration):
-        time.sleep(duration)
-        chan.put(time.time())
-    c = Chan()
-    quickthread(timer_thread, c, duration)
-    return c
-
-
 def example_timeout():
     def boring(msg):
         c = Chan()
@@ -158,11 +149,11 @@ def example_timeout():
 
     c = boring("Joe")
     while True:
-        chan, value = chanselect([c, timer(1.0)], [])
+        chan, value = chanselect([c, after(1.0)], [])
         if chan == c:
-            print value
+            print(value)
         else:
-            print "You're too slow."
+            print("You're too slow.")
             return
 
 EXAMPLES['timeout'] = example_timeout
@@ -190,10 +181,10 @@ def example_rcvquit():
 
     quit = Chan()
     c = boring("Joe", quit)
-    for i in xrange(random.randint(0, 10), 0, -1):
-        print c.get()
+    for i in range(random.randint(0, 10), 0, -1):
+        print(c.get())
     quit.put("Bye!")
-    print "Joe says:", quit.get()
+    print("Joe says:", quit.get())
 
 EXAMPLES['rcvquit'] = example_rcvquit
 
@@ -210,7 +201,7 @@ def example_daisy():
     leftmost = Chan()
     rightmost = leftmost
     left = leftmost
-    for i in xrange(N):
+    for i in range(N):
         right = Chan()
         quickthread(f, left, right)
         left = right
@@ -219,16 +210,16 @@ def example_daisy():
         right.put(1)
     quickthread(putter)
 
-    print leftmost.get()
+    print(leftmost.get())
 
 EXAMPLES['daisy'] = example_daisy
 
 
 def main():
     if len(sys.argv) < 2 or sys.argv[1] not in EXAMPLES:
-        print "Possible examples:"
-        for example in EXAMPLES.iterkeys():
-            print "  %s" % example
+        print("Possible examples:")
+        for example in EXAMPLES:
+            print("  %s" % example)
         return
 
     EXAMPLES[sys.argv[1]]()
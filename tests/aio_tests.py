@@ -0,0 +1,182 @@
+import asyncio
+import unittest
+
+from chan import AsyncChan, Chan, SPSCChan, async_chanselect, quickthread
+from chan import ChanClosed, Timeout
+from chan.chan import _EMPTY
+
+
+def run(coro):
+    return asyncio.run(asyncio.wait_for(coro, 5))
+
+
+class RacingSPSCChan(SPSCChan):
+    """Puts a value just after async_chanselect finds the ring empty."""
+    def _get_nowait(self):
+        value = SPSCChan._get_nowait(self)
+        if value is _EMPTY and not self._tail:
+            self.put('raced')  # Lock-free, so it doesn't wait on the select
+        return value
+
+
+class AsyncChanTests(unittest.TestCase):
+    def test_coroutines(self):
+        async def main():
+            c = AsyncChan()
+
+            async def sayset():
+                for i in range(100):
+                    await c.put(i)
+                c.close()
+
+            task = asyncio.ensure_future(sayset())
+            results = [value async for value in c]
+            await task
+            return results
+        self.assertEqual(run(main()), list(range(100)))
+
+    def test_buffered(self):
+        async def main():
+            c = AsyncChan(3)
+            for i in range(3):
+                await c.put(i)
+            with self.assertRaises(Timeout):
+                await c.put(3, timeout=0.01)
+            c.close()
+            with self.assertRaises(ChanClosed):
+                await c.put(3)
+            return [value async for value in c]
+        self.assertEqual(run(main()), [0, 1, 2])
+
+    def test_timeout_and_cancel(self):
+        async def main():
+            c = AsyncChan()
+            with self.assertRaises(Timeout):
+                await c.get(timeout=0)
+            with self.assertRaises(Timeout):
+                await c.get(timeout=0.01)
+            task = asyncio.ensure_future(c.put('x'))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            self.assertEqual(len(c.chan._waiting_consumers), 0)
+            self.assertEqual(len(c.chan._waiting_producers), 0)
+        run(main())
+
+    def test_cancel_after_handoff(self):
+        async def main():
+            c = AsyncChan()
+            task = asyncio.ensure_future(c.get())
+            await asyncio.sleep(0.01)
+            c.chan.put('x', timeout=0)  # Hands 'x' to the waiting get
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            self.assertEqual(await c.get(timeout=1), 'x')
+
+            # Given back to a channel with nowhere to hold it.
+            task = asyncio.ensure_future(c.get())
+            await asyncio.sleep(0.01)
+            c.chan.put('y', timeout=0)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            self.assertEqual(len(c.chan._waiting_producers), 1)
+            self.assertEqual(c.chan.get(timeout=0), 'y')
+        run(main())
+
+    def test_thread_bridge(self):
+        chan = Chan()
+
+        def sayset():
+            for i in range(100):
+                chan.put(i)
+            chan.close()
+
+        def accumulate(c, into):
+            for value in c:
+                into.append(value)
+
+        async def main():
+            c = AsyncChan(chan=chan)
+            quickthread(sayset)
+            return [value async for value in c]
+        self.assertEqual(run(main()), list(range(100)))
+
+        # And from coroutines to a thread.
+        c = AsyncChan()
+        results = []
+        th = quickthread(accumulate, c.chan, results)
+
+        async def main2():
+            for i in range(100):
+                await c.put(i)
+            c.close()
+        run(main2())
+        th.join(1)
+        self.assertEqual(results, list(range(100)))
+
+
+class AsyncChanselectTests(unittest.TestCase):
+    def test_fan_in(self):
+        threaded = Chan()
+
+        def thread_sayset():
+            for i in range(50, 100):
+                threaded.put(i)
+            threaded.close()
+
+        async def sayset(c, values):
+            for value in values:
+                await c.put(value)
+            c.close()
+
+        async def main():
+            a = AsyncChan()
+            b = AsyncChan(5)
+            tasks = [asyncio.ensure_future(sayset(a, range(0, 25))),
+                     asyncio.ensure_future(sayset(b, range(25, 50)))]
+            quickthread(thread_sayset)
+
+            results = []
+            inchans = [a, b, threaded]
+            while inchans:
+                try:
+                    _, value = await async_chanselect(inchans, [])
+                    results.append(value)
+                except ChanClosed as ex:
+                    inchans.remove(ex.which)
+            await asyncio.gather(*tasks)
+            return results
+        self.assertEqual(sorted(run(main())), list(range(100)))
+
+    def test_produce_and_timeout(self):
+        async def main():
+            a = AsyncChan()
+            b = AsyncChan()
+            with self.assertRaises(Timeout):
+                await async_chanselect([a], [(b, 1)], timeout=0)
+            with self.assertRaises(Timeout):
+                await async_chanselect([a], [(b, 1)], timeout=0.01)
+            self.assertEqual(len(a.chan._waiting_consumers), 0)
+            self.assertEqual(len(b.chan._waiting_producers), 0)
+
+            task = asyncio.ensure_future(b.get())
+            ch, _ = await async_chanselect([a], [(b, 'x')])
+            self.assertIs(ch, b)
+            self.assertEqual(await task, 'x')
+        run(main())
+
+    def test_spsc_put_while_enqueueing(self):
+        async def main():
+            a = RacingSPSCChan(4)
+            b = AsyncChan()
+            ch, value = await async_chanselect([a, b], [], timeout=0.5)
+            self.assertIs(ch, a)
+            self.assertEqual(value, 'raced')
+        run(main())
+
+
+if __name__ == '__main__':
+    unittest.main()
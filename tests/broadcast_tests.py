@@ -0,0 +1,72 @@
+import time
+import unittest
+
+from chan import BroadcastChan, ChanClosed, Timeout, quickthread
+from chan.broadcast import DROP, SKIP
+
+
+class BroadcastChanTests(unittest.TestCase):
+    def test_every_subscriber_gets_every_item(self):
+        bc = BroadcastChan(4)
+        subs = [bc.subscribe() for _ in range(3)]
+        results = [[] for _ in subs]
+        threads = [quickthread(lambda s=s, r=r: r.extend(s))
+                   for s, r in zip(subs, results)]
+        for i in range(100):
+            bc.put(i, timeout=1)
+        bc.close()
+        for th in threads:
+            th.join(1)
+        self.assertEqual(results, [list(range(100))] * 3)
+        self.assertEqual(bc.subscribers, 0)
+        self.assertRaises(ChanClosed, bc.put, 100)
+
+    def test_late_subscriber(self):
+        bc = BroadcastChan(4)
+        bc.put('before')
+        sub = bc.subscribe()
+        bc.put('after')
+        self.assertEqual(sub.get(timeout=0), 'after')
+        self.assertRaises(Timeout, sub.get, timeout=0.01)
+
+    def test_block(self):
+        bc = BroadcastChan(2)
+        slow = bc.subscribe()
+        bc.put(1)
+        bc.put(2)
+        self.assertRaises(Timeout, bc.put, 3, timeout=0.01)
+        self.assertEqual(slow.get(), 1)
+        bc.put(3, timeout=0)
+
+        # Unsubscribing releases the producer too.
+        quickthread(lambda: time.sleep(0.02) or slow.unsubscribe())
+        bc.put(4, timeout=1)
+        self.assertRaises(ChanClosed, slow.get)
+
+    def test_drop(self):
+        bc = BroadcastChan(2)
+        reader = bc.subscribe()
+        laggard = bc.subscribe(policy=DROP)
+        for i in range(3):
+            bc.put(i, timeout=0)
+            self.assertEqual(reader.get(timeout=0), i)
+        self.assertTrue(laggard.dropped)
+        self.assertRaises(ChanClosed, laggard.get, timeout=0)
+        self.assertEqual(bc.subscribers, 1)
+
+    def test_skip(self):
+        bc = BroadcastChan(3)
+        sub = bc.subscribe(policy=SKIP)
+        for i in range(10):
+            bc.put(i, timeout=0)
+        bc.close()
+        self.assertEqual(list(sub), [7, 8, 9])
+        self.assertEqual(sub.skipped, 7)
+
+    def test_bad_arguments(self):
+        self.assertRaises(ValueError, BroadcastChan, 0)
+        self.assertRaises(ValueError, BroadcastChan(1).subscribe, 'wait')
+
+
+if __name__ == '__main__':
+    unittest.main()
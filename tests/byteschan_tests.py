@@ -0,0 +1,110 @@
+import time
+import unittest
+
+from chan import BytesChan, quickthread
+from chan import ChanClosed, Timeout
+
+
+class BytesChanTests(unittest.TestCase):
+    def test_simple(self):
+        c = BytesChan(64)
+        c.put(b'hello')
+        with c.reserve(10) as region:
+            region.view[:5] = b'world'
+            region.commit(5)
+        self.assertEqual(c.free, 64 - 15)
+
+        first = c.get()
+        self.assertEqual(first.view, b'hello')
+        with c.get() as second:
+            self.assertEqual(bytes(second.view), b'world')
+        first.release()
+        self.assertEqual(c.free, 64)
+        self.assertRaises(ValueError, first.view.tobytes)
+        self.assertRaises(ValueError, c.reserve, 65)
+
+    def test_wraparound_and_release_order(self):
+        c = BytesChan(30)
+        for data in [b'a' * 10, b'b' * 10, b'c' * 10]:
+            c.put(data)
+        a, b, cc = c.get(), c.get(), c.get()
+        self.assertRaises(Timeout, c.reserve, 1, timeout=0.01)
+
+        # Out of order: b's space is only reusable after a's.
+        b.release()
+        self.assertRaises(Timeout, c.reserve, 5, timeout=0.01)
+        a.release()
+        c.put(b'd' * 20)  # Wraps to the start of the slab
+        self.assertEqual(c.get().view, b'd' * 20)
+        self.assertEqual(cc.view, b'c' * 10)
+
+    def test_abort(self):
+        c = BytesChan(16)
+        try:
+            with c.reserve(16):
+                raise KeyError()
+        except KeyError:
+            pass
+        self.assertEqual(c.free, 16)
+        self.assertRaises(Timeout, c.get, timeout=0)
+
+    def test_failed_put(self):
+        c = BytesChan(16)
+        self.assertRaises(TypeError, c.put, 'abc')
+        self.assertEqual(c.free, 16)
+        c.close()
+        self.assertRaises(ChanClosed, c.get, timeout=0.1)
+
+    def test_blocking_producer_and_close(self):
+        c = BytesChan(100)
+
+        def sayset():
+            for i in range(50):
+                c.put(bytes([i]) * 40)
+            c.close()
+        quickthread(sayset)
+
+        results = []
+        for region in c:
+            results.append(region.view[0])
+            self.assertEqual(len(region.view), 40)
+            region.release()
+        self.assertEqual(results, list(range(50)))
+        self.assertRaises(ChanClosed, c.reserve, 1)
+
+    def test_close_waits_for_reserved(self):
+        c = BytesChan(16)
+        region = c.reserve(4)
+        c.close()
+
+        def finish():
+            time.sleep(0.02)
+            region.view[:] = b'last'
+            region.commit()
+        quickthread(finish)
+        self.assertEqual(c.get().view, b'last')
+        self.assertRaises(ChanClosed, c.get)
+
+    def test_zero_length(self):
+        c = BytesChan(100)
+        c.put(b'')
+        self.assertEqual(c.free, 100)
+        c.put(b'abc', timeout=0.2)
+        c.put(b'x' * 97, timeout=0.2)
+        self.assertRaises(Timeout, c.reserve, 1, timeout=0.01)
+
+        with c.get() as empty:
+            self.assertEqual(empty.view, b'')
+        abc = c.get()
+        self.assertEqual(abc.view, b'abc')
+        x = c.get()
+        abc.release()
+        c.put(b'', timeout=0.2)  # Where the tail meets the head
+        c.get().release()
+        c.put(b'def', timeout=0.2)
+        self.assertEqual(c.get().view, b'def')
+        self.assertEqual(x.view, b'x' * 97)
+
+
+if __name__ == '__main__':
+    unittest.main()
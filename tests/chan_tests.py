@@ -1,11 +1,14 @@
+import collections
 import random
 import threading
 import time
 import unittest
 
-from chan import Chan, chanselect, quickthread
+from chan import Chan, chanselect, quickthread, Selector
 from chan import ChanClosed, Timeout
-from chan.chan import RingBuffer
+from chan.chan import RingBuffer, GrowableRingBuffer
+from chan.chan import WaitQueue, Wish, WishGroup
+from chan.chan import WISH_CONSUME, _local
 
 
 def sayset(chan, phrases, delay=0.5):
@@ -54,6 +57,116 @@ class RingBufferTests(unittest.TestCase):
             buf.push('NaN')
             buf.pop()
 
+    def test_extend_pop_many(self):
+        buf = RingBuffer(5)
+        for i in range(12):
+            self.assertEqual(buf.extend([i, i + 1, i + 2]), 3)
+            self.assertEqual(buf.pop_many(2), [i, i + 1])
+            self.assertEqual(buf.pop(), i + 2)
+        buf.push('a')
+        self.assertEqual(buf.extend(list('bcdefg')), 4)
+        self.assertTrue(buf.full)
+        self.assertEqual(buf.pop_many(10), list('abcde'))
+        self.assertTrue(buf.empty)
+
+
+class GrowableRingBufferTests(unittest.TestCase):
+    def test_grow_and_shrink(self):
+        buf = GrowableRingBuffer(100, min_len=4)
+        self.assertEqual((len(buf.buf), buf.cap), (4, 100))
+        buf.push('x')
+        buf.pop()  # Wraps around before growing
+        for i in range(10):
+            buf.push(i)
+        self.assertEqual(len(buf.buf), 16)
+        self.assertEqual(buf.extend(list(range(10, 200))), 90)
+        self.assertEqual((len(buf.buf), len(buf)), (100, 100))
+        self.assertTrue(buf.full)
+        self.assertRaises(IndexError, buf.push, 'y')
+        self.assertEqual(buf.pop_many(95), list(range(95)))
+
+        # Stays small once the backlog clears.
+        for i in range(1000):
+            buf.push(i)
+            buf.pop()
+        self.assertLessEqual(len(buf.buf), 16)
+        self.assertEqual(buf.pop_many(10), [995, 996, 997, 998, 999])
+
+    def test_incremental_resize(self):
+        buf = GrowableRingBuffer(1000, min_len=4)
+        buf.extend(list(range(64)))
+        buf.push(64)  # Grows to 128 slots
+        self.assertIsNotNone(buf._old)
+        self.assertEqual(buf.buf[:65], [None] * 64 + [64])
+        buf.push(65)  # Copies over the first couple
+        self.assertEqual(buf.buf[:4], [0, 1, None, None])
+
+        expected = collections.deque(range(66))
+        rand = random.Random(7)
+        shrinks = 0
+        for i in range(66, 40000):
+            # Drains and fills up, in turns.
+            push = 0.4 if (i // 10000) % 2 else 0.2
+            op = rand.random()
+            size = len(buf.buf)
+            if op < push and not buf.full:
+                buf.push(i)
+                expected.append(i)
+            elif op < push + 0.1:
+                values = list(range(i, i + rand.randrange(20)))
+                expected.extend(values[:buf.extend(values)])
+            elif op < push + 0.15 and expected:
+                j = rand.randrange(len(expected))
+                buf.replace(j, -i)
+                expected[j] = -i
+            elif op < push + 0.2:
+                n = rand.randrange(50)
+                self.assertEqual(buf.pop_many(n),
+                                 [expected.popleft()
+                                  for _ in range(min(n, len(expected)))])
+            elif expected:
+                self.assertEqual(buf.pop(), expected.popleft())
+            self.assertEqual(len(buf), len(expected))
+            shrinks += len(buf.buf) < size
+        self.assertEqual(buf.pop_many(len(buf)), list(expected))
+        self.assertGreater(shrinks, 2)
+
+    def test_growable_chan(self):
+        c = Chan(1000, growable=True)
+        quickthread(sayset, c, list(range(500)), delay=0)
+        self.assertEqual(list(c), list(range(500)))
+        self.assertLessEqual(len(c._buf.buf), 1000)
+
+
+class WaitQueueTests(unittest.TestCase):
+    def make_wishes(self, n):
+        c = Chan()
+        return [Wish(WishGroup(), WISH_CONSUME, c, i) for i in range(n)]
+
+    def test_fifo(self):
+        q = WaitQueue()
+        wishes = self.make_wishes(5)
+        for w in wishes:
+            q.append(w)
+        self.assertEqual(len(q), 5)
+        self.assertEqual([q.popleft() for _ in range(5)], wishes)
+        self.assertEqual(len(q), 0)
+        self.assertRaises(IndexError, q.popleft)
+
+    def test_discard(self):
+        q = WaitQueue()
+        wishes = self.make_wishes(5)
+        for w in wishes:
+            q.append(w)
+        q.discard(wishes[0])
+        q.discard(wishes[2])
+        q.discard(wishes[4])
+        q.discard(wishes[2])  # Already gone
+        self.assertEqual(list(q), [wishes[1], wishes[3]])
+        self.assertEqual(q.popleft(), wishes[1])
+        q.append(wishes[2])
+        self.assertEqual(list(q), [wishes[3], wishes[2]])
+
 
 class ChanTests(unittest.TestCase):
     def test_simple(self):
@@ -122,6 +235,38 @@ class ChanTests(unittest.TestCase):
         self.assertRaises(Timeout, c.get, timeout=0.01)
         self.assertRaises(Timeout, c.put, 'x', timeout=0)
 
+    def test_timeouts_leave_no_waiters(self):
+        c = Chan()
+        ths = [quickthread(self.assertRaises, Timeout, c.get, timeout=0.05)
+               for _ in range(20)]
+        for th in ths:
+            th.join(1)
+        self.assertEqual(len(c._waiting_consumers), 0)
+        self.assertRaises(Timeout, c.put, 'x', timeout=0)
+
+    def test_blocking_reuses_thread_wish(self):
+        c = Chan()
+        wishes = []
+
+        def getter():
+            for _ in range(3):
+                c.get()
+                wishes.append(_local.wish)
+            # A timed out wish is reused too.
+            self.assertRaises(Timeout, c.get, timeout=0.01)
+            wishes.append(_local.wish)
+
+        th = quickthread(getter)
+        for i in range(3):
+            time.sleep(0.01)
+            c.put(i)
+        th.join(1)
+        self.assertEqual(len(wishes), 4)
+        self.assertTrue(all(w is wishes[0] for w in wishes))
+        # The wish doesn't hold on to the channel between waits.
+        self.assertIsNone(wishes[0].chan)
+        self.assertFalse(hasattr(c, '__dict__'))
+
     def test_chanselect_timeout(self):
         a = Chan()
         b = Chan()
@@ -161,6 +306,70 @@ class ChanTests(unittest.TestCase):
         self.assertEqual(len(results), 9)
         self.assertEqual(results, set(range(9)))
 
+    def test_wide_select(self):
+        chans = [Chan() for _ in range(1000)]
+        quickthread(chans[-1].put, 'last')
+        self.assertEqual(chanselect(chans, [], timeout=1), (chans[-1], 'last'))
+
+        # Selects on both ends, with timeouts, without losing an item.
+        def produce(values):
+            for value in values:
+                while True:
+                    try:
+                        chanselect([], [(c, value) for c in
+                                        random.sample(chans, 10)],
+                                   timeout=0.001)
+                        break
+                    except Timeout:
+                        pass
+        ths = [quickthread(produce, range(i, 400, 4)) for i in range(4)]
+        results = []
+        while len(results) < 400:
+            try:
+                results.append(chanselect(chans, [], timeout=0.001)[1])
+            except Timeout:
+                pass
+        for th in ths:
+            th.join(1)
+        self.assertEqual(sorted(results), list(range(400)))
+        self.assertFalse(any(c._waiting_consumers or c._waiting_producers
+                             for c in chans))
+
+    def test_try_get_put(self):
+        c = Chan(1)
+        self.assertIs(c.try_get(), None)
+        self.assertEqual(c.try_get('none'), 'none')
+        self.assertTrue(c.try_put('x'))
+        self.assertFalse(c.try_put('y'))
+        self.assertEqual(c.try_get(), 'x')
+
+        # An unbuffered channel hands off to a waiting thread.
+        u = Chan()
+        self.assertFalse(u.try_put('x'))
+        th = quickthread(u.put, 'y')
+        time.sleep(0.02)
+        self.assertEqual(u.try_get(), 'y')
+        th.join(1)
+
+        c.try_put('z')
+        c.close()
+        self.assertRaises(ChanClosed, c.try_put, 'w')
+        self.assertEqual(c.try_get(), 'z')
+        self.assertRaises(ChanClosed, c.try_get)
+
+    def test_chanselect_default(self):
+        a, b, c = Chan(1), Chan(1), Chan()
+        self.assertEqual(chanselect([a, b], [(c, 1)], default='d'),
+                         (None, 'd'))
+        self.assertEqual(chanselect([], [], default=None), (None, None))
+        b.put('x')
+        self.assertEqual(chanselect([a, b], [(c, 1)], default='d'), (b, 'x'))
+        self.assertEqual(chanselect([], [(c, 1), (a, 2)], default='d'),
+                         (a, None))
+        self.assertEqual(a.get(timeout=0), 2)
+        a.close()
+        self.assertRaises(ChanClosed, chanselect, [a], [], default='d')
+
     def test_buf_simple(self):
         S = 5
         c = Chan(S)
@@ -185,5 +394,114 @@ class ChanTests(unittest.TestCase):
         results = list(c)
         self.assertEqual(results, list(range(20)))
 
+
+class OverflowTests(unittest.TestCase):
+    def test_drop_newest(self):
+        c = Chan(3, overflow='drop_newest')
+        for i in range(5):
+            c.put(i, timeout=0)
+        self.assertEqual(c.put_many(range(5, 8), timeout=0), 3)
+        self.assertEqual(c.dropped, 5)
+        self.assertEqual(c.get_many(10), [0, 1, 2])
+
+    def test_drop_oldest(self):
+        c = Chan(3, overflow='drop_oldest', growable=True)
+        for i in range(5):
+            c.put(i, timeout=0)
+        self.assertTrue(c.try_put(5))
+        self.assertEqual(chanselect([], [(c, 6)], timeout=0), (c, None))
+        self.assertEqual(c.dropped, 4)
+        self.assertEqual(c.get_many(10), [4, 5, 6])
+
+    def test_sample(self):
+        c = Chan(10, overflow='sample').enable_stats()
+        c.put_many(range(1000), timeout=0)
+        sample = c.get_many(10)
+        self.assertEqual(len(sample), 10)
+        self.assertGreater(max(sample), 100)  # Not just the first ten
+        self.assertEqual(c.dropped, 990)
+        self.assertEqual(c.stats()['dropped'], 990)
+
+    def test_bad_policy(self):
+        self.assertRaises(ValueError, Chan, 1, overflow='drop')
+        self.assertRaises(ValueError, Chan, 0, overflow='drop_newest')
+
+
+class SelectorTests(unittest.TestCase):
+    def test_fan_in(self):
+        chans = [Chan() for _ in range(5)]
+        for i, c in enumerate(chans):
+            quickthread(sayset, c, list(range(10 * i, 10 * i + 10)),
+                        delay=0.001)
+
+        sel = Selector(chans)
+        results = []
+        while len(sel):
+            try:
+                _, value = sel.select()
+                results.append(value)
+            except ChanClosed as ex:
+                sel.remove(ex.which)
+        self.assertEqual(sorted(results), list(range(50)))
+
+    def test_produce_and_timeout(self):
+        a, b = Chan(), Chan(3)
+        sel = Selector([a], [(b, 0)])
+        for i in range(3):
+            sel.set_value(b, i)
+            self.assertEqual(sel.select(), (b, None))
+        self.assertRaises(Timeout, sel.select, timeout=0)
+        self.assertRaises(Timeout, sel.select, timeout=0.01)
+        self.assertRaises(Timeout, a.put, 'x', timeout=0)
+        self.assertEqual(list(b.get_many(3)), [0, 1, 2])
+
+        # Otherwise b, with room again, may go first.
+        sel.remove(b)
+        quickthread(a.put, 'x')
+        self.assertEqual(sel.select(timeout=1), (a, 'x'))
+        self.assertRaises(ValueError, sel.add_consumer, a)
+        self.assertEqual(sel.select(default='d'), (None, 'd'))
+        quickthread(a.put, 'y')
+        time.sleep(0.02)
+        self.assertEqual(sel.select(default='d'), (a, 'y'))
+        sel.remove(a)
+        self.assertEqual(len(sel), 0)
+        self.assertEqual(sel._group.wishes, [])
+
+
+class BatchTests(unittest.TestCase):
+    def test_buffered(self):
+        c = Chan(10)
+        self.assertEqual(c.put_many(range(15), timeout=0), 10)
+        self.assertEqual(c.get_many(4), [0, 1, 2, 3])
+        self.assertEqual(c.get_many(100), list(range(4, 10)))
+        self.assertRaises(Timeout, c.get_many, 10, timeout=0)
+
+    def test_cycles_waiting_producers(self):
+        c = Chan(3)
+        quickthread(c.put_many, range(10))
+        time.sleep(0.05)
+        # The buffer, plus the one value put_many is blocked on.
+        self.assertEqual(c.get_many(5), [0, 1, 2, 3])
+        self.assertEqual(c.get_many(100, linger=0.05), list(range(4, 10)))
+
+    def test_unbuffered_handoff(self):
+        c = Chan()
+        results = []
+        ths = [quickthread(lambda: results.append(c.get())) for _ in range(5)]
+        time.sleep(0.05)
+        self.assertEqual(c.put_many(range(8), timeout=0.05), 5)
+        for th in ths:
+            th.join(1)
+        self.assertEqual(sorted(results), list(range(5)))
+
+    def test_linger(self):
+        c = Chan()
+        quickthread(sayset, c, list(range(5)), delay=0.01)
+        self.assertEqual(c.get_many(2, linger=1.0), [0, 1])
+        self.assertEqual(c.get_many(100, linger=1.0), [2, 3, 4])
+        self.assertRaises(ChanClosed, c.get_many, 100)
+
+
 if __name__ == '__main__':
     unittest.main()
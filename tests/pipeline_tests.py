@@ -0,0 +1,79 @@
+import threading
+import time
+import unittest
+
+from chan import Chan, Timeout, quickthread
+from chan import pipeline
+
+
+def feed(values, buflen=0):
+    c = Chan(buflen)
+
+    def run():
+        for v in values:
+            c.put(v)
+        c.close()
+    quickthread(run)
+    return c
+
+
+class PipelineTests(unittest.TestCase):
+    def test_stages(self):
+        nums = feed(range(100))
+        squares = pipeline.map(lambda x: x * x, nums, workers=4, batch=8)
+        even = pipeline.filter(lambda x: x % 2 == 0, squares, buffer=16)
+        pairs = pipeline.flat_map(lambda x: [x, -x], even)
+        self.assertEqual(sorted(pairs),
+                         sorted(v for x in range(0, 100, 2)
+                                for v in (x * x, -x * x)))
+        # Closing propagated through each stage.
+        for stage in (squares, even, pairs):
+            stage.join(timeout=1)
+            self.assertTrue(stage.output.closed)
+        self.assertEqual(squares.metrics()['items_out'], 100)
+        self.assertEqual(even.metrics()['items_out'], 50)
+
+    def test_fan_out_merge_sink(self):
+        spread = pipeline.fan_out(feed(range(200)), 3)
+        workers = [pipeline.map(abs, out, name='abs%d' % i)
+                   for i, out in enumerate(spread.outputs)]
+        merged = pipeline.merge(workers, buffer=8)
+        got = []
+        lock = threading.Lock()
+
+        def collect(x):
+            with lock:
+                got.append(x)
+        done = pipeline.sink(collect, merged, workers=2)
+        done.join(timeout=2)
+        self.assertEqual(sorted(got), list(range(200)))
+        self.assertEqual(merged.metrics()['items_out'], 200)
+        self.assertRaises(AttributeError, lambda: spread.output)
+
+    def test_error_drains_input(self):
+        nums = Chan()
+        stage = pipeline.map(lambda x: 1 // x, nums)
+        out = []
+        quickthread(lambda: out.extend(stage.output))
+        for v in [1, 0, 2, 3]:
+            nums.put(v, timeout=1)
+        nums.close()
+        self.assertRaises(ZeroDivisionError, stage.join, timeout=1)
+        self.assertEqual(stage.metrics()['items_in'], 4)
+        self.assertEqual(out, [1])
+
+    def test_bottleneck(self):
+        slow = pipeline.map(lambda x: time.sleep(0.005) or x,
+                            feed(range(20)), name='slow')
+        fast = pipeline.map(lambda x: x, slow, name='fast')
+        self.assertRaises(Timeout, fast.join, timeout=0.02)
+        list(fast)
+        self.assertIs(pipeline.bottleneck([slow, fast]), slow)
+        m = slow.metrics()
+        self.assertEqual(m['running'], 0)
+        self.assertGreater(m['utilization'], 0.5)
+        self.assertEqual(m['queue_depth'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import sys
+import threading
+import time
+import unittest
+
+from chan import Chan, ChanClosed, Timeout, Pool, go, chanselect
+
+
+class PoolTests(unittest.TestCase):
+    def test_results(self):
+        pool = Pool(max_workers=4)
+        tasks = [pool.go(pow, i, 2) for i in range(50)]
+        self.assertEqual([t.result(timeout=1) for t in tasks],
+                         [i * i for i in range(50)])
+
+        failed = pool.go(int, 'x')
+        self.assertRaises(ValueError, failed.result, timeout=1)
+        pool.shutdown()
+        self.assertRaises(ChanClosed, pool.go, pow, 2, 2)
+
+        m = pool.metrics()
+        self.assertEqual((m['submitted'], m['completed']), (51, 51))
+        self.assertEqual((m['workers'], m['queue_depth']), (0, 0))
+        self.assertEqual(pool._threads, set())
+
+    def test_bounded_workers(self):
+        pool = Pool(max_workers=3, queue_size=100)
+        release = threading.Event()
+        tasks = [pool.go(release.wait) for _ in range(10)]
+        time.sleep(0.05)
+        m = pool.metrics()
+        self.assertEqual(m['workers'], 3)
+        self.assertEqual(m['active'], 3)
+        self.assertEqual(m['queue_depth'], 7)
+        self.assertRaises(Timeout, tasks[-1].join, timeout=0.01)
+
+        release.set()
+        for t in tasks:
+            t.join(timeout=1)
+        pool.shutdown()
+
+    def test_idle_reaping(self):
+        pool = Pool(min_workers=1, max_workers=4, idle_timeout=0.05)
+        release = threading.Event()
+        tasks = [pool.go(release.wait) for _ in range(4)]
+        time.sleep(0.02)
+        self.assertEqual(pool.metrics()['workers'], 4)
+        release.set()
+        for t in tasks:
+            t.join(timeout=1)
+        time.sleep(0.3)
+        self.assertEqual(pool.metrics()['workers'], 1)
+        self.assertEqual(len(pool._threads), 1)
+        self.assertEqual(pool.go(len, 'abc').result(timeout=1), 3)
+
+        release.clear()
+        tasks = [pool.go(release.wait) for _ in range(4)]
+        time.sleep(0.02)
+        names = [th.name for th in pool._threads]
+        self.assertEqual(len(set(names)), 4)
+        release.set()
+        pool.shutdown()
+
+    def test_system_exit(self):
+        pool = Pool(max_workers=2)
+        task = pool.go(sys.exit, 1)
+        task.join(timeout=1)
+        time.sleep(0.02)
+        self.assertEqual(pool.metrics()['workers'], 0)
+        self.assertEqual(pool._threads, set())
+        self.assertEqual(pool.go(len, 'abc').result(timeout=1), 3)
+        pool.shutdown()
+
+    def test_go_done_chan(self):
+        out = Chan()
+        task = go(out.put, 'hi')
+        ch, value = chanselect([out, task.done], [], timeout=1)
+        self.assertEqual((ch, value), (out, 'hi'))
+        self.assertRaises(ChanClosed, task.done.get, timeout=1)
+        self.assertIsNone(task.result())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import random
+import time
+import unittest
+
+from chan import PriorityChan, Chan, ChanClosed, chanselect, quickthread
+from chan.priority import HeapBuffer
+
+
+class HeapBufferTests(unittest.TestCase):
+    def test_order_and_cap(self):
+        buf = HeapBuffer(4, key=lambda v: v[0])
+        self.assertEqual(buf.extend([(2, 'a'), (1, 'b'), (2, 'c')]), 3)
+        self.assertEqual(buf.extend([(0, 'd'), (0, 'e')]), 1)
+        self.assertTrue(buf.full)
+        self.assertRaises(IndexError, buf.push, (0, 'e'))
+        self.assertEqual(buf.pop(), (0, 'd'))
+        self.assertEqual(buf.pop_many(5), [(1, 'b'), (2, 'a'), (2, 'c')])
+        self.assertTrue(buf.empty)
+
+
+class PriorityChanTests(unittest.TestCase):
+    def test_priority_and_stable(self):
+        c = PriorityChan(100, key=lambda job: job[0])
+        jobs = [(random.randint(0, 3), i) for i in range(100)]
+        for job in jobs:
+            c.put(job)
+        c.close()
+        self.assertEqual(list(c), sorted(jobs))
+
+    def test_waiting_producers_count(self):
+        c = PriorityChan(2)
+        c.put(5)
+        c.put(3)
+        th = quickthread(c.put, 1)
+        time.sleep(0.02)
+        # The blocked put is the most urgent.
+        self.assertEqual(c.get(timeout=1), 1)
+        th.join(1)
+        self.assertEqual(c.get_many(5), [3, 5])
+
+    def test_handoff_and_chanselect(self):
+        c = PriorityChan(4)
+        got = []
+        th = quickthread(lambda: got.append(c.get()))
+        time.sleep(0.02)
+        c.put('x')
+        th.join(1)
+        self.assertEqual(got, ['x'])
+
+        other = Chan()
+        c.put(2)
+        c.put(1)
+        self.assertEqual(chanselect([other, c], []), (c, 1))
+        c.close()
+        self.assertEqual(c.get(), 2)
+        self.assertRaises(ChanClosed, c.get)
+        self.assertRaises(ValueError, PriorityChan, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
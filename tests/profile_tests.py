@@ -0,0 +1,117 @@
+import threading
+import time
+import unittest
+
+from chan import BlockProfiler, Chan, chanselect, quickthread
+from chan import chan as chan_module
+from chan.profile import format_snapshot
+
+
+def slow_put(c, value, delay):
+    time.sleep(delay)
+    c.put(value)
+
+
+class BlockProfilerTests(unittest.TestCase):
+    def tearDown(self):
+        chan_module._set_block_hook(None)
+
+    def test_profile(self):
+        c = Chan().enable_stats('c')
+        other = Chan()
+        with BlockProfiler(threshold=0.01) as profiler:
+            for _ in range(3):
+                quickthread(slow_put, c, 1, 0.02)
+                c.get()
+            quickthread(c.put, 2)
+            time.sleep(0.01)
+            c.get()  # Doesn't block, so isn't sampled
+            quickthread(slow_put, other, 3, 0.02)
+            self.assertEqual(chanselect([c, other], []), (other, 3))
+        self.assertIsNone(chan_module._block_hook)
+
+        # The thread that put 2 was sampled too, but in its own stack.
+        records = [r for r in profiler.profile()
+                   if 'test_profile' in r['site']]
+        self.assertEqual([(r['chan'], r['count']) for r in records],
+                         [('c', 3), (repr(other), 1)])
+        self.assertGreaterEqual(records[0]['seconds'], 0.05)
+        self.assertIn('profile_tests.py', records[0]['site'])
+        self.assertIn('test_profile', records[0]['site'])
+        profiler.clear()
+        self.assertEqual(profiler.profile(), [])
+
+    def test_snapshot(self):
+        a, b, c = [Chan().enable_stats(name) for name in 'abc']
+        with BlockProfiler() as profiler:
+            self.assertEqual(profiler.snapshot(), [])
+            th1 = quickthread(a.put, 1, __name='producer')
+            th2 = quickthread(chanselect, [b, c], [], timeout=1,
+                              __name='selector')
+            time.sleep(0.05)
+            snapshot = profiler.snapshot()
+            a.get(timeout=1)
+            b.put(2, timeout=1)
+            th1.join(1)
+            th2.join(1)
+
+        self.assertEqual([entry['chan'] for entry in snapshot],
+                         ['a', 'b', 'c'])
+        producer = snapshot[0]['producers'][0]
+        self.assertEqual(producer['thread'], 'producer')
+        self.assertFalse(producer['timeout'])
+        self.assertGreater(producer['seconds'], 0.02)
+        self.assertEqual(snapshot[0]['consumers'], [])
+        for entry in snapshot[1:]:
+            self.assertEqual([w['thread'] for w in entry['consumers']],
+                             ['selector'])
+            self.assertTrue(entry['consumers'][0]['timeout'])
+        self.assertIn('consumer selector', format_snapshot(snapshot))
+
+    def test_snapshot_parked_before_start(self):
+        a = Chan()
+        th = quickthread(a.put, 1, __name='early')
+        time.sleep(0.05)
+        with BlockProfiler() as profiler:
+            snapshot = profiler.snapshot([a])
+            a.get(timeout=1)
+            th.join(1)
+            self.assertEqual(profiler.snapshot([a]), [])
+
+        self.assertEqual(len(snapshot), 1)
+        producer = snapshot[0]['producers'][0]
+        self.assertEqual(producer['thread'], 'early')
+        self.assertIsNone(producer['seconds'])
+        self.assertFalse(producer['timeout'])
+        self.assertTrue(producer['stack'])
+        self.assertIn('producer early, parked', format_snapshot(snapshot))
+
+    def test_deadlock(self):
+        a, b = Chan(), Chan()
+        reports = []
+        profiler = BlockProfiler(on_deadlock=reports.append).start()
+        started = threading.Barrier(2)
+
+        def swap(mine, theirs):
+            profiler.watch()
+            started.wait()
+            mine.get()
+            theirs.put(None)
+        th1 = quickthread(swap, a, b)
+        th2 = quickthread(swap, b, a)
+        time.sleep(0.1)
+        self.assertEqual(len(reports), 1)
+        self.assertEqual(len(reports[0]), 2)
+
+        # Unsticks the threads.
+        a.put(None, timeout=1)
+        a.get(timeout=1)
+        th1.join(1)
+        th2.join(1)
+        profiler.stop()
+        self.assertFalse(th1.is_alive() or th2.is_alive())
+        self.assertEqual(len(reports), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import time
+import unittest
+
+from chan import RateLimitedChan, Chan, ChanClosed, Timeout
+from chan import chanselect, quickthread
+
+
+class RateLimitedChanTests(unittest.TestCase):
+    def test_rate_and_burst(self):
+        c = RateLimitedChan(100, burst=5, buflen=100)
+        c.put_many(range(25))
+        start = time.monotonic()
+        self.assertEqual(c.get_many(10), [0, 1, 2, 3, 4])  # The burst
+        self.assertLess(c.tokens, 1)
+        self.assertRaises(Timeout, c.get, timeout=0)
+        got = [c.get(timeout=1) for _ in range(20)]
+        elapsed = time.monotonic() - start
+        self.assertEqual(got, list(range(5, 25)))
+        self.assertGreaterEqual(elapsed, 0.18)
+        self.assertLess(elapsed, 0.5)
+
+    def test_waiting_consumers_and_chanselect(self):
+        c = RateLimitedChan(50, buflen=10)
+        other = Chan()
+        results = []
+        th = quickthread(lambda: results.extend(
+            chanselect([other, c], [])[1] for _ in range(5)))
+        time.sleep(0.01)
+        start = time.monotonic()
+        for i in range(5):
+            c.put(i)
+        th.join(2)
+        self.assertEqual(results, [0, 1, 2, 3, 4])
+        # The first uses the initial token, and the rest wait 20ms apiece.
+        self.assertGreaterEqual(time.monotonic() - start, 0.07)
+
+    def test_close_keeps_rate(self):
+        c = RateLimitedChan(100, buflen=10)
+        c.put_many(range(5))
+        self.assertEqual(c.get(), 0)
+        got = []
+        th = quickthread(lambda: got.extend(c))
+        time.sleep(0.005)
+        start = time.monotonic()
+        c.close()
+        self.assertRaises(ChanClosed, c.put, 5)
+        th.join(1)
+        self.assertEqual(got, [1, 2, 3, 4])
+        self.assertGreaterEqual(time.monotonic() - start, 0.025)
+        self.assertRaises(ChanClosed, c.get, timeout=0)
+
+    def test_overflow(self):
+        c = RateLimitedChan(1, buflen=2, overflow='drop_oldest')
+        c.put_many(range(5), timeout=0)
+        self.assertEqual(c.get(), 3)
+        self.assertEqual(c.dropped, 3)
+        self.assertRaises(ValueError, RateLimitedChan, 0)
+        self.assertRaises(ValueError, RateLimitedChan, 1, buflen=0)
+
+
+if __name__ == '__main__':
+    unittest.main()
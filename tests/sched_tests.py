@@ -0,0 +1,97 @@
+import time
+import unittest
+
+from chan import Chan, ChanClosed, Timeout, quickthread
+from chan import Scheduler, Get, Put, Select, Sleep
+
+
+class SchedulerTests(unittest.TestCase):
+    def setUp(self):
+        self.sched = Scheduler(threads=2)
+
+    def tearDown(self):
+        self.sched.shutdown()
+
+    def test_pingpong(self):
+        def player(inp, out, hits):
+            for _ in range(hits):
+                ball = yield Get(inp)
+                yield Put(out, ball + 1)
+            return 'done'
+
+        def last_player(inp, out, hits):
+            yield from player(inp, out, hits)
+            return (yield Get(inp))
+
+        a, b = Chan(), Chan()
+        ping = self.sched.spawn(player, a, b, 50)
+        pong = self.sched.spawn(last_player, b, a, 49)
+        a.put(0)
+        self.assertEqual(pong.result(timeout=5), 99)
+        self.assertEqual(ping.result(timeout=5), 'done')
+        self.assertTrue(self.sched.wait(1))
+
+    def test_threads_and_goroutines(self):
+        def double(inp, out):
+            while True:
+                try:
+                    value = yield Get(inp)
+                except ChanClosed:
+                    out.close()
+                    return
+                yield Put(out, value * 2)
+
+        inp, out = Chan(), Chan()
+        self.sched.spawn(double, inp, out)
+        quickthread(lambda: [inp.put(i) for i in range(5)] and inp.close())
+        self.assertEqual(list(out), [0, 2, 4, 6, 8])
+
+    def test_select_timeout_sleep(self):
+        a, b = Chan(), Chan(1)
+
+        def g():
+            start = time.time()
+            yield Sleep(0.02)
+            slept = time.time() - start
+            try:
+                yield Get(a, timeout=0.02)
+                timed_out = False
+            except Timeout:
+                timed_out = True
+            ch, value = yield Select([a], [(b, 'x')])
+            return slept, timed_out, ch
+
+        task = self.sched.spawn(g)
+        slept, timed_out, ch = task.result(timeout=2)
+        self.assertGreaterEqual(slept, 0.015)
+        self.assertTrue(timed_out)
+        self.assertIs(ch, b)
+        self.assertEqual(b.get(timeout=0), 'x')
+
+    def test_many(self):
+        def f(left, right):
+            value = yield Get(right)
+            yield Put(left, value + 1)
+
+        n = 10000
+        leftmost = left = Chan()
+        for _ in range(n):
+            right = Chan()
+            self.sched.spawn(f, left, right)
+            left = right
+        right.put(1)
+        self.assertEqual(leftmost.get(timeout=10), n + 1)
+        self.assertTrue(self.sched.wait(5))
+        self.assertEqual(self.sched.live, 0)
+
+    def test_errors(self):
+        def bad():
+            yield 'not an op'
+
+        self.assertRaises(TypeError, self.sched.spawn, len, 'abc')
+        task = self.sched.spawn(bad)
+        self.assertRaises(TypeError, task.result, timeout=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+import multiprocessing
+import time
+import unittest
+
+from chan import ShmChan, quickthread
+from chan import ChanClosed, Timeout
+
+
+def sayset(name, values):
+    c = ShmChan.attach(name)
+    for value in values:
+        c.put(value)
+    c.close()
+    c.detach()
+
+
+def putall(name, values):
+    c = ShmChan.attach(name)
+    for value in values:
+        c.put(value)
+    c.detach()
+
+
+class ShmChanTests(unittest.TestCase):
+    def setUp(self):
+        self.chan = ShmChan(nslots=4, slot_size=64)
+
+    def tearDown(self):
+        self.chan.detach()
+        self.chan.unlink()
+
+    def test_payloads(self):
+        c = self.chan
+        c.put(b'raw bytes')
+        c.put({'pickled': [1, 2.5, None]})
+        c.put(bytearray(b'x' * 64))
+        self.assertEqual(c.get(), b'raw bytes')
+        self.assertEqual(c.get(), {'pickled': [1, 2.5, None]})
+        self.assertEqual(c.get(), b'x' * 64)
+        self.assertRaises(ValueError, c.put, b'x' * 65)
+
+    def test_timeout_and_close(self):
+        c = self.chan
+        self.assertRaises(Timeout, c.get, timeout=0)
+        self.assertRaises(Timeout, c.get, timeout=0.01)
+        for i in range(4):
+            c.put(i)
+        self.assertRaises(Timeout, c.put, 4, timeout=0.01)
+        c.close()
+        self.assertRaises(ChanClosed, c.put, 4)
+        self.assertEqual(list(c), [0, 1, 2, 3])
+        self.assertTrue(c.closed)
+
+    def test_attach_threads(self):
+        quickthread(sayset, self.chan.name, list(range(100)))
+        self.assertEqual(list(self.chan), list(range(100)))
+
+    def test_processes(self):
+        ctx = multiprocessing.get_context('spawn')
+        procs = [ctx.Process(target=putall,
+                             args=(self.chan.name,
+                                   [(i, j) for j in range(50)]))
+                 for i in range(4)]
+        for p in procs:
+            p.start()
+        results = [self.chan.get(timeout=10) for _ in range(4 * 50)]
+        for p in procs:
+            p.join(10)
+        self.assertRaises(Timeout, self.chan.get, timeout=0)
+        for i in range(4):
+            self.assertEqual([value for value in results if value[0] == i],
+                             [(i, j) for j in range(50)])
+
+    def test_blocked_get_wakes_on_close(self):
+        results = []
+
+        def getter():
+            try:
+                self.chan.get()
+            except ChanClosed:
+                results.append('closed')
+        th = quickthread(getter)
+        time.sleep(0.05)
+        ShmChan.attach(self.chan.name).close()
+        th.join(1)
+        self.assertEqual(results, ['closed'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import time
+import unittest
+
+from chan import Chan, SPSCChan, chanselect, quickthread
+from chan import ChanClosed, Timeout
+
+
+def sayset(chan, phrases, delay=0):
+    for ph in phrases:
+        chan.put(ph)
+        if delay:
+            time.sleep(delay)
+    chan.close()
+
+
+class RacingSPSCChan(SPSCChan):
+    """Puts a value just after chanselect finds the channel not ready, the
+    narrowest window for a lost wakeup."""
+    def _get_ready(self):
+        ready = SPSCChan._get_ready(self)
+        if not ready and not self._tail:
+            self.put('raced')  # Lock-free, so it doesn't wait on the select
+        return ready
+
+
+class SPSCChanTests(unittest.TestCase):
+    def test_nothing_lost(self):
+        for buflen in [1, 3, 64]:
+            c = SPSCChan(buflen)
+            quickthread(sayset, c, list(range(5000)))
+            self.assertEqual(list(c), list(range(5000)))
+            self.assertTrue(c.closed)
+
+    def test_slow_consumer(self):
+        c = SPSCChan(2)
+        th = quickthread(sayset, c, list(range(10)))
+        time.sleep(0.05)  # Producer fills the ring and blocks
+        self.assertTrue(th.is_alive())
+        results = []
+        for value in c:
+            results.append(value)
+            time.sleep(0.001)
+        self.assertEqual(results, list(range(10)))
+
+    def test_timeout(self):
+        c = SPSCChan(1)
+        self.assertRaises(Timeout, c.get, timeout=0)
+        self.assertRaises(Timeout, c.get, timeout=0.01)
+        c.put('x')
+        self.assertRaises(Timeout, c.put, 'y', timeout=0)
+        self.assertRaises(Timeout, c.put, 'y', timeout=0.01)
+        self.assertEqual(c.get(), 'x')
+        c.close()
+        self.assertRaises(ChanClosed, c.get)
+        self.assertRaises(ChanClosed, c.put, 'z')
+
+    def test_try_get_put(self):
+        c = SPSCChan(1)
+        self.assertIs(c.try_get(), None)
+        self.assertTrue(c.try_put('x'))
+        self.assertFalse(c.try_put('y'))
+        self.assertEqual(c.try_get(), 'x')
+        c.try_put('z')
+        c.close()
+        self.assertRaises(ChanClosed, c.try_put, 'w')
+        self.assertEqual(c.try_get(), 'z')
+        self.assertRaises(ChanClosed, c.try_get)
+
+    def test_chanselect(self):
+        a = SPSCChan(4)
+        b = Chan()
+        quickthread(sayset, a, list(range(100)), delay=0.0001)
+        quickthread(sayset, b, list(range(100, 200)), delay=0.0001)
+
+        results = []
+        inchans = [a, b]
+        while inchans:
+            try:
+                _, value = chanselect(inchans, [])
+                results.append(value)
+            except ChanClosed as ex:
+                inchans.remove(ex.which)
+        self.assertEqual(sorted(results), list(range(200)))
+        self.assertEqual([x for x in results if x < 100], list(range(100)))
+
+    def test_chanselect_put_while_enqueueing(self):
+        a = RacingSPSCChan(4)
+        b = Chan()
+        self.assertEqual(chanselect([a, b], [], timeout=0.5), (a, 'raced'))
+        a.close()
+        self.assertRaises(ChanClosed, chanselect, [a, b], [], timeout=0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+import gc
+import time
+import unittest
+
+from chan import Chan, chanselect, quickthread, live_chans, openmetrics
+from chan import Timeout
+
+
+class StatsTests(unittest.TestCase):
+    def test_disabled(self):
+        c = Chan(1)
+        c.put(1)
+        c.get()
+        self.assertIsNone(c.stats())
+        self.assertNotIn(c, live_chans())
+
+    def test_handoffs_and_buffered(self):
+        c = Chan(2).enable_stats('c')
+        c.put(1)
+        c.put(2)
+        quickthread(c.put, 3)
+        time.sleep(0.05)
+        self.assertEqual(c.stats()['waiting_producers'], 1)
+        self.assertEqual(c.get_many(5), [1, 2, 3])
+        self.assertRaises(Timeout, c.get, timeout=0.01)
+
+        snap = c.stats()
+        self.assertEqual(snap['name'], 'c')
+        self.assertEqual((snap['puts'], snap['gets']), (3, 3))
+        self.assertEqual((snap['buffered'], snap['handoffs']), (3, 0))
+        self.assertEqual(snap['buffer_high_water'], 2)
+        self.assertEqual(snap['buffer_len'], 0)
+        self.assertEqual(snap['waiting_producers'], 0)
+        self.assertEqual(snap['timeouts'], 1)
+        self.assertGreater(snap['get_blocked_seconds'], 0)
+
+        u = Chan().enable_stats()
+        th = quickthread(u.put, 'x')
+        time.sleep(0.05)
+        self.assertEqual(chanselect([u], [], timeout=1), (u, 'x'))
+        th.join(1)
+        snap = u.stats()
+        self.assertEqual((snap['puts'], snap['handoffs']), (1, 1))
+        self.assertGreater(snap['put_blocked_seconds'], 0)
+
+    def test_openmetrics(self):
+        c = Chan().enable_stats('quote"d')
+        self.assertIn(c, live_chans())
+        text = openmetrics()
+        self.assertIn('# TYPE chan_puts counter\n', text)
+        self.assertIn('chan_puts_total{chan="quote\\"d"} 0\n', text)
+        self.assertIn('chan_waiting_consumers{chan="quote\\"d"} 0\n', text)
+        self.assertTrue(text.endswith('# EOF\n'))
+
+        del c
+        gc.collect()
+        self.assertNotIn('quote', openmetrics())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import contextlib
+import io
+import time
+import unittest
+
+from chan import Chan, after, tick, chanselect
+from chan import Timeout
+from chan.timer import TimerService
+
+
+class TimerTests(unittest.TestCase):
+    def test_after(self):
+        start = time.time()
+        c = after(0.05)
+        fired = c.get(timeout=1)
+        self.assertGreaterEqual(fired - start, 0.04)
+        self.assertRaises(Timeout, c.get, timeout=0.05)
+        self.assertFalse(c.stop())
+
+    def test_order(self):
+        service = TimerService()
+        timers = [after(d, service) for d in [0.05, 0.01, 0.03, 0.02]]
+        c, _ = chanselect(timers, [], timeout=1)
+        self.assertIs(c, timers[1])
+        for t in timers[:1] + timers[2:]:
+            t.get(timeout=1)
+        self.assertEqual(service.pending, 0)
+
+    def test_stop(self):
+        service = TimerService()
+        timers = [after(0.02, service) for _ in range(200)]
+        for t in timers[:150]:
+            self.assertTrue(t.stop())
+            self.assertFalse(t.stop())
+        self.assertEqual(service.pending, 50)
+        for t in timers[150:]:
+            t.get(timeout=1)
+        for t in timers[:150]:
+            self.assertRaises(Timeout, t.get, timeout=0)
+
+    def test_chanselect_timeout(self):
+        c = Chan()
+        ch, _ = chanselect([c, after(0.01)], [])
+        self.assertIsNot(ch, c)
+
+    def test_tick(self):
+        service = TimerService()
+        start = time.monotonic()
+        t = tick(0.02, service)
+        for _ in range(5):
+            t.get(timeout=1)
+        elapsed = time.monotonic() - start
+        self.assertGreaterEqual(elapsed, 0.09)
+        self.assertLess(elapsed, 0.5)
+
+        # Slow receivers miss ticks, rather than getting a backlog.
+        time.sleep(0.1)
+        t.get(timeout=0)
+        self.assertRaises(Timeout, t.get, timeout=0)
+        t.stop()
+        time.sleep(0.05)
+        self.assertEqual(service.pending, 0)
+        self.assertRaises(Timeout, t.get, timeout=0)
+
+    def test_callback_raises(self):
+        service = TimerService()
+
+        def boom():
+            raise KeyError('boom')
+        stderr = io.StringIO()
+        with contextlib.redirect_stderr(stderr):
+            service.schedule(time.monotonic(), boom)
+            after(0.02, service).get(timeout=1)
+        self.assertIn('KeyError', stderr.getvalue())
+
+
+if __name__ == '__main__':
+    unittest.main()
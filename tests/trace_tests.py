@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from chan import Chan, ChanClosed, chanselect, quickthread
+from chan import TraceRecorder, set_trace_hook
+from chan import chan as chan_module
+
+
+def thread_events(trace, name):
+    """The (event, phase, chan) of the events on the named thread."""
+    tids = [e['tid'] for e in trace['traceEvents']
+            if e['ph'] == 'M' and e['args']['name'] == name]
+    return [(e['name'], e['ph'], e.get('args', {}).get('chan'))
+            for e in trace['traceEvents']
+            if e['ph'] != 'M' and e['tid'] in tids]
+
+
+class TraceTests(unittest.TestCase):
+    def tearDown(self):
+        set_trace_hook(None)
+
+    def test_handoff(self):
+        c = Chan().enable_stats('c')
+        with TraceRecorder() as rec:
+            th = quickthread(c.put, 'x', __name='producer')
+            time.sleep(0.02)
+            self.assertEqual(c.get(), 'x')
+            th.join(1)
+            c.close()
+            self.assertRaises(ChanClosed, c.get)
+        self.assertIsNone(chan_module._trace_hook)
+        c2 = Chan(1)
+        c2.put(1)  # Not recorded
+
+        trace = rec.chrome_trace()
+        self.assertEqual(thread_events(trace, 'producer'), [
+            ('put parked', 'B', 'c'),
+            ('put parked', 'E', 'c'),
+            ('put', 'i', 'c'),
+        ])
+        main = threading.current_thread().name
+        self.assertEqual(thread_events(trace, main),
+                         [('get', 'i', 'c'), ('close', 'i', 'c')])
+        stamps = [e['ts'] for e in trace['traceEvents'] if e['ph'] != 'M']
+        self.assertTrue(all(stamps))
+
+    def test_chanselect(self):
+        a, b = Chan(), Chan(1)
+        b.put(1)
+        with TraceRecorder() as rec:
+            self.assertEqual(chanselect([a, b], []), (b, 1))
+            quickthread(a.put, 2, __name='producer')
+            self.assertEqual(chanselect([a], [], timeout=1), (a, 2))
+        events = [(e['name'], e['ph'], e.get('args', {}).get('chan'))
+                  for e in rec.chrome_trace()['traceEvents']
+                  if e['name'] in ('select', 'select parked')]
+        self.assertEqual(events[0], ('select', 'i', repr(b)))
+        self.assertEqual(events[-1], ('select', 'i', repr(a)))
+
+    def test_batches(self):
+        c = Chan(2).enable_stats('c')
+        with TraceRecorder() as rec:
+            th = quickthread(c.put_many, [1, 2, 3], __name='producer')
+            time.sleep(0.02)  # Parks on the third item
+            self.assertEqual(c.get_many(5), [1, 2, 3])
+            th.join(1)
+            self.assertTrue(c.try_put(4))
+            self.assertEqual(c.try_get(), 4)
+
+        trace = rec.chrome_trace()
+        self.assertEqual(thread_events(trace, 'producer'), [
+            ('put', 'i', 'c'),
+            ('put', 'i', 'c'),
+            ('put parked', 'B', 'c'),
+            ('put parked', 'E', 'c'),
+            ('put', 'i', 'c'),
+        ])
+        main = threading.current_thread().name
+        self.assertEqual(thread_events(trace, main),
+                         [('get', 'i', 'c')] * 3 +
+                         [('put', 'i', 'c'), ('get', 'i', 'c')])
+
+    def test_write_chrome_trace(self):
+        c = Chan(1)
+        with TraceRecorder() as rec:
+            c.put(1)
+            c.get()
+        fd, path = tempfile.mkstemp(suffix='.json')
+        os.close(fd)
+        try:
+            rec.write_chrome_trace(path)
+            with open(path) as f:
+                trace = json.load(f)
+        finally:
+            os.unlink(path)
+        self.assertEqual([e['name'] for e in trace['traceEvents']],
+                         ['thread_name', 'put', 'get'])
+
+
+if __name__ == '__main__':
+    unittest.main()